@@ -0,0 +1 @@
+"""Adapters connecting the Sorque engine to external services (storage, LLMs)."""
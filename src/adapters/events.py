@@ -0,0 +1,176 @@
+# src/adapters/events.py
+"""Append-only player event log (``world_events`` in data/sorque.db).
+
+Attach an EventLog to a Game and every look/move/do, death, restart and undo
+is recorded as one row:
+
+    id         "<player_id>:<kind>:<seq>"
+    player_id  who
+    seq        numbers the player's events; replay order (assigned by SQLite)
+    loc_id     room the action started in
+    kind       look | move | do | death | restart | undo
+    payload    JSON arguments, e.g. {"dir": "north", "to": "5"} or {"id": "take_hatchet", "ok": true}
+    ts         UTC "YYYY-MM-DD HH:MM:SS.ffffff" (sorts with CURRENT_TIMESTAMP values)
+
+``record`` only appends a tuple to an in-memory buffer; the background writer
+(see storage.WriteBehind) turns the buffer into bulk INSERTs. Each INSERT
+takes the player's next ``seq`` from the table inside the write transaction,
+so processes logging the same player interleave instead of colliding, and
+nothing is looked up on the recording thread. An index on
+``(player_id, seq)`` keeps that and per-player reads cheap, and ``replay``
+re-applies a player's stream in ``seq`` order to rebuild their Game (``ts`` is
+wall-clock time, so it only filters: a clock step must not reorder a
+session). Tables from before ``seq`` existed get the column added and
+backfilled from ``id``.
+"""
+from __future__ import annotations
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Tuple
+
+from backend.oo import (EV_DO, EV_LOOK, EV_MOVE, EV_RESTART, EV_UNDO, UNDO_LIMIT,
+                        EventHook, Game, History, World)
+from .storage import DEFAULT_DB, WriteBehind, connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS world_events (
+  id TEXT PRIMARY KEY,
+  player_id TEXT,
+  loc_id TEXT,
+  kind TEXT,             -- explore_render | explore_outcome | romance_outcome | ...
+  payload TEXT,
+  ts TEXT DEFAULT CURRENT_TIMESTAMP,
+  seq INTEGER
+)
+"""
+INDEX = "CREATE INDEX IF NOT EXISTS idx_events_player_seq ON world_events (player_id, seq)"
+COLUMNS = "PRAGMA table_info(world_events)"
+ADD_SEQ = "ALTER TABLE world_events ADD COLUMN seq INTEGER"
+# older rows of ours carry seq only as the id suffix ("p:kind:41" -> 41)
+BACKFILL_SEQ = ("UPDATE world_events SET seq = CAST(replace(id, rtrim(id, '0123456789'), '') AS INTEGER) "
+                "WHERE seq IS NULL AND kind IN ('look', 'move', 'do', 'death', 'restart', 'undo')")
+
+# plain INSERT: a duplicate id is an error, never a silently dropped event
+INSERT_EVENT = """
+INSERT INTO world_events (id, player_id, loc_id, kind, payload, ts, seq)
+SELECT ?1 || ':' || ?3 || ':' || n, ?1, ?2, ?3, ?4, ?5, n
+FROM (SELECT coalesce(max(seq), 0) + 1 AS n FROM world_events WHERE player_id = ?1)
+"""
+SELECT_EVENTS = ("SELECT kind, loc_id, payload, ts FROM world_events "
+                 "WHERE player_id = ? AND ts >= ? ORDER BY seq")
+
+# (player_id, kind, loc_id, payload, unix time) as buffered by record()
+Buffered = Tuple[str, str, str, Dict[str, Any], float]
+Event = Tuple[str, str, Dict[str, Any], str]  # (kind, loc_id, payload, ts)
+
+
+def _ts(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+class EventLog(WriteBehind):
+    """Buffered, batched writer for ``world_events``.
+
+    Args:
+        path: SQLite file (default data/sorque.db, or $SORQUE_DB)
+        flush_interval: seconds the writer waits to gather a bulk insert
+        batch_size: max rows per transaction
+    """
+    thread_name = "sorque-event-writer"
+
+    def __init__(self, path: os.PathLike | str = DEFAULT_DB, flush_interval: float = 0.2, batch_size: int = 2000):
+        conn, lock = connect(path)
+        with lock:
+            conn.execute(SCHEMA)
+            if "seq" not in {col[1] for col in conn.execute(COLUMNS)}:
+                conn.execute(ADD_SEQ)
+                conn.execute(BACKFILL_SEQ)
+            conn.execute(INDEX)
+        super().__init__(path, flush_interval, batch_size)
+        self.stats["events"] = 0
+
+    # ---------- recording ----------
+    def record(self, player_id: str, kind: str, loc_id: str, payload: Dict[str, Any]) -> None:
+        """Buffer one event; returns immediately."""
+        with self._cond:
+            self._check_open()
+            self._pending.append((player_id, kind, loc_id, payload, time.time()))
+            self.stats["events"] += 1
+            self._cond.notify()
+
+    def hook(self, player_id: str) -> EventHook:
+        """A ``Game.on_event`` callback recording under ``player_id``."""
+        def on_event(kind: str, loc_id: str, payload: Dict[str, Any]) -> None:
+            self.record(player_id, kind, loc_id, payload)
+        return on_event
+
+    def attach(self, game: Game, player_id: str) -> Game:
+        game.on_event = self.hook(player_id)
+        return game
+
+    # ---------- reading ----------
+    def events(self, player_id: str, since: str = "") -> Iterator[Event]:
+        """The player's committed events in ``seq`` order (call ``flush()`` first to
+        include buffered ones). ``since`` is an inclusive ``ts`` lower bound."""
+        conn, lock = connect(self.path)
+        with lock:
+            rows = conn.execute(SELECT_EVENTS, (player_id, since)).fetchall()
+        for kind, loc_id, payload, ts in rows:
+            yield kind, loc_id, json.loads(payload) if payload else {}, ts
+
+    # ---------- internals ----------
+    def _new_queue(self) -> List[Buffered]:
+        return []
+
+    def _requeue(self, batch: List[Buffered]) -> None:
+        self._pending[:0] = batch  # keep order
+
+    def _write(self, batch: List[Buffered]) -> None:
+        dumps = json.dumps
+        for i in range(0, len(batch), self.batch_size):
+            rows = [(pid, loc, kind, dumps(payload), _ts(t)) for pid, kind, loc, payload, t in
+                    batch[i:i + self.batch_size]]
+            try:
+                self._commit(INSERT_EVENT, rows)
+            except sqlite3.Error:
+                del batch[:i]  # committed chunks must not be requeued: they'd be logged twice
+                raise
+
+
+# -----------------------------
+# Replay
+# -----------------------------
+
+def apply_event(game: Game, kind: str, payload: Dict[str, Any]) -> None:
+    """Re-apply one recorded event to a Game without ``on_event``. Deaths are
+    consequences, not inputs; they are skipped (the preceding ``do``
+    reproduces them)."""
+    if kind == EV_MOVE:
+        game.move(payload["dir"])
+    elif kind == EV_DO:
+        game.do(payload["id"])
+    elif kind == EV_LOOK:
+        game.look()
+    elif kind == EV_RESTART:
+        game.restart()
+        if game.history is not None:
+            game.history.clear()  # a restart starts a fresh session
+    elif kind == EV_UNDO:
+        game.undo(int(payload.get("steps", 1)))
+    # anything else (EV_DEATH, other writers' kinds like explore_render) is ignored
+
+
+def replay(world: World, events: Iterator[Event], undo_limit: int = UNDO_LIMIT) -> Game:
+    """Rebuild a Game by re-applying an event stream (e.g. ``EventLog.events``).
+
+    ``undo_limit`` must match the History depth the session was played with
+    for undo events to land on the same states.
+    """
+    game = world.new_game(history=History(undo_limit))
+    for kind, _loc, payload, _ts in events:
+        apply_event(game, kind, payload)
+    game.history.clear()
+    return game
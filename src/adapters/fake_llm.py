@@ -0,0 +1,144 @@
+# src/adapters/fake_llm.py
+"""Local stand-in for an OpenAI-compatible chat endpoint.
+
+Answers ``POST /v1/chat/completions`` with a server-sent-event stream that
+echoes the authored passage from the prompt word by word, so LLMClient can
+be exercised without network access or an API key:
+
+    python -m adapters.fake_llm --port 8765 --token-delay 0.03
+    SORQUE_LLM_URL=http://127.0.0.1:8765/v1 streamlit run src/app/app.py
+
+``--fail-rate`` answers that share of requests with 503 (to exercise retries);
+``--stall`` waits that many seconds before the first token (deadlines).
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+MARKER = "Authored passage:\n"
+
+
+@dataclass
+class FakeLLMOptions:
+    token_delay: float = 0.01
+    fail_rate: float = 0.0
+    stall: float = 0.0
+
+
+class FakeLLM:
+    """The server; ``stats`` counts requests, 503s and in-flight peaks."""
+
+    def __init__(self, options: Optional[FakeLLMOptions] = None):
+        self.options = options or FakeLLMOptions()
+        self.stats: Dict[str, int] = {"requests": 0, "failed": 0, "inflight": 0, "max_inflight": 0}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        s = self.stats
+        s["requests"] += 1
+        s["inflight"] += 1
+        s["max_inflight"] = max(s["max_inflight"], s["inflight"])
+        try:
+            await self._respond(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client gave up (deadline); nothing to do
+        finally:
+            s["inflight"] -= 1
+            writer.close()
+
+    async def _respond(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            k, _, v = line.decode("latin-1").partition(":")
+            if k.strip().lower() == "content-length":
+                length = int(v)
+        body = json.loads(await reader.readexactly(length) or b"{}")
+
+        opts = self.options
+        if opts.fail_rate and random.random() < opts.fail_rate:
+            self.stats["failed"] += 1
+            msg = b'{"error": "overloaded"}'
+            writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(msg), msg))
+            await writer.drain()
+            return
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        if opts.stall:
+            await asyncio.sleep(opts.stall)
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        passage = prompt.split(MARKER, 1)[-1]
+        for i, word in enumerate(passage.split(" ")):
+            event = {"choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}}]}
+            await self._chunk(writer, f"data: {json.dumps(event)}\n\n")
+            if opts.token_delay:
+                await asyncio.sleep(opts.token_delay)
+        await self._chunk(writer, "data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    async def _chunk(writer: asyncio.StreamWriter, text: str) -> None:
+        data = text.encode("utf-8")
+        writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+        await writer.drain()
+
+
+def serve_in_thread(options: Optional[FakeLLMOptions] = None,
+                    host: str = "127.0.0.1", port: int = 0) -> Tuple[str, FakeLLM, Callable[[], None]]:
+    """Start a FakeLLM on a background loop; returns (base_url, server, stop)."""
+    fake = FakeLLM(options)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    box = {}
+
+    async def start() -> None:
+        box["server"] = await asyncio.start_server(fake.handle, host, port)
+        started.set()
+
+    thread = threading.Thread(target=loop.run_forever, name="sorque-fake-llm", daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(start(), loop)
+    started.wait()
+    bound = box["server"].sockets[0].getsockname()[1]
+
+    def stop() -> None:
+        loop.call_soon_threadsafe(box["server"].close)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=2.0)
+
+    return f"http://{host}:{bound}/v1", fake, stop
+
+
+async def _serve(host: str, port: int, options: FakeLLMOptions) -> None:
+    server = await asyncio.start_server(FakeLLM(options).handle, host, port)
+    print(f"fake LLM on http://{host}:{port}/v1  (SORQUE_LLM_URL)")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Run a fake OpenAI-compatible streaming endpoint.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--token-delay", type=float, default=0.03, help="seconds between tokens")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    ap.add_argument("--stall", type=float, default=0.0, help="seconds to wait before the first token")
+    args = ap.parse_args()
+    try:
+        asyncio.run(_serve(args.host, args.port, FakeLLMOptions(args.token_delay, args.fail_rate, args.stall)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
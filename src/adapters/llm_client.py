@@ -0,0 +1,341 @@
+# src/adapters/llm_client.py
+"""Asyncio LLM client that turns authored text into prose.
+
+Speaks the OpenAI-compatible ``POST {base_url}/chat/completions`` API with
+``stream: true`` (server-sent events) over a small stdlib HTTP/1.1 client, so
+it needs no extra dependencies. Guarantees:
+
+- at most ``max_concurrency`` requests in flight (an asyncio.Semaphore);
+- every request has a deadline; when it passes -- while queued, connecting
+  or mid-stream -- the result is the authored text, immediately;
+- connection errors, 429 and 5xx are retried with full-jitter exponential
+  backoff, but only before the first token and only while time remains;
+- tokens are delivered to ``on_token`` as they arrive.
+
+``ProseService`` runs a client on a private event-loop thread and exposes a
+blocking facade, so a Streamlit rerun (or a ProseCache generator) can call
+it without owning an event loop. Configure with $SORQUE_LLM_URL,
+$OPENAI_API_KEY and $SORQUE_LLM_MODEL; ``python -m adapters.fake_llm`` is a
+local server for development and tests.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import queue
+import random
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .prose_cache import ProseRequest, TokenCallback
+
+PROMPT_VERSION = 1
+SYSTEM_PROMPT = (
+    "You narrate a text adventure. Rewrite the authored passage as vivid second-person prose. "
+    "Keep every fact, exit, object and hazard it mentions; add nothing the player could act on. "
+    "Two to four sentences. Plain text only."
+)
+
+@dataclass(frozen=True)
+class LLMConfig:
+    base_url: str = "https://api.openai.com/v1"
+    api_key: Optional[str] = None
+    model: str = "gpt-4o-mini"
+    max_concurrency: int = 4
+    deadline_s: float = 6.0        # default per-request budget, queueing included
+    retries: int = 2
+    backoff_base_s: float = 0.2
+    backoff_max_s: float = 2.0
+    temperature: float = 0.7
+    max_tokens: int = 220
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMConfig"]:
+        """Config from the environment, or None if no LLM is configured."""
+        url = os.environ.get("SORQUE_LLM_URL")
+        key = os.environ.get("OPENAI_API_KEY")
+        if not url and not key:
+            return None
+        kw = {}
+        if url:
+            kw["base_url"] = url
+        if os.environ.get("SORQUE_LLM_MODEL"):
+            kw["model"] = os.environ["SORQUE_LLM_MODEL"]
+        if os.environ.get("SORQUE_LLM_DEADLINE"):
+            kw["deadline_s"] = float(os.environ["SORQUE_LLM_DEADLINE"])
+        return cls(api_key=key, **kw)
+
+
+class ProseResult(NamedTuple):
+    text: str
+    source: str              # "llm" | "fallback"
+    error: Optional[str]     # why we fell back (None on success)
+    latency_s: float
+    attempts: int
+
+
+class LLMError(Exception):
+    def __init__(self, message: str, retryable: bool):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def build_messages(req: ProseRequest) -> List[Dict[str, str]]:
+    where = f"Location: {req.room_name}\n" if req.room_name else ""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{where}Kind: {req.kind}\nAuthored passage:\n{req.authored}"},
+    ]
+
+
+# -----------------------------
+# Minimal HTTP/1.1 + SSE
+# -----------------------------
+
+async def _read_headers(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise LLMError("connection closed before response", retryable=True)
+    parts = status_line.decode("latin-1").split(" ", 2)
+    if len(parts) < 2 or not parts[1].isdigit():
+        raise LLMError(f"bad status line {status_line!r}", retryable=True)
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        k, _, v = line.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+    return int(parts[1]), headers
+
+
+async def _body_chunks(reader: asyncio.StreamReader, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size_line = await reader.readline()
+            if not size_line:
+                return
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                await reader.readline()
+                return
+            data = await reader.readexactly(size)
+            await reader.readline()  # CRLF after each chunk
+            yield data
+    elif "content-length" in headers:
+        remaining = int(headers["content-length"])
+        while remaining > 0:
+            data = await reader.read(min(remaining, 65536))
+            if not data:
+                return
+            remaining -= len(data)
+            yield data
+    else:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            yield data
+
+
+async def _sse_data(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Yield the payload of each ``data:`` line."""
+    buf = b""
+    async for chunk in chunks:
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            line = line.rstrip(b"\r")
+            if line.startswith(b"data:"):
+                yield line[5:].strip().decode("utf-8")
+
+
+# -----------------------------
+# Client
+# -----------------------------
+
+class LLMClient:
+    """Async prose client; create and use it on one event loop."""
+
+    def __init__(self, config: LLMConfig):
+        self.config = config
+        url = urlsplit(config.base_url.rstrip("/") + "/chat/completions")
+        self._https = url.scheme == "https"
+        self._host = url.hostname or "localhost"
+        self._port = url.port or (443 if self._https else 80)
+        self._path = url.path + (f"?{url.query}" if url.query else "")
+        self._ssl = ssl.create_default_context() if self._https else None
+        self._sem = asyncio.Semaphore(config.max_concurrency)
+        self.stats: Dict[str, int] = {"requests": 0, "ok": 0, "fallbacks": 0, "retries": 0, "timeouts": 0}
+
+    @property
+    def namespace(self) -> str:
+        return f"llm:{self.config.model}:p{PROMPT_VERSION}"
+
+    async def generate(self, req: ProseRequest, deadline_s: Optional[float] = None,
+                       on_token: Optional[TokenCallback] = None) -> ProseResult:
+        """Prose for ``req``; the authored text if anything fails or the deadline passes."""
+        budget = self.config.deadline_s if deadline_s is None else deadline_s
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        attempts = 0
+        self.stats["requests"] += 1
+        try:
+            async with asyncio.timeout_at(t0 + budget):
+                async with self._sem:
+                    while True:
+                        attempts += 1
+                        got_tokens = False
+                        pieces: List[str] = []
+                        try:
+                            async for tok in self._stream_once(req):
+                                got_tokens = True
+                                pieces.append(tok)
+                                if on_token is not None:
+                                    on_token(tok)
+                            text = "".join(pieces).strip()
+                            if not text:
+                                raise LLMError("empty completion", retryable=True)
+                            self.stats["ok"] += 1
+                            return ProseResult(text, "llm", None, loop.time() - t0, attempts)
+                        except (LLMError, OSError, asyncio.IncompleteReadError, ValueError) as e:
+                            retryable = getattr(e, "retryable", True)
+                            if got_tokens or not retryable or attempts > self.config.retries:
+                                raise
+                            self.stats["retries"] += 1
+                            cap = min(self.config.backoff_max_s, self.config.backoff_base_s * 2 ** (attempts - 1))
+                            await asyncio.sleep(random.uniform(0, cap))  # full jitter
+        except TimeoutError:
+            self.stats["timeouts"] += 1
+            return self._fallback(req, "deadline exceeded", loop.time() - t0, attempts)
+        except (LLMError, OSError, asyncio.IncompleteReadError, ValueError) as e:
+            return self._fallback(req, f"{type(e).__name__}: {e}", loop.time() - t0, attempts)
+
+    def _fallback(self, req: ProseRequest, why: str, latency: float, attempts: int) -> ProseResult:
+        self.stats["fallbacks"] += 1
+        return ProseResult(req.authored, "fallback", why, latency, attempts)
+
+    async def _stream_once(self, req: ProseRequest) -> AsyncIterator[str]:
+        body = json.dumps({
+            "model": self.config.model,
+            "messages": build_messages(req),
+            "stream": True,
+            "temperature": self.config.temperature,
+            "max_tokens": self.config.max_tokens,
+        }).encode("utf-8")
+        head = [
+            f"POST {self._path} HTTP/1.1",
+            f"Host: {self._host}",
+            "Content-Type: application/json",
+            "Accept: text/event-stream",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        if self.config.api_key:
+            head.append(f"Authorization: Bearer {self.config.api_key}")
+        reader, writer = await asyncio.open_connection(self._host, self._port, ssl=self._ssl)
+        try:
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+            status, headers = await _read_headers(reader)
+            if status != 200:
+                detail = b""
+                async for chunk in _body_chunks(reader, headers):
+                    detail += chunk
+                    if len(detail) > 2048:
+                        break
+                raise LLMError(f"HTTP {status}: {detail[:200].decode('utf-8', 'replace')}",
+                               retryable=status == 429 or status >= 500)
+            async for data in _sse_data(_body_chunks(reader, headers)):
+                if data == "[DONE]":
+                    return
+                event = json.loads(data)
+                for choice in event.get("choices") or ():
+                    tok = (choice.get("delta") or {}).get("content")
+                    if tok:
+                        yield tok
+        finally:
+            writer.close()
+
+
+# -----------------------------
+# Blocking facade
+# -----------------------------
+
+class ProseService:
+    """Runs an LLMClient on its own event-loop thread.
+
+    Callable as a ProseCache generator: returns the prose, or None when it
+    fell back (so the authored text is served but not cached).
+    """
+
+    def __init__(self, config: LLMConfig):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="sorque-llm-loop", daemon=True)
+        self._thread.start()
+        self.client: LLMClient = self._run(self._make_client(config)).result()
+        self.last_result: Optional[ProseResult] = None
+
+    async def _make_client(self, config: LLMConfig) -> LLMClient:
+        return LLMClient(config)  # the Semaphore must be created on the loop thread
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    @property
+    def namespace(self) -> str:
+        return self.client.namespace
+
+    def generate(self, req: ProseRequest, deadline_s: Optional[float] = None,
+                 on_token: Optional[TokenCallback] = None) -> ProseResult:
+        """Blocking generate; ``on_token`` is called from the loop thread."""
+        budget = self.client.config.deadline_s if deadline_s is None else deadline_s
+        fut = self._run(self.client.generate(req, budget, on_token))
+        try:
+            res = fut.result(timeout=budget + 1.0)  # the client enforces the real deadline
+        except TimeoutError:
+            fut.cancel()
+            res = ProseResult(req.authored, "fallback", "deadline exceeded", budget, 0)
+        self.last_result = res
+        return res
+
+    def __call__(self, req: ProseRequest, on_token: Optional[TokenCallback] = None) -> Optional[str]:
+        res = self.generate(req, on_token=on_token)
+        return res.text if res.source == "llm" else None
+
+    def stream(self, req: ProseRequest, deadline_s: Optional[float] = None) -> "ProseStream":
+        """Start generating; iterate the returned ProseStream for tokens."""
+        q: "queue.Queue[Tuple[bool, object]]" = queue.Queue()
+        fut = self._run(self.client.generate(req, deadline_s, lambda tok: q.put((False, tok))))
+        fut.add_done_callback(lambda f: q.put((True, f)))
+        return ProseStream(self, q)
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2.0)
+
+
+class ProseStream:
+    """Tokens from ``ProseService.stream`` as they arrive.
+
+    Once iteration ends, ``result`` holds the ProseResult. If it is a
+    fallback, whatever tokens were shown should be replaced by ``result.text``
+    (the authored text).
+    """
+
+    def __init__(self, service: ProseService, q: "queue.Queue[Tuple[bool, object]]"):
+        self._service = service
+        self._q = q
+        self.result: Optional[ProseResult] = None
+
+    def __iter__(self) -> Iterator[str]:
+        while self.result is None:
+            done, val = self._q.get()
+            if not done:
+                yield val  # type: ignore[misc]
+                continue
+            self.result = self._service.last_result = val.result()  # type: ignore[union-attr]
@@ -0,0 +1,205 @@
+# src/adapters/prefetch.py
+"""Speculative prose generation for the states a player is likely to reach next.
+
+After each state change, ``Prefetcher.update`` forks the Game and plays the
+obvious next clicks on the fork -- every unlocked exit, Look, and each
+visible interaction -- to get the ProseRequest each of them would need
+(the same ``describe_request`` the app makes afterwards). Requests the cache
+doesn't already hold are generated through ``ProseCache.get`` on a thread
+pool, so they single-flight with any other ``get`` of the same key. A click
+only takes a prefetch that is finished (or about to be); it never waits out
+a queued one, and one already running is left to finish so the click's own
+``ProseCache.stream`` joins it instead of generating the text again.
+
+Work is prioritised exits > Look > interactions and limited per session:
+at most ``per_update`` new generations per state, ``budget`` in total.
+When the player ends up somewhere else, queued work for predictions that no
+longer apply is cancelled; anything already generated for them is counted as
+wasted (it stays cached, so revisiting still benefits).
+
+Counters (``stats``):
+    predicted   next-state requests considered
+    warm        ... already cached, nothing to do
+    submitted   prefetches queued
+    over_budget ... skipped by per_update/budget
+    cancelled   queued prefetches dropped before they ran
+    wasted      prefetches that ran but were never used
+    running     ``take`` found the prefetch mid-generation and left it for the caller to join
+    hits        ``take`` served by a prefetch
+    misses      ``take`` found nothing; the caller generates on demand
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from backend import metrics
+from backend.oo import Game
+from .prose_cache import ProseCache, ProseRequest, describe_request
+
+MAX_SESSIONS = 1024  # sessions tracked at once; the least recently active are forgotten
+
+
+def predict(game: Game) -> List[ProseRequest]:
+    """Prose requests for the likely next clicks, most likely first: each
+    unlocked exit (short description on arrival), Look, then each visible
+    interaction (the long description the app refreshes afterwards).
+    The forks' engine calls are kept out of ``backend.metrics``."""
+    if game.dead:
+        return []
+    with metrics.untracked():
+        return _predict(game)
+
+
+def _predict(game: Game) -> List[ProseRequest]:
+    snap = game.snapshot()
+    out: List[ProseRequest] = []
+    for ex in game.compass():
+        if ex["locked"] or ex["to"] not in game.rooms:
+            continue
+        g = game.fork(snap)
+        g.move(ex["direction"])
+        if not g.dead:
+            out.append(describe_request(g, long=False))
+    g = game.fork(snap)
+    g.look()
+    out.append(describe_request(g, long=True))
+    for it in game.visible_interactions():
+        g = game.fork(snap)
+        g.do(it.id)
+        if not g.dead:
+            out.append(describe_request(g, long=True))
+    return out
+
+
+class _Session:
+    __slots__ = ("pending", "spent")
+
+    def __init__(self) -> None:
+        self.pending: Dict[str, Future] = {}  # cache key -> prefetch for the current state
+        self.spent = 0                        # prefetches submitted over the session
+
+
+class Prefetcher:
+    """Warms ``cache`` for each session's likely next states.
+
+    Args:
+        cache: the ProseCache the app reads from
+        workers: generation threads shared by all sessions
+        per_update: max new prefetches per state change
+        budget: max prefetches per session overall
+    """
+
+    def __init__(self, cache: ProseCache, workers: int = 4, per_update: int = 6, budget: int = 200):
+        self.cache = cache
+        self.per_update = per_update
+        self.budget = budget
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sorque-prefetch")
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"predicted": 0, "warm": 0, "submitted": 0, "over_budget": 0,
+                                      "cancelled": 0, "wasted": 0, "running": 0, "hits": 0, "misses": 0}
+
+    # ---------- public API ----------
+    def update(self, session_id: str, game: Game) -> None:
+        """The session's state changed: retarget prefetching at its new neighbours."""
+        reqs = predict(game)
+        ns = self.cache.namespace
+        with self._lock:
+            sess = self._session(session_id)
+            keep: Dict[str, Future] = {}
+            new = 0
+            for req in reqs:
+                key = req.key(ns)
+                self.stats["predicted"] += 1
+                if key in keep:
+                    continue
+                fut = sess.pending.pop(key, None)
+                if fut is None:
+                    if self.cache.peek(req) is not None:
+                        self.stats["warm"] += 1
+                        continue
+                    if new >= self.per_update or sess.spent >= self.budget:
+                        self.stats["over_budget"] += 1
+                        continue
+                    fut = self._pool.submit(self.cache.get, req)
+                    new += 1
+                    sess.spent += 1
+                    self.stats["submitted"] += 1
+                keep[key] = fut
+            self._drop(sess.pending)
+            sess.pending = keep
+
+    def take(self, session_id: str, req: ProseRequest, timeout: float = 0.0) -> Optional[str]:
+        """Prose for ``req`` if a prefetch produced it (waiting up to ``timeout``
+        for one still queued or running), else None and the caller generates it.
+
+        A click must never wait behind other sessions' prefetches for a whole
+        LLM deadline, so the default only takes finished ones. A queued
+        prefetch is cancelled; a running one keeps going in the cache, where
+        the caller's ``ProseCache.get``/``stream`` waits on it.
+        """
+        key = req.key(self.cache.namespace)
+        with self._lock:
+            sess = self._sessions.get(session_id)
+            fut = sess.pending.pop(key, None) if sess is not None else None
+        if fut is not None:
+            try:
+                fut.result(timeout)
+            except Exception:
+                pass  # cancelled, still running or failed: fall through to a miss
+            if not fut.done():
+                with self._lock:
+                    if fut.cancel():
+                        self.stats["cancelled"] += 1
+                    else:
+                        self.stats["running"] += 1
+            prose = self.cache.peek(req)  # None if generation fell back to authored text
+            if prose is not None:
+                with self._lock:
+                    self.stats["hits"] += 1
+                return prose
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def forget(self, session_id: str) -> None:
+        """Stop prefetching for a session (restart, logout)."""
+        with self._lock:
+            sess = self._sessions.pop(session_id, None)
+            if sess is not None:
+                self._drop(sess.pending)
+
+    def hit_rate(self) -> float:
+        """Share of ``take`` calls a prefetch answered."""
+        s = self.stats
+        total = s["hits"] + s["misses"]
+        return s["hits"] / total if total else 0.0
+
+    def close(self) -> None:
+        with self._lock:
+            for sess in self._sessions.values():
+                self._drop(sess.pending)
+            self._sessions.clear()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    # ---------- internals ----------
+    def _session(self, session_id: str) -> _Session:
+        sess = self._sessions.get(session_id)
+        if sess is None:
+            sess = self._sessions[session_id] = _Session()
+            while len(self._sessions) > MAX_SESSIONS:
+                _, old = self._sessions.popitem(last=False)
+                self._drop(old.pending)
+        else:
+            self._sessions.move_to_end(session_id)
+        return sess
+
+    def _drop(self, pending: Dict[str, Future]) -> None:
+        """Discard prefetches nobody will ``take`` (called with ``_lock`` held)."""
+        for fut in pending.values():
+            if fut.cancel():
+                self.stats["cancelled"] += 1
+            else:
+                self.stats["wasted"] += 1
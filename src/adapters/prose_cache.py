@@ -0,0 +1,323 @@
+# src/adapters/prose_cache.py
+"""Two-tier cache for generated prose (``content_cache`` in data/sorque.db).
+
+A ProseRequest captures everything generation may depend on: room id, which
+description (short/long), the authored text ``Room.render_desc`` resolved for
+this state, and the names of the flags/items that room's overrides gate on
+(other state can't change the text, so it stays out of the key). Its
+``key`` is a SHA-256 over those fields plus the generator's ``namespace``,
+so switching models/prompts never serves stale prose.
+
+Lookups go: in-process LRU -> SQLite -> generate. Concurrent misses for the
+same key are single-flighted: one caller generates, the rest wait for its
+result. ``stream`` does the same for a caller that shows tokens as they
+arrive, so a click joins a prefetch already generating its key. New prose is written to SQLite by a write-behind thread; until it is
+committed, SQLite lookups are answered from the writer's queue.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from backend.oo import Game
+from .storage import DEFAULT_DB, WriteBehind, connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_cache (
+  hash TEXT PRIMARY KEY,  -- deterministic hash of prompt/state
+  prose TEXT,
+  meta  TEXT
+)
+"""
+SELECT_PROSE = "SELECT prose FROM content_cache WHERE hash = ?"
+UPSERT_PROSE = "INSERT OR REPLACE INTO content_cache (hash, prose, meta) VALUES (?, ?, ?)"
+
+DEFAULT_CAPACITY = 2048  # LRU entries
+
+
+@dataclass(frozen=True)
+class ProseRequest:
+    """Inputs for one piece of prose; ``key`` identifies it in the cache."""
+    room_id: str
+    kind: str                    # "short" | "long" | "interaction"
+    authored: str                # text the prose must stay faithful to
+    flags: Tuple[str, ...] = ()  # relevant flags present (sorted)
+    items: Tuple[str, ...] = ()  # relevant items held (sorted)
+    room_name: Optional[str] = None
+
+    def key(self, namespace: str) -> str:
+        blob = json.dumps([namespace, self.room_id, self.kind, self.authored, self.flags, self.items],
+                          ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def describe_request(game: Game, long: bool = True) -> ProseRequest:
+    """The ProseRequest for the current room description in ``game``."""
+    st = game.state
+    room = game.room
+    idx = room.index
+    names = game.symbols.names
+    return ProseRequest(
+        room_id=room.id,
+        kind="long" if long else "short",
+        authored=room.render_desc(game, long),
+        flags=tuple(sorted(names(st.flags.mask & idx.override_flags))),
+        items=tuple(sorted(names(st.inventory.mask & idx.override_items))),
+        room_name=room.name,
+    )
+
+
+TokenCallback = Callable[[str], None]
+# generator(req, on_token) -> prose, or None to serve the authored text uncached
+Generator = Callable[[ProseRequest, Optional[TokenCallback]], Optional[str]]
+
+
+class StubGenerator:
+    """Local stand-in for the LLM: returns the authored text unchanged.
+
+    ``delay`` simulates generation latency; ``calls`` counts generations.
+    """
+    namespace = "stub-v1"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, req: ProseRequest, on_token: Optional[TokenCallback] = None) -> Optional[str]:
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if on_token is not None:
+            on_token(req.authored)
+        return req.authored
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+
+Row = Tuple[str, str, str]  # (hash, prose, meta)
+
+
+class _ProseWriter(WriteBehind):
+    thread_name = "sorque-prose-writer"
+
+    def put(self, row: Row) -> None:
+        with self._cond:
+            self._check_open()
+            self._pending[row[0]] = row
+            self._cond.notify()
+
+    def get(self, key: str) -> Optional[str]:
+        """Prose queued or being written for ``key`` (not yet in SQLite)."""
+        with self._cond:
+            row = self._pending.get(key) or self._inflight.get(key)
+        return row[1] if row is not None else None
+
+    def _new_queue(self) -> Dict[str, Row]:
+        return {}
+
+    def _requeue(self, batch: Dict[str, Row]) -> None:
+        for key, row in batch.items():
+            self._pending.setdefault(key, row)  # unless superseded meanwhile
+
+    def _write(self, batch: Dict[str, Row]) -> None:
+        self._commit(UPSERT_PROSE, list(batch.values()))
+
+
+class ProseCache:
+    """LRU + SQLite cache with single-flight generation.
+
+    Args:
+        generator: ``(ProseRequest, on_token) -> str | None``; None means
+            "unavailable": the authored text is served and nothing is cached.
+            Its ``namespace`` attribute (if any) is mixed into every key,
+            otherwise ``namespace`` is used
+        path: SQLite file, or None for a memory-only cache
+        capacity: max LRU entries
+    """
+
+    def __init__(self, generator: Generator, path: Optional[os.PathLike | str] = DEFAULT_DB,
+                 capacity: int = DEFAULT_CAPACITY, namespace: Optional[str] = None):
+        self.generator = generator
+        self.namespace = namespace or getattr(generator, "namespace", None) or "default"
+        self.capacity = capacity
+        self.path = None if path is None else str(path)
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits_memory": 0, "hits_db": 0, "coalesced": 0,
+                                      "generated": 0, "fallbacks": 0, "errors": 0, "evicted": 0}
+        self._writer: Optional[_ProseWriter] = None
+        if self.path is not None:
+            conn, lock = connect(self.path)
+            with lock:
+                conn.execute(SCHEMA)
+            self._writer = _ProseWriter(self.path, flush_interval=0.1, batch_size=500)
+
+    # ---------- public API ----------
+    def get(self, req: ProseRequest, on_token: Optional[TokenCallback] = None) -> str:
+        """Cached prose for ``req``, generating it (once, across threads) on a miss.
+
+        ``on_token`` streams a fresh generation as it happens; it is not called
+        for cache hits or when waiting on another caller's generation.
+        """
+        key = req.key(self.namespace)
+        with self._lock:
+            prose = self._lru.get(key)
+            if prose is not None:
+                self._lru.move_to_end(key)
+                self.stats["hits_memory"] += 1
+                return prose
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return fut.result()
+
+        try:
+            prose = self._load(key)
+            if prose is not None:
+                with self._lock:
+                    self.stats["hits_db"] += 1
+            else:
+                prose = self.generator(req, on_token)
+                if prose is None:
+                    with self._lock:
+                        self.stats["fallbacks"] += 1
+                        del self._inflight[key]
+                    fut.set_result(req.authored)
+                    return req.authored
+                with self._lock:
+                    self.stats["generated"] += 1
+                self._store(key, req, prose)
+        except BaseException as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                del self._inflight[key]
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            self._remember(key, prose)
+            del self._inflight[key]
+        fut.set_result(prose)
+        return prose
+
+    def stream(self, req: ProseRequest) -> "CachedStream":
+        """``get`` on a worker thread; iterate the returned CachedStream for
+        tokens. Joining another caller's generation yields its text in one
+        piece once it is done."""
+        return CachedStream(self, req)
+
+    def peek(self, req: ProseRequest) -> Optional[str]:
+        """Cached prose if already in memory; never touches SQLite or generates."""
+        with self._lock:
+            return self._lru.get(req.key(self.namespace))
+
+    def cached(self, req: ProseRequest) -> Optional[str]:
+        """Cached prose from memory or SQLite; never generates."""
+        key = req.key(self.namespace)
+        with self._lock:
+            prose = self._lru.get(key)
+            if prose is not None:
+                self._lru.move_to_end(key)
+                self.stats["hits_memory"] += 1
+                return prose
+        prose = self._load(key)
+        if prose is not None:
+            with self._lock:
+                self.stats["hits_db"] += 1
+                self._remember(key, prose)
+        return prose
+
+    def put(self, req: ProseRequest, prose: str) -> None:
+        """Cache prose generated outside ``get`` (e.g. streamed to the UI)."""
+        key = req.key(self.namespace)
+        with self._lock:
+            self.stats["generated"] += 1
+            self._remember(key, prose)
+        self._store(key, req, prose)
+
+    def describe(self, game: Game, long: bool = True) -> str:
+        return self.get(describe_request(game, long))
+
+    def hit_rate(self) -> float:
+        s = self.stats
+        hits = s["hits_memory"] + s["hits_db"] + s["coalesced"]
+        total = hits + s["generated"] + s["fallbacks"] + s["errors"]
+        return hits / total if total else 0.0
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self._writer.flush(timeout) if self._writer is not None else True
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+    # ---------- internals ----------
+    def _remember(self, key: str, prose: str) -> None:
+        lru = self._lru
+        lru[key] = prose
+        lru.move_to_end(key)
+        while len(lru) > self.capacity:
+            lru.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def _load(self, key: str) -> Optional[str]:
+        if self._writer is None:
+            return None
+        prose = self._writer.get(key)  # generated but not committed yet
+        if prose is not None:
+            return prose
+        conn, lock = connect(self.path)
+        with lock:
+            row = conn.execute(SELECT_PROSE, (key,)).fetchone()
+        return row[0] if row else None
+
+    def _store(self, key: str, req: ProseRequest, prose: str) -> None:
+        if self._writer is None:
+            return
+        meta = json.dumps({"ns": self.namespace, "room": req.room_id, "kind": req.kind,
+                           "flags": req.flags, "items": req.items, "ts": int(time.time())})
+        self._writer.put((key, prose, meta))
+
+
+class CachedStream:
+    """Tokens from ``ProseCache.stream`` as they arrive.
+
+    Once iteration ends, ``text`` holds the prose ``get`` returned: the
+    authored text if generation fell back or failed, so whatever tokens were
+    shown should be replaced by it.
+    """
+
+    def __init__(self, cache: ProseCache, req: ProseRequest):
+        self._q: "queue.Queue[Tuple[bool, str]]" = queue.Queue()
+        self.text: Optional[str] = None
+        threading.Thread(target=self._run, args=(cache, req), name="sorque-prose-stream", daemon=True).start()
+
+    def _run(self, cache: ProseCache, req: ProseRequest) -> None:
+        try:
+            text = cache.get(req, lambda tok: self._q.put((False, tok)))
+        except Exception:
+            text = req.authored  # counted in cache.stats["errors"]
+        self._q.put((True, text))
+
+    def __iter__(self) -> Iterator[str]:
+        while self.text is None:
+            done, val = self._q.get()
+            if done:
+                self.text = val
+            else:
+                yield val
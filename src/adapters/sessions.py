@@ -0,0 +1,310 @@
+# src/adapters/sessions.py
+"""Bounded in-memory pool of live Games with spill-to-disk.
+
+``SessionManager`` keeps recently used sessions resident, most recent last,
+within a count budget (``max_sessions``) and an approximate memory budget
+(``max_bytes``, see ``approx_bytes``). Sessions idle for longer than
+``idle_s`` or pushed out of the budget are saved to a store and dropped from
+memory; the next ``get`` loads them back with ``Game.load_dict``, so callers
+never see the difference. Evicting runs inside ``create``/``get`` (and
+``evict_idle`` for a timer), cheapest first: idle sessions sit at the LRU end.
+Store writes happen after the manager's lock is released; ``take_idle`` and
+``write_spilled`` split a sweep so the writes can run on a worker thread.
+
+Stores implement ``save(sid, game)``, ``load(sid) -> dict | None`` and
+``delete(sid)``: ``adapters.storage.Storage`` (the ``player_world_state``
+table) or ``FileStore`` (one ``to_dict`` JSON file per session). Without a
+store nothing is ever evicted.
+
+What survives a spill is the ``to_dict`` state: room, flags, inventory,
+visited rooms, death and the last message shown. The undo history and the
+route cache are UI-side and start empty after rehydration.
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Protocol, Tuple
+from urllib.parse import quote
+
+from backend.oo import Game, History, Snapshot, World
+
+
+class SessionStore(Protocol):
+    def save(self, sid: str, game: Game) -> None: ...
+    def load(self, sid: str) -> Optional[Dict[str, Any]]: ...
+    def delete(self, sid: str) -> None: ...
+
+
+class FileStore:
+    """``<dir>/<sid>.json`` holding ``game.to_dict()``; writes are atomic."""
+
+    def __init__(self, directory: os.PathLike | str):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, sid: str) -> Path:
+        return self.dir / f"{quote(sid, safe='-_')}.json"
+
+    def save(self, sid: str, game: Game) -> None:
+        path = self._path(sid)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(game.to_dict(), separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def load(self, sid: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = json.loads(self._path(sid).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+
+    def delete(self, sid: str) -> None:
+        try:
+            self._path(sid).unlink()
+        except FileNotFoundError:
+            pass
+
+
+SNAPSHOT_BYTES = sys.getsizeof(Snapshot("", 1 << 60, 1 << 60, False, "", "", "")) + 2 * sys.getsizeof(1 << 60)
+
+
+def approx_bytes(game: Game) -> int:
+    """Rough resident size of one session: the Game view, its PlayerState and
+    masks, its undo history and route cache. Room/flag names are interned in
+    the shared World and not counted."""
+    st = game.state
+    size = (sys.getsizeof(game) + sys.getsizeof(game.__dict__) + sys.getsizeof(st)
+            + sys.getsizeof(st.flags) + sys.getsizeof(st.flags.mask)
+            + sys.getsizeof(st.inventory) + sys.getsizeof(st.inventory.mask)
+            + sys.getsizeof(st.visited) + sys.getsizeof(st.visited.mask)
+            + sys.getsizeof(st.last_message or ""))
+    if game.history is not None:
+        size += sys.getsizeof(game.history) + sys.getsizeof(game.history._snaps) + len(game.history) * SNAPSHOT_BYTES
+    if game._navigator is not None:
+        size += game._navigator.approx_bytes()
+    return size
+
+
+class _Resident:
+    __slots__ = ("game", "used", "size")
+
+    def __init__(self, game: Game, size: int):
+        self.game = game
+        self.used = time.monotonic()
+        self.size = size
+
+
+Spilled = List[Tuple[str, _Resident]]  # taken out of memory, not yet saved
+
+
+class SessionManager:
+    """Live Games by session id, LRU-evicted to ``store``.
+
+    Args:
+        world: the shared World every session plays
+        store: where evicted sessions go (None: keep everything resident)
+        max_sessions: resident count budget
+        max_bytes: resident memory budget (``approx_bytes`` per session), or None
+        idle_s: evict sessions unused for this long, or None
+        history: give new and rehydrated Games an undo ``History``
+    """
+
+    def __init__(self, world: World, store: Optional[SessionStore] = None, max_sessions: int = 10_000,
+                 max_bytes: Optional[int] = None, idle_s: Optional[float] = 30 * 60, history: bool = False):
+        self.world = world
+        self.store = store
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_s = idle_s
+        self.history = history
+        self._resident: "OrderedDict[str, _Resident]" = OrderedDict()  # LRU first
+        self._bytes = 0
+        self._evicted: set = set()  # spilled by this process and not reloaded since
+        self._outgoing: Dict[str, _Resident] = {}  # spilled, store write still pending
+        self._lock = threading.RLock()
+        self._rehydrate_ms: Deque[float] = deque(maxlen=1024)
+        self.stats: Dict[str, int] = {"created": 0, "evictions": 0, "idle_evictions": 0,
+                                      "rehydrates": 0, "misses": 0}
+
+    # ---------- public API ----------
+    def create(self, sid: Optional[str] = None) -> Tuple[str, Game]:
+        """A fresh Game under ``sid`` (default: a new id), replacing any
+        resident or spilled session with that id."""
+        sid = sid or uuid.uuid4().hex
+        game = self._new_game()
+        with self._lock:
+            self._discard(sid)
+            self._admit(sid, game)
+            self.stats["created"] += 1
+            spilled = self._enforce()
+        self.write_spilled(spilled)
+        return sid, game
+
+    def get(self, sid: str) -> Optional[Game]:
+        """The session's Game, loaded back from the store if it was evicted;
+        None if neither memory nor the store has it."""
+        with self._lock:
+            entry = self._resident.get(sid)
+            if entry is not None:
+                self._resident.move_to_end(sid)
+                entry.used = time.monotonic()
+                self._resize(entry)
+                game = entry.game
+            else:
+                game = self._rehydrate(sid)
+                if game is None:
+                    self.stats["misses"] += 1
+                    return None
+                self._admit(sid, game)
+            spilled = self._enforce()
+        self.write_spilled(spilled)
+        return game
+
+    def __contains__(self, sid: str) -> bool:
+        with self._lock:
+            return sid in self._resident or sid in self._evicted
+
+    def __len__(self) -> int:
+        return len(self._resident)
+
+    def drop(self, sid: str) -> bool:
+        """Forget a session everywhere (memory and store). False if unknown."""
+        with self._lock:
+            known = sid in self
+            self._discard(sid)
+        if self.store is not None:
+            self.store.delete(sid)
+        return known
+
+    def evict(self, sid: str) -> bool:
+        """Spill one resident session now. False if not resident or no store."""
+        with self._lock:
+            if self.store is None or sid not in self._resident:
+                return False
+            spilled = [self._take(sid)]
+        self.write_spilled(spilled)
+        return True
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Spill every session unused for ``idle_s``; how many went."""
+        spilled = self.take_idle(now)
+        self.write_spilled(spilled)
+        return len(spilled)
+
+    def take_idle(self, now: Optional[float] = None) -> Spilled:
+        """Take every session unused for ``idle_s`` out of memory and return
+        them for ``write_spilled``. Until written, ``get`` hands them back
+        from memory."""
+        if self.store is None or self.idle_s is None:
+            return []
+        cutoff = (time.monotonic() if now is None else now) - self.idle_s
+        with self._lock:
+            return self._take_idle(cutoff)
+
+    def write_spilled(self, spilled: Spilled) -> None:
+        """Save sessions taken out of memory to the store. Runs without the
+        lock, so a caller may hand it to a worker thread."""
+        for sid, entry in spilled:
+            with self._lock:
+                if self._outgoing.get(sid) is not entry:
+                    continue  # readmitted or dropped since
+            self.store.save(sid, entry.game)
+            with self._lock:
+                if self._outgoing.get(sid) is entry:
+                    del self._outgoing[sid]
+
+    def snapshot_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = sorted(self._rehydrate_ms)
+            out: Dict[str, Any] = {"resident": len(self._resident), "evicted": len(self._evicted),
+                                   "resident_bytes": self._bytes, **self.stats}
+        if lat:
+            out["rehydrate_p50_ms"] = round(lat[len(lat) // 2], 3)
+            out["rehydrate_p99_ms"] = round(lat[min(len(lat) - 1, int(len(lat) * 0.99))], 3)
+            out["rehydrate_max_ms"] = round(lat[-1], 3)
+        return out
+
+    def flush(self) -> None:
+        """Spill every resident session (e.g. before shutdown)."""
+        with self._lock:
+            spilled = [self._take(sid) for sid in list(self._resident)] if self.store is not None else []
+        self.write_spilled(spilled)
+        flush = getattr(self.store, "flush", None)
+        if flush is not None:
+            flush()
+
+    # ---------- internals ----------
+    def _new_game(self) -> Game:
+        return self.world.new_game(history=History() if self.history else None)
+
+    def _admit(self, sid: str, game: Game) -> None:
+        entry = self._resident[sid] = _Resident(game, approx_bytes(game))
+        self._bytes += entry.size
+        self._evicted.discard(sid)
+        self._outgoing.pop(sid, None)  # a pending write of it is skipped
+
+    def _resize(self, entry: _Resident) -> None:
+        size = approx_bytes(entry.game)
+        self._bytes += size - entry.size
+        entry.size = size
+
+    def _discard(self, sid: str) -> None:
+        entry = self._resident.pop(sid, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        self._evicted.discard(sid)
+        self._outgoing.pop(sid, None)
+
+    def _take(self, sid: str) -> Tuple[str, _Resident]:
+        """Move a resident session to ``_outgoing``; the caller writes it
+        with ``write_spilled`` once the lock is released."""
+        entry = self._outgoing[sid] = self._resident.pop(sid)
+        self._bytes -= entry.size
+        self._evicted.add(sid)
+        self.stats["evictions"] += 1
+        return sid, entry
+
+    def _take_idle(self, cutoff: float) -> Spilled:
+        spilled = []
+        while self._resident:
+            sid, entry = next(iter(self._resident.items()))
+            if entry.used > cutoff:
+                break
+            spilled.append(self._take(sid))
+        self.stats["idle_evictions"] += len(spilled)
+        return spilled
+
+    def _enforce(self) -> Spilled:
+        """Take from the LRU end until within budget (the newest always stays)."""
+        if self.store is None:
+            return []
+        spilled = self._take_idle(time.monotonic() - self.idle_s) if self.idle_s is not None else []
+        while len(self._resident) > 1 and (
+                len(self._resident) > self.max_sessions
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            spilled.append(self._take(next(iter(self._resident))))
+        return spilled
+
+    def _rehydrate(self, sid: str) -> Optional[Game]:
+        if self.store is None:
+            return None
+        leaving = self._outgoing.get(sid)
+        if leaving is not None:  # its store write has not happened yet
+            return leaving.game
+        t0 = time.perf_counter()
+        data = self.store.load(sid)
+        if data is None or data.get("current_room_id", self.world.start_room_id) not in self.world.rooms:
+            self._evicted.discard(sid)
+            return None
+        game = self._new_game()
+        game.load_dict(data)
+        self._rehydrate_ms.append((time.perf_counter() - t0) * 1e3)
+        self.stats["rehydrates"] += 1
+        return game
+
@@ -0,0 +1,365 @@
+# src/adapters/storage.py
+"""SQLite persistence for player state (``player_world_state`` in data/sorque.db).
+
+One row per player, holding the ``Game.to_dict`` state:
+
+    loc_id         current room id
+    flags          JSON array of flag names (sorted)
+    inventory      JSON object ``{"item": 1, ...}``
+    visited        JSON array of visited room ids
+    dead           1 while the player is dead, else 0
+    death_cause    how the player last died ("generic" if never)
+    death_message  the death text shown for it
+    last_message   the last text shown to the player
+
+``clock`` and ``danger`` belong to the world simulation and are left alone.
+Tables created before the state columns existed get them added on open.
+
+Writes are *write-behind*: ``save()`` only records an O(1) Snapshot of the
+game (plus its visited-rooms mask) and returns. A background thread coalesces
+everything queued since its last pass (latest state per player wins) and
+writes it as one batched transaction; a batch that fails is requeued behind
+any newer save, so an older state never overwrites a newer one. ``load()``
+reads pending writes first, so callers always see their own saves.
+``delete()`` queues a tombstone the same way: it is written after any batch
+already in flight, and ``load()`` returns None from then on. Call ``flush()``
+before shutdown (also done at exit).
+
+The database runs in WAL mode with one shared connection per process and
+path (see ``connect``); statements are fixed strings, so sqlite3's statement
+cache prepares each one once per connection.
+"""
+from __future__ import annotations
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.oo import Game, Snapshot
+from backend.symbols import Symbols
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_DB = Path(os.environ.get("SORQUE_DB", ROOT_DIR / "data" / "sorque.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_world_state (
+  player_id TEXT PRIMARY KEY,
+  loc_id TEXT,
+  flags TEXT,            -- JSON array of strings
+  inventory TEXT,        -- JSON object e.g. {"ferrytoken":1}
+  clock INTEGER DEFAULT 0,
+  danger INTEGER DEFAULT 0
+)
+"""
+COLUMNS = "PRAGMA table_info(player_world_state)"
+# added to the original table; (name, declaration)
+STATE_COLUMNS = (
+    ("visited", "TEXT"),   # JSON array of room ids
+    ("dead", "INTEGER DEFAULT 0"),
+    ("death_cause", "TEXT"),
+    ("death_message", "TEXT"),
+    ("last_message", "TEXT"),
+)
+
+UPSERT_STATE = """
+INSERT INTO player_world_state
+  (player_id, loc_id, flags, inventory, visited, dead, death_cause, death_message, last_message)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(player_id) DO UPDATE SET
+  loc_id = excluded.loc_id, flags = excluded.flags, inventory = excluded.inventory,
+  visited = excluded.visited, dead = excluded.dead, death_cause = excluded.death_cause,
+  death_message = excluded.death_message, last_message = excluded.last_message
+"""
+SELECT_STATE = ("SELECT loc_id, flags, inventory, visited, dead, death_cause, death_message, last_message "
+                "FROM player_world_state WHERE player_id = ?")
+DELETE_STATE = "DELETE FROM player_world_state WHERE player_id = ?"
+
+Row = Tuple[str, str, str, str, str, int, str, str, str]  # UPSERT_STATE parameters
+
+# -----------------------------
+# Connection pool
+# -----------------------------
+
+_POOL: Dict[Tuple[int, str], Tuple[sqlite3.Connection, threading.RLock]] = {}
+_POOL_LOCK = threading.Lock()
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    have = {col[1] for col in conn.execute(COLUMNS)}
+    for name, decl in STATE_COLUMNS:
+        if name not in have:
+            conn.execute(f"ALTER TABLE player_world_state ADD COLUMN {name} {decl}")
+
+
+def connect(path: os.PathLike | str = DEFAULT_DB) -> Tuple[sqlite3.Connection, threading.RLock]:
+    """The process-wide connection for ``path`` and the lock guarding it.
+
+    Keyed by pid as well, so a forked worker opens its own connection instead
+    of sharing the parent's file handle.
+    """
+    key = (os.getpid(), str(Path(path).resolve()))
+    with _POOL_LOCK:
+        entry = _POOL.get(key)
+        if entry is None:
+            conn = sqlite3.connect(key[1], check_same_thread=False, isolation_level=None,
+                                   cached_statements=64, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; WAL keeps it consistent
+            conn.execute(SCHEMA)
+            _migrate(conn)
+            entry = _POOL[key] = (conn, threading.RLock())
+        return entry
+
+
+def _close_pool() -> None:
+    with _POOL_LOCK:
+        for key, (conn, lock) in list(_POOL.items()):
+            if key[0] == os.getpid():
+                with lock:
+                    conn.close()
+        _POOL.clear()
+
+
+# -----------------------------
+# Row <-> state
+# -----------------------------
+
+def _from_snapshot(symbols: Symbols, rooms: Symbols, snap: Snapshot, visited: int) -> Dict[str, Any]:
+    """The ``Game.to_dict`` payload of a queued save."""
+    return {
+        "current_room_id": snap.current_room_id,
+        "flags": sorted(symbols.names(snap.flags)),
+        "inventory": sorted(symbols.names(snap.inventory)),
+        "visited": list(rooms.names(visited)),
+        "dead": snap.dead,
+        "death_cause": snap.death_cause,
+        "death_message": snap.death_message,
+        "last_message": snap.last_message,
+    }
+
+
+def _to_row(player_id: str, data: Dict[str, Any]) -> Row:
+    inventory = {name: 1 for name in data["inventory"]}
+    return (player_id, data["current_room_id"], json.dumps(data["flags"]), json.dumps(inventory),
+            json.dumps(data["visited"]), int(data["dead"]), data["death_cause"], data["death_message"],
+            data["last_message"])
+
+
+def _from_row(loc_id: str, flags: Optional[str], inventory: Optional[str], visited: Optional[str],
+              dead: Optional[int], death_cause: Optional[str], death_message: Optional[str],
+              last_message: Optional[str]) -> Dict[str, Any]:
+    """A ``Game.load_dict`` payload for one stored row. Rows written before
+    the state columns existed have them NULL and load as alive, with only
+    the current room visited."""
+    inv = json.loads(inventory or "{}")
+    if isinstance(inv, list):  # tolerate the array form as well
+        inv = {name: 1 for name in inv}
+    return {
+        "current_room_id": loc_id,
+        "flags": list(json.loads(flags or "[]")),
+        "inventory": [name for name, count in inv.items() if count],
+        "visited": list(json.loads(visited or "[]")),
+        "dead": bool(dead),
+        "death_cause": death_cause or "generic",
+        "death_message": death_message or "",
+        "last_message": last_message or "",
+    }
+
+
+# -----------------------------
+# Write-behind base
+# -----------------------------
+
+class WriteBehind:
+    """Background-thread writer shared by the SQLite adapters.
+
+    Callers add to ``_pending`` under ``_cond`` and notify it; the writer swaps
+    the whole queue out (after ``flush_interval``, to let bursts accumulate)
+    and hands it to ``_write``. On a SQLite error the batch goes back through
+    ``_requeue`` and the writer backs off for a second.
+    """
+    thread_name = "sorque-writer"
+
+    def __init__(self, path: os.PathLike | str, flush_interval: float, batch_size: int):
+        self.path = str(path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = self._new_queue()
+        self._inflight = self._new_queue()  # batch being written
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats: Dict[str, int] = {"rows_written": 0, "batches": 0, "errors": 0}
+        self.last_error: Optional[BaseException] = None
+        connect(self.path)  # fail fast on a bad path
+        self._writer = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ---------- subclass hooks ----------
+    def _new_queue(self) -> Any:
+        raise NotImplementedError
+
+    def _write(self, batch: Any) -> None:
+        raise NotImplementedError
+
+    def _requeue(self, batch: Any) -> None:
+        """Put a failed batch back (called with ``_cond`` held)."""
+        raise NotImplementedError
+
+    # ---------- public API ----------
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is committed."""
+        with self._cond:
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._pending and not self._inflight, timeout)
+
+    def close(self) -> None:
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+
+    # ---------- internals ----------
+    def _check_open(self) -> None:
+        if self._closed:
+            raise RuntimeError(f"{type(self).__name__} is closed")
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if not self._pending and self._closed:
+                    return
+                if not self._closed and self.flush_interval:
+                    # let a burst accumulate (flush()/close() cut this short)
+                    self._cond.wait(self.flush_interval)
+                batch, self._pending = self._pending, self._new_queue()
+                self._inflight = batch
+            failed = None
+            try:
+                self._write(batch)
+            except sqlite3.Error as e:
+                failed = e
+            with self._cond:
+                self._inflight = self._new_queue()
+                if failed is not None:
+                    self.stats["errors"] += 1
+                    self.last_error = failed
+                    if not self._closed:
+                        self._requeue(batch)
+                        self._cond.wait(1.0)
+                self._cond.notify_all()
+
+    def _commit(self, sql: str, rows: List[tuple]) -> None:
+        conn, lock = connect(self.path)
+        for i in range(0, len(rows), self.batch_size):
+            chunk = rows[i:i + self.batch_size]
+            # one transaction per chunk: a failure rolls back only that chunk
+            with lock:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(sql, chunk)
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+            self.stats["rows_written"] += len(chunk)
+            self.stats["batches"] += 1
+
+
+# -----------------------------
+# Storage
+# -----------------------------
+
+# (symbols, room symbols, state, visited-rooms mask); None deletes the row
+Pending = Optional[Tuple[Symbols, Symbols, Snapshot, int]]
+
+
+class Storage(WriteBehind):
+    """Write-behind store for player state.
+
+    Args:
+        path: SQLite file (default data/sorque.db, or $SORQUE_DB)
+        flush_interval: seconds the writer waits to let more saves coalesce
+        batch_size: max rows per transaction
+    """
+    thread_name = "sorque-storage-writer"
+
+    def __init__(self, path: os.PathLike | str = DEFAULT_DB, flush_interval: float = 0.05, batch_size: int = 500):
+        super().__init__(path, flush_interval, batch_size)
+        self.stats["saves"] = 0
+
+    # ---------- public API ----------
+    def save(self, player_id: str, game: Game) -> None:
+        """Queue the game's current state; returns immediately."""
+        entry = (game.symbols, game.world.room_symbols, game.snapshot(), game.state.visited.mask)
+        with self._cond:
+            self._check_open()
+            self._pending[player_id] = entry
+            self.stats["saves"] += 1
+            self._cond.notify()
+
+    def load(self, player_id: str) -> Optional[Dict[str, Any]]:
+        """The stored state as a ``Game.load_dict`` payload, or None."""
+        with self._cond:
+            if player_id in self._pending:
+                pending = self._pending[player_id]
+            elif player_id in self._inflight:
+                pending = self._inflight[player_id]
+            else:
+                pending = ()
+        if pending is None:  # deleted, not yet committed
+            return None
+        if pending:
+            return _from_snapshot(*pending)
+        row = self._select(player_id)
+        return _from_row(*row) if row is not None else None
+
+    def restore(self, player_id: str, game: Game) -> bool:
+        """Load the stored state into ``game``. False if nothing is stored or
+        the stored room no longer exists in this world."""
+        data = self.load(player_id)
+        if data is None or data["current_room_id"] not in game.rooms:
+            return False
+        game.load_dict(data)
+        return True
+
+    def delete(self, player_id: str) -> None:
+        """Queue the row's deletion; returns immediately. A save still in
+        flight cannot bring the row back, and a later save() recreates it."""
+        with self._cond:
+            self._check_open()
+            self._pending[player_id] = None
+            self._cond.notify()
+
+    # ---------- internals ----------
+    def _select(self, player_id: str) -> Optional[tuple]:
+        conn, lock = connect(self.path)
+        with lock:
+            return conn.execute(SELECT_STATE, (player_id,)).fetchone()
+
+    def _new_queue(self) -> Dict[str, Pending]:
+        return {}
+
+    def _requeue(self, batch: Dict[str, Pending]) -> None:
+        for pid, entry in batch.items():
+            self._pending.setdefault(pid, entry)  # unless superseded meanwhile
+
+    def _write(self, batch: Dict[str, Pending]) -> None:
+        rows: List[Row] = []
+        gone: List[Tuple[str]] = []
+        for pid, entry in batch.items():
+            if entry is None:
+                gone.append((pid,))
+            else:
+                rows.append(_to_row(pid, _from_snapshot(*entry)))
+        self._commit(UPSERT_STATE, rows)
+        self._commit(DELETE_STATE, gone)
+
+
+atexit.register(_close_pool)
@@ -1,9 +1,14 @@
 # --- path bootstrap so "backend" is importable when running src/app/app.py ---
+import functools
+import os
 import sys
+import time
+import uuid
 from pathlib import Path
 from typing import Optional
 import streamlit as st
 st.set_page_config(page_title="Sorque", layout="wide")
+RUN_T0 = time.perf_counter()
 
 THIS_FILE = Path(__file__).resolve()
 SRC_DIR   = THIS_FILE.parents[1]      # .../src
@@ -11,14 +16,24 @@ if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))  # make 'backend' a top-level package
 
 # now import the OO engine
-from backend.oo_loader import new_game_from_path
-from backend.oo import Game
-
-from app.ui_components import DescriptionPanel, PanelMessage, InventoryPanel
+from backend import metrics
+from backend.oo_loader import load_world
+from backend.oo import EV_RESTART, Game, PlayerState, World
+from backend.trace import Tracer
+from adapters.events import EventLog
+from adapters.llm_client import LLMConfig, ProseService
+from adapters.prefetch import Prefetcher
+from adapters.prose_cache import ProseCache, describe_request
+from adapters.sessions import SessionManager
+from adapters.storage import Storage
+
+from app.ui_components import DESC_PANEL_CSS, DescriptionPanel, PanelMessage, InventoryPanel
 
 APP_MAX_WIDTH = 1000  # tweak to taste (e.g., 1000–1300)
 
-st.markdown(f"""
+# Static CSS is collected here and emitted as one block (below) per full run;
+# clicks only rerun fragments, so in practice that is once per session.
+LAYOUT_CSS = f"""
 <style>
   /* Cap & center the whole app content. Use both selectors and !important to win. */
   .block-container {{
@@ -36,7 +51,7 @@ st.markdown(f"""
     padding-right: 1.25rem;
   }}
 </style>
-""", unsafe_allow_html=True)
+"""
 
 
 # Rooms that should end the game when entered
@@ -58,18 +73,11 @@ INSTRUCTIONS_MD = (
 if "game_over" not in st.session_state:
     st.session_state.game_over = False
 
-st.markdown(
-    """
+BUTTON_CSS = """
     <style>
       /* make primary buttons just a bit taller for prominence */
       .stButton > button[kind="primary"] { padding: 0.6rem 1rem; }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
-
-st.markdown(
-    """
     <style>
       /* Make ONLY primary buttons (we use it for Look) a blue outline */
       .stButton > button[kind="primary"]{
@@ -85,11 +93,9 @@ st.markdown(
         background: rgba(26,115,232,0.16) !important;
       }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
+"""
 
-st.markdown("""
+CONTROLS_CSS = """
 <style>
 /* =========================
    Buttons (primary & secondary)
@@ -185,11 +191,10 @@ hr.panel-rule{
   }
 }
 </style>
-""", unsafe_allow_html=True)
-
+"""
 
 # CSS for room label panel
-st.markdown("""
+ROOM_LABEL_CSS = """
 <style>
 /* Room header chip inside the description/story panel */
 .desc-panel .msg-room{
@@ -203,7 +208,10 @@ st.markdown("""
   margin: 6px 0 2px;                 /* a little air above the paragraph */
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+APP_CSS = LAYOUT_CSS + BUTTON_CSS + CONTROLS_CSS + ROOM_LABEL_CSS + DESC_PANEL_CSS
+st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # =========================
 # End of game
@@ -237,12 +245,33 @@ def end_game(message: str, level: str = "success"):
     """Freeze the game and show a restart affordance, reusing the same path for win/lose."""
     panel_append(message, level)              # final banner line (green for win, red for death)
     st.session_state.game_over = True         # freezes inputs elsewhere
-    st.session_state.show_restart = True
-    st.rerun()
+    st.session_state.show_restart = True      # the caller's refresh() redraws every part
 
 def restart_game():
+    SESSIONS.drop(PLAYER_ID)  # the run is over, live and saved; don't resume it on reload
+    if EVENTS is not None:
+        EVENTS.record(PLAYER_ID, EV_RESTART, G.current_room_id, {})
+    if PREFETCH is not None:
+        PREFETCH.forget(PLAYER_ID)
+    if TRACER is not None:
+        TRACER.close(PLAYER_ID)
     st.session_state.clear()
-    st.rerun()
+    st.rerun()  # full run: bootstrap a fresh session
+
+def rewind_game():
+    """Undo the fatal action (state + UI freeze) instead of wiping the whole run."""
+    touch_session()
+    before = view()
+    if G.undo():
+        st.session_state.game_over = False
+        st.session_state.show_restart = False
+        st.session_state.pop("last_death", None)
+        st.session_state.ui_tick += 1
+        panel_append("Time folds back on itself. You are here again.", "info")
+        if G.room.name:
+            panel_append(G.room.name, "room")
+        panel_append(G.desc_short())
+    refresh(before)
 
 def apply_effect(eff: dict) -> None:
     """Interpret JSON effect objects. Shows only kill_player here; keep your others."""
@@ -274,6 +303,7 @@ def panel_init(initial_text: str):
         st.session_state.panel = {"blocks": [PanelMessage(initial_text, "body")]}
 
 MAX_LOG_BLOCKS = 300  # keep memory sane; tweak to taste
+PREFETCH_WAIT_S = 0.05  # a click waits at most this long for an unfinished prefetch, then streams
 
 def panel_set_body(html: str):
     st.session_state.panel["blocks"] = [PanelMessage(html, "body")]
@@ -287,8 +317,42 @@ def panel_append(text: str, kind: str = "body"):
 def panel_divider():
     panel_append("— — —", "body")  # simple visual break in the log
 
+def panel_append_desc(long: bool = False):
+    """Append the room description: LLM prose when configured, else the authored
+    text. Prose not cached yet gets a placeholder the story part streams into."""
+    if PROSE is None:
+        panel_append(G.desc_long() if long else G.desc_short(), "body")
+        return
+    req = describe_request(G, long)
+    prose = PREFETCH.take(PLAYER_ID, req, PREFETCH_WAIT_S) if PREFETCH is not None else None
+    if prose is None:
+        prose = PROSE[0].cached(req)
+    if prose is not None:
+        panel_append(prose, "body")
+        return
+    panel_append("…", "body")
+    st.session_state.setdefault("pending_prose", []).append((st.session_state.panel["blocks"][-1], req))
+
+def stream_pending_prose(slot) -> None:
+    """Stream generated prose into the placeholders left by panel_append_desc
+    (through the prose cache, so it is generated once however many ask; the
+    authored text if the LLM failed or ran out of time)."""
+    pending = st.session_state.pop("pending_prose", None)
+    if not pending or PROSE is None:
+        return
+    blocks = st.session_state.panel["blocks"]
+    for msg, req in pending:
+        idx = next((i for i, m in enumerate(blocks) if m is msg), None)
+        if idx is None:
+            continue  # trimmed out of the log meanwhile
+        stream = PROSE[0].stream(req)  # joins a prefetch already generating it
+        PANEL.render_stream(blocks, stream, slot, window=st.session_state.panel_window, index=idx)
+        blocks[idx] = PanelMessage(stream.text, "body")
+
 ROOT_DIR  = THIS_FILE.parents[2]   # project root (…/Sorque/)
 WORLD_PATH = ROOT_DIR / "data" / "worlds" / "escape_house_01.json"
+MAX_RESIDENT_SESSIONS = 2000   # live games kept in worker memory; older ones wait in player_world_state
+SESSION_IDLE_S = 15 * 60       # abandoned tabs are spilled after this long
 
 # ---------- session/bootstrap ----------
 if "ui_tick" not in st.session_state:
@@ -296,14 +360,133 @@ if "ui_tick" not in st.session_state:
 # old CSS key cleanup (safe no-op if absent)
 st.session_state.pop("_ui_desc_panel_css_loaded", None)
 
-G: Optional[Game] = st.session_state.get("game")
-if G is None:
+@st.cache_resource(show_spinner=False)
+def get_metrics() -> Optional[metrics.Metrics]:
+    """Engine + rerun timings, on when SORQUE_METRICS names a JSON snapshot file
+    (rewritten every 10 s; see backend/metrics.py). None when off."""
+    path = os.environ.get("SORQUE_METRICS")
+    if not path:
+        return None
+    m = metrics.enable()
+    m.start_autosave(path)
+    return m
+
+@st.cache_resource(show_spinner=False)
+def get_world(path: str) -> World:
+    """Load the immutable world once per process; every session shares it."""
+    return load_world(path)
+
+@st.cache_resource(show_spinner=False)
+def get_storage() -> Optional[Storage]:
+    """Process-wide write-behind store (data/sorque.db); None if unavailable."""
     try:
-        st.session_state.game = new_game_from_path(str(WORLD_PATH))
-        G = st.session_state.game
-    except Exception as e:
-        st.error(f"Failed to load world: {e}")
-        st.stop()
+        return Storage()
+    except Exception:
+        return None
+
+@st.cache_resource(show_spinner=False)
+def get_event_log() -> Optional[EventLog]:
+    """Process-wide buffered writer for world_events; None if unavailable."""
+    try:
+        return EventLog()
+    except Exception:
+        return None
+
+@st.cache_resource(show_spinner=False)
+def get_sessions() -> SessionManager:
+    """Every tab's live Game, LRU-spilled to the store and reloaded on its next
+    rerun (without a store everything stays resident, as before)."""
+    return SessionManager(get_world(str(WORLD_PATH)), get_storage(), max_sessions=MAX_RESIDENT_SESSIONS,
+                          idle_s=SESSION_IDLE_S, history=True)  # undo stack: rewind after death
+
+@st.cache_resource(show_spinner=False)
+def get_tracer() -> Optional[Tracer]:
+    """Per-player action traces in $SORQUE_TRACES (see backend/trace.py); None when unset."""
+    path = os.environ.get("SORQUE_TRACES")
+    return Tracer(path) if path else None
+
+@st.cache_resource(show_spinner=False)
+def get_prose() -> Optional[tuple[ProseCache, ProseService]]:
+    """LLM prose (SORQUE_LLM_URL / OPENAI_API_KEY) behind the prose cache; None
+    when no LLM is configured, in which case the authored text is shown."""
+    cfg = LLMConfig.from_env()
+    if cfg is None:
+        return None
+    try:
+        service = ProseService(cfg)
+        return ProseCache(service), service
+    except Exception:
+        return None
+
+@st.cache_resource(show_spinner=False)
+def get_prefetcher() -> Optional[Prefetcher]:
+    """Warms prose for each session's next likely rooms/actions (LLM only)."""
+    prose = get_prose()
+    return Prefetcher(prose[0]) if prose is not None else None
+
+METRICS = get_metrics()  # before the world, so its load is timed too
+try:
+    WORLD = get_world(str(WORLD_PATH))
+except Exception as e:
+    st.error(f"Failed to load world: {e}")
+    st.stop()
+STORE = get_storage()
+SESSIONS = get_sessions()
+EVENTS = get_event_log()
+TRACER = get_tracer()
+PROSE = get_prose()
+PREFETCH = get_prefetcher()
+
+# players are identified by ?player=<id> so a reload/redeploy resumes the run
+if "player_id" not in st.session_state:
+    st.session_state.player_id = st.query_params.get("player") or uuid.uuid4().hex
+    st.query_params["player"] = st.session_state.player_id
+PLAYER_ID: str = st.session_state.player_id
+
+# per-session state lives in SESSIONS (not st.session_state, so idle tabs can be
+# spilled); Game is a view over it rebuilt each rerun
+if "booted" not in st.session_state:
+    st.session_state.booted = True
+    saved = SESSIONS.get(PLAYER_ID)  # resident, or resumed from player_world_state
+    if saved is None or saved.dead:
+        if saved is not None and EVENTS is not None:
+            EVENTS.record(PLAYER_ID, EV_RESTART, WORLD.start_room_id, {})  # not resuming: log keeps replaying true
+        SESSIONS.create(PLAYER_ID)
+
+def game_view(live: Game) -> Game:
+    """A Game over the session's state, logging and tracing under PLAYER_ID."""
+    game = WORLD.new_game(live.state, live.history,
+                          EVENTS.hook(PLAYER_ID) if EVENTS is not None else None,
+                          live.navigator)  # route cache survives reruns
+    if TRACER is not None:
+        TRACER.attach(game, PLAYER_ID)  # a new session (or a resumed one) starts a new trace segment
+    return game
+
+LIVE = SESSIONS.get(PLAYER_ID) or SESSIONS.create(PLAYER_ID)[1]  # reloads it if it was spilled
+PLAYER: PlayerState = LIVE.state
+G: Game = game_view(LIVE)
+
+def touch_session() -> None:
+    """Mark the session used; fragment reruns skip the lookup above, so every
+    click handler and part calls this first. If the session was spilled and
+    loaded back meanwhile, rebind G to the reloaded state."""
+    global LIVE, PLAYER, G
+    live = SESSIONS.get(PLAYER_ID) or SESSIONS.create(PLAYER_ID)[1]
+    if live is not LIVE:
+        LIVE, PLAYER, G = live, live.state, game_view(live)
+
+def sync_state() -> None:
+    """Persist whatever changed (queued; written in batches) and start warming
+    prose for wherever the player is likely to go next."""
+    snap = G.snapshot()
+    if st.session_state.get("saved_snapshot") != snap:
+        if STORE is not None:
+            STORE.save(PLAYER_ID, G)
+        if PREFETCH is not None:
+            PREFETCH.update(PLAYER_ID, G)
+        st.session_state.saved_snapshot = snap
+
+sync_state()
 
 # --- append-only seed + death handling ---
 panel_init(G.desc_short())  # seed the log once with the starting room short
@@ -316,18 +499,198 @@ if death_msg:
         panel_append(G.room.name, "room")
     panel_append(G.desc_short())
 
+
 # Inventory toggle state
 if "inv_open" not in st.session_state:
     st.session_state.inv_open = True  # start open
+if "panel_window" not in st.session_state:
+    st.session_state.panel_window = DescriptionPanel.window  # older blocks load on demand
+
+DEBUG = bool(st.query_params.get("debug"))  # ?debug=1 shows per-part render timings
 
 
 # =========================
-# TWO-COLUMN LAYOUT
+# PARTS (fragments)
 # =========================
-left, right = st.columns([3, 1], gap="large")  # wider story area
+# Story, actions, compass and inventory are keyed fragments. Clicks are
+# handled in on_click callbacks that end with refresh(), which reruns the
+# story plus only the parts whose view changed -- never the CSS/bootstrap above.
+
+def record_timing(name: str, ms: float) -> None:
+    last, runs, total, worst = st.session_state.setdefault("_timings", {}).get(name, (0.0, 0, 0.0, 0.0))
+    st.session_state._timings[name] = (ms, runs + 1, total + ms, max(worst, ms))
+    if METRICS is not None:
+        METRICS.observe(f"app:{name}", ms / 1e3, WORLD.name, G.current_room_id)
+
+def part_done(name: str) -> None:
+    """Close the rerun cycle refresh() started once its last part has run."""
+    cycle = st.session_state.get("_cycle")
+    if cycle is None:
+        return
+    t0, pending = cycle
+    pending.discard(name)
+    if not pending:
+        del st.session_state["_cycle"]
+        record_timing("rerun", (time.perf_counter() - t0) * 1e3)
+
+def timed(name: str):
+    """Record each run's wall time under ``name`` for the debug panel."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record_timing(name, (time.perf_counter() - t0) * 1e3)
+                part_done(name)
+        return wrapper
+    return deco
+
+def view() -> dict:
+    """What the actions/compass/inventory parts show, cheap to compare."""
+    over = bool(st.session_state.get("game_over"))
+    return {
+        "actions": (over, tuple(it.id for it in G.visible_interactions()), "read_note" in G.flags),
+        "compass": (over, G.current_room_id, tuple(ex["locked"] for ex in G.compass()),
+                    tuple(G.reachable_rooms())),
+        "inventory": (over, G.inventory.mask),
+    }
+
+def refresh(before: dict) -> None:
+    """End a click callback: persist, then rerun the story and every part whose view changed."""
+    sync_state()
+    parts = ["story"] + [part for part, v in view().items() if before[part] != v]
+    st.session_state._cycle = (time.perf_counter(), set(parts))  # timed as "rerun" by part_done
+    if DEBUG:
+        parts.append("debug")
+    st.rerun(parts)
+
+# ---------- click handlers ----------
+def on_look():
+    touch_session()
+    before = view()
+    G.look()
+    st.session_state.ui_tick += 1
+    panel_append_desc(long=True)
+    refresh(before)
+
+def on_action(interaction_id: str):
+    touch_session()
+    before = view()
+    inv_before = set(G.inventory)
+    msg, dead = G.do(interaction_id)  # msg may already be a custom death line
+    inv_after = set(G.inventory)
+    st.session_state.ui_tick += 1
+
+    # If the action resulted in death, use engine-provided message if available
+    if dead or getattr(G, "dead", False) or getattr(G, "hp", 1) <= 0:
+        cause = getattr(G, "death_cause", "generic")
+        # Prefer an explicit engine-set message; otherwise use the action's msg
+        death_msg = getattr(G, "death_message", None) or msg
+        die(cause, death_msg)  # appends the line + freezes UI
+        refresh(before)
+        return
 
-# ----- LEFT: header + fixed text window + controls -----
-with left:
+    # Normal (non-death) path:
+    # Refresh desc (overrides) *first* so authored text ends up on top
+    panel_append_desc(long=True)
+
+    # Inventory pickups (if any)
+    for name in sorted(inv_after - inv_before):
+        panel_append(f"**{name.title()} added to inventory.**", "success")
+
+    # Authored text *last* -> shows at the top in newest-first panel
+    if msg:
+        panel_append(msg, "info")
+    refresh(before)
+
+def on_help():
+    touch_session()
+    before = view()
+    st.session_state.ui_tick += 1
+    panel_append(INSTRUCTIONS_MD, "info")
+    refresh(before)
+
+def on_move(ex: dict):
+    touch_session()
+    before = view()
+    st.session_state.ui_tick += 1
+
+    # Locked → show warning in the log, do not move
+    if ex["locked"]:
+        locked_line = ex["locked_text"] or "It's stuck. You'll need leverage."
+        panel_append(locked_line, "warning")
+        refresh(before)
+        return
+
+    # Detect if this exit was item-gated and the player has that item
+    exit_obj = G.room.exits.get(ex["direction"])
+    used_item = None
+    if exit_obj and getattr(exit_obj, "locked_by_item", None):
+        if exit_obj.locked_by_item in G.inventory:
+            used_item = exit_obj.locked_by_item
+
+    # Move succeeds → append arrival entry (append-only panel)
+    G.move(ex["direction"])
+    if G.room.name:
+        panel_append(G.room.name, "room")
+    panel_append_desc()
+
+    if used_item:
+        panel_append(f"You pry the door with the **{used_item}**. It opens.", "success")
+
+    # ---- Death guard goes HERE ----
+    if getattr(G, "dead", False):
+        cause = getattr(G, "death_cause", "generic")
+        msg   = getattr(G, "death_message", None)
+        die(cause, msg)   # ends the run with the right message (e.g., dog)
+
+    # Victory room?
+    #if "END_ROOM_IDS" in globals() and G.current_room_id in END_ROOM_IDS:
+    #    panel_append(G.desc_long(), "body")
+    #    end_game("You step into the street and breathe free air. You escaped!", level="success")
+
+    refresh(before)
+
+def on_travel(key: str):
+    """Walk to a visited room in one click (one rerun for the whole route)."""
+    room_id = st.session_state.get(key)
+    if not room_id:
+        return
+    touch_session()
+    before = view()
+    st.session_state.ui_tick += 1
+    if G.travel(room_id) is None:
+        panel_append("You can't find a way back there from here.", "warning")
+    else:
+        if G.room.name:
+            panel_append(G.room.name, "room")
+        panel_append_desc()
+    refresh(before)
+
+def on_show_earlier():
+    st.session_state.panel_window += DescriptionPanel.window  # the story part reruns by itself
+
+# ---------- parts ----------
+PANEL = DescriptionPanel(
+    panel_id="room-desc",
+    height_px=560,                 # a little taller looks nice with more width
+    border_css="1px solid #333",   # subtle dark border
+    bg_css="#111",                 # dark background
+    font_size="1.4rem",              # optional bump
+    margin_bottom_px=16,
+    inject_css=False,              # part of APP_CSS
+)
+
+@timed("panel")
+def render_panel(slot) -> int:
+    return PANEL.render(st.session_state.panel["blocks"], slot, st.session_state.panel_window)
+
+@st.fragment(key="story")
+@timed("story")
+def story_part():
+    touch_session()
     # Header ABOVE the window
     if G.room.name:
         st.markdown(
@@ -335,198 +698,168 @@ with left:
             unsafe_allow_html=True
         )
 
-    # Fixed, scrollable text window
-    DescriptionPanel(
-        panel_id="room-desc",
-        height_px=560,                 # a little taller looks nice with more width
-        border_css="1px solid #333",   # subtle dark border
-        bg_css="#111",                 # dark background
-        font_size="1.4rem",              # optional bump
-        margin_bottom_px=16
-    ).render(st.session_state.panel["blocks"])
-    
+    # Fixed, scrollable text window (in a slot so streamed prose can redraw it)
+    slot = st.empty()
+    hidden = render_panel(slot)
+    if st.session_state.get("pending_prose"):
+        stream_pending_prose(slot)
+        hidden = render_panel(slot)
+    if hidden:
+        st.button(f"Show earlier messages ({hidden})", key="panel_more", on_click=on_show_earlier)
+
+@st.fragment(key="actions")
+@timed("actions")
+def actions_part():
+    touch_session()
     # --- If over: show Play Again under the panel; else show Look/actions ---
     if st.session_state.get("game_over"):
         st.markdown('<hr class="panel-rule">', unsafe_allow_html=True)
-        if st.button("Play again", key="restart_btn", type="primary", use_container_width=True):
-            restart_game()
-    else:
-        # Actions header
-        st.markdown('<div class="panel-subhed">Actions you can take:</div>', unsafe_allow_html=True)
-        st.markdown('<hr class="panel-rule">', unsafe_allow_html=True)
-        # ---------- Look (left) | Actions (middle) | Help (right) ----------
-        vis = G.visible_interactions()
-        A = list(vis)  # stable order
-
-        NUM_COLS = 6  # [Look] [A] [A] [A] [A] [Help]
-        MID_SLOTS = NUM_COLS - 2
+        if st.session_state.get("last_death") and len(G.history):
+            st.button("Rewind", key="rewind_btn", type="primary", use_container_width=True,
+                      on_click=rewind_game)
+        st.button("Play again", key="restart_btn", type="primary", use_container_width=True,
+                  on_click=restart_game)
+        return
 
-        def render_actions_row(actions_slice, include_look=False, include_help=False):
-            cols = st.columns(NUM_COLS)
-            # Left-most: Look (optional, only on first row)
+    # Actions header
+    st.markdown('<div class="panel-subhed">Actions you can take:</div>', unsafe_allow_html=True)
+    st.markdown('<hr class="panel-rule">', unsafe_allow_html=True)
+    # ---------- Look (left) | Actions (middle) | Help (right) ----------
+    vis = G.visible_interactions()
+    A = list(vis)  # stable order
+
+    NUM_COLS = 6  # [Look] [A] [A] [A] [A] [Help]
+    MID_SLOTS = NUM_COLS - 2
+    tick = st.session_state.ui_tick
+
+    def render_actions_row(actions_slice, include_look=False, include_help=False):
+        cols = st.columns(NUM_COLS)
+        # Left-most: Look (optional, only on first row)
+        with cols[0]:
             if include_look:
-                with cols[0]:
-                    if st.button("Look", type="primary", key=f"look_{st.session_state.ui_tick}"):
-                        G.look()
-                        st.session_state.ui_tick += 1
-                        panel_append(G.desc_long(), "body")
-                        st.rerun()
+                st.button("Look", type="primary", key=f"look_{tick}", on_click=on_look)
             else:
-                with cols[0]:
-                    st.write("")  # keep grid shape
-
-            # Middle: action buttons
-            for col, it in zip(cols[1:-1], actions_slice):
-                with col:
-                    if st.button(it.label, key=f"act_{it.id}_{st.session_state.ui_tick}"):
-                        before = set(G.inventory)
-                        msg, dead = G.do(it.id)  # msg may already be a custom death line
-                        after = set(G.inventory)
-                        st.session_state.ui_tick += 1
-
-                        # If the action resulted in death, use engine-provided message if available
-                        if dead or getattr(G, "dead", False) or getattr(G, "hp", 1) <= 0:
-                            cause = getattr(G, "death_cause", "generic")
-                            # Prefer an explicit engine-set message; otherwise use the action's msg
-                            death_msg = getattr(G, "death_message", None) or msg
-                            die(cause, death_msg)
-                            # die() calls end_game() which appends the line + freezes UI + reruns
-                            # so we never reach the normal append code below.
-
-                        # Normal (non-death) path:
-                        # Refresh desc (overrides) *first* so authored text ends up on top
-                        panel_append(G.desc_long(), "body")
-
-                        # Inventory pickups (if any)
-                        for name in sorted(after - before):
-                            panel_append(f"**{name.title()} added to inventory.**", "success")
-
-                        # Authored text *last* -> shows at the top in newest-first panel
-                        if msg:
-                            panel_append(msg, "info")
-
-                        st.rerun()
-
-
-            # Fill any unused middle slots to keep width consistent
-            empty_slots = MID_SLOTS - len(actions_slice)
-            for _ in range(max(0, empty_slots)):
-                with cols[-2]:
-                    st.write("")
-
-            # Right-most: Help (optional, only on first row)
-            if include_help:
-                with cols[-1]:
-                    if "read_note" in G.flags:
-                        if st.button("Help", key=f"help_{st.session_state.ui_tick}"):
-                            st.session_state.ui_tick += 1
-                            panel_append(INSTRUCTIONS_MD, "info")
-                            st.rerun()
-                    else:
-                        st.button("Help", disabled=True, key="help_placeholder")
+                st.write("")  # keep grid shape
+
+        # Middle: action buttons
+        for col, it in zip(cols[1:-1], actions_slice):
+            with col:
+                st.button(it.label, key=f"act_{it.id}_{tick}", on_click=on_action, args=(it.id,))
+
+        # Fill any unused middle slots to keep width consistent
+        empty_slots = MID_SLOTS - len(actions_slice)
+        for _ in range(max(0, empty_slots)):
+            with cols[-2]:
+                st.write("")
+
+        # Right-most: Help (optional, only on first row)
+        with cols[-1]:
+            if include_help and "read_note" in G.flags:
+                st.button("Help", key=f"help_{tick}", on_click=on_help)
+            elif include_help:
+                st.button("Help", disabled=True, key="help_placeholder")
             else:
-                with cols[-1]:
-                    st.write("")
+                st.write("")
+
+    # First row: Look + middle actions + Help
+    render_actions_row(A[:MID_SLOTS], include_look=True, include_help=True)
+
+    # Additional rows for overflow actions (no Look/Help on these)
+    for i in range(MID_SLOTS, len(A), MID_SLOTS):
+        render_actions_row(A[i:i+MID_SLOTS], include_look=False, include_help=False)
+
+def prettify_exit(label: str) -> str:
+    t = label.strip()
+    tl = t.lower()
+    if tl.startswith("to the "): t = t[7:]
+    elif tl.startswith("to "):    t = t[3:]
+    return t[:1].upper() + t[1:] if t else t
+
+@st.fragment(key="compass")
+@timed("compass")
+def compass_part():
+    touch_session()
+    if st.session_state.get("game_over"):
+        return  # When the run is over, don't render compass/inventory
+    moves = G.compass()
+    if not moves:
+        return
+    st.markdown('<div class="panel-subhed">Directions you can go</div>', unsafe_allow_html=True)
+    st.markdown('<hr class="panel-rule">', unsafe_allow_html=True)
+
+    # Compass: vertical stack of full-width buttons
+    st.markdown('<div class="compass-vertical">', unsafe_allow_html=True)
+    for ex in moves:  # ex is a dict; load_world validated every exit target
+        st.button(
+            prettify_exit(ex["label"]),
+            key=f"mv_{ex['direction']}_{st.session_state.ui_tick}",
+            type="secondary",
+            use_container_width=True,
+            on_click=on_move,
+            args=(ex,),
+        )
+    st.markdown('</div>', unsafe_allow_html=True)
+
+    # Travel: any visited room reachable through unlocked exits
+    places = G.reachable_rooms()
+    if places:
+        key = f"travel_{st.session_state.ui_tick}"
+        st.selectbox(
+            "Travel to",
+            places,
+            index=None,
+            placeholder="Somewhere you've been",
+            format_func=lambda rid: WORLD.rooms[rid].name or rid,
+            key=key,
+            on_change=on_travel,
+            args=(key,),
+        )
 
-        # First row: Look + middle actions + Help
-        render_actions_row(A[:MID_SLOTS], include_look=True, include_help=True)
+@st.fragment(key="inventory")
+@timed("inventory")
+def inventory_part():
+    touch_session()
+    if st.session_state.get("game_over"):
+        return
+    # Divider + Inventory below the compass (toggling reruns only this part)
+    st.markdown('<hr class="panel-rule">', unsafe_allow_html=True)
+    st.checkbox("Inventory", key="inv_open")
+    if st.session_state.inv_open:
+        InventoryPanel(panel_id="inv", height_px=260, border_css="1px solid #333") \
+            .render(sorted(G.inventory))
+
+@st.fragment(key="debug")
+def debug_part():
+    touch_session()
+    with st.expander("Debug", expanded=True):
+        rows = [{"part": name, "last ms": round(last, 2), "avg ms": round(total / runs, 2),
+                 "max ms": round(worst, 2), "runs": runs}
+                for name, (last, runs, total, worst) in st.session_state.get("_timings", {}).items()]
+        st.dataframe(rows, hide_index=True, width="stretch")
+        st.write({
+            "room": G.current_room_id,
+            "inventory": sorted(G.inventory),
+            "flags": sorted(G.flags),
+        })
 
-        # Additional rows for overflow actions (no Look/Help on these)
-        for i in range(MID_SLOTS, len(A), MID_SLOTS):
-            render_actions_row(A[i:i+MID_SLOTS], include_look=False, include_help=False)
 
+# =========================
+# TWO-COLUMN LAYOUT
+# =========================
+left, right = st.columns([3, 1], gap="large")  # wider story area
+
+# ----- LEFT: header + fixed text window + controls -----
+with left:
+    story_part()
+    actions_part()
 
 # ----- RIGHT: Directions (compass) above Inventory -----
 with right:
-    if st.session_state.get("game_over"):
-        # When the run is over, don't render compass/inventory
-        pass
-    else:
-        moves = G.compass()
-
-        def prettify_exit(label: str) -> str:
-            t = label.strip()
-            tl = t.lower()
-            if tl.startswith("to the "): t = t[7:]
-            elif tl.startswith("to "):    t = t[3:]
-            return t[:1].upper() + t[1:] if t else t
-
-        if moves:
-            st.markdown('<div class="panel-subhed">Directions you can go</div>', unsafe_allow_html=True)
-            st.markdown('<hr class="panel-rule">', unsafe_allow_html=True)
-
-            # Compass: vertical stack of full-width buttons
-            st.markdown('<div class="compass-vertical">', unsafe_allow_html=True)
-            for ex in moves:  # ex is a dict
-                to_valid = bool(ex["to"]) and str(ex["to"]) in G.rooms
-                disabled = not to_valid
-                label = prettify_exit(ex["label"])
-
-                clicked = st.button(
-                    label,
-                    key=f"mv_{ex['direction']}_{st.session_state.ui_tick}",
-                    type="secondary",
-                    disabled=disabled,
-                    use_container_width=True,
-                )
-                if clicked:
-                    st.session_state.ui_tick += 1
-
-                    if not to_valid:
-                        panel_append("It doesn't seem to open.", "warning")
-                        st.rerun()
-
-                    # Locked → show warning in the log, do not move
-                    if ex["locked"]:
-                        locked_line = ex["locked_text"] or "It's stuck. You'll need leverage."
-                        panel_append(locked_line, "warning")
-                        st.rerun()
-
-                    # Detect if this exit was item-gated and the player has that item
-                    exit_obj = G.room.exits.get(ex["direction"])
-                    used_item = None
-                    if exit_obj and getattr(exit_obj, "locked_by_item", None):
-                        if exit_obj.locked_by_item in G.inventory:
-                            used_item = exit_obj.locked_by_item
-
-                    # Move succeeds → append arrival entry (append-only panel)
-                    G.move(ex["direction"])
-                    if G.room.name:
-                        panel_append(G.room.name, "room")
-                    panel_append(G.desc_short(), "body")
-
-                    if used_item:
-                        panel_append(f"You pry the door with the **{used_item}**. It opens.", "success")
-
-                    # ---- Death guard goes HERE ----
-                    if getattr(G, "dead", False):
-                        cause = getattr(G, "death_cause", "generic")
-                        msg   = getattr(G, "death_message", None)
-                        die(cause, msg)   # ends the run with the right message (e.g., dog)
-
-                    # Victory room?
-                    #if "END_ROOM_IDS" in globals() and G.current_room_id in END_ROOM_IDS:
-                    #    panel_append(G.desc_long(), "body")
-                    #    end_game("You step into the street and breathe free air. You escaped!", level="success")
-
-                    st.rerun()
-            st.markdown('</div>', unsafe_allow_html=True)
-
-        # Divider + Inventory below the compass
-        st.markdown('<hr class="panel-rule">', unsafe_allow_html=True)
-        st.checkbox("Inventory", key="inv_open")
-        if st.session_state.inv_open:
-            InventoryPanel(panel_id="inv", height_px=260, border_css="1px solid #333") \
-                .render(sorted(G.inventory))
-
-        
+    compass_part()
+    inventory_part()
 
 # ---------- end of two-column layout ----------
 
-# (Optional) debug
-#with st.expander("Debug state"):
-#    st.write({
-#        "room": G.current_room_id,
-#        "inventory": sorted(G.inventory),
-#        "flags": sorted(G.flags),
-#    })
+record_timing("full run", (time.perf_counter() - RUN_T0) * 1e3)
+if DEBUG:
+    debug_part()
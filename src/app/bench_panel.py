@@ -0,0 +1,72 @@
+# src/app/bench_panel.py
+"""Benchmark DescriptionPanel HTML building on a full log.
+
+Times ``build_html`` for ``--blocks`` messages (default MAX_LOG_BLOCKS = 300)
+the way each Streamlit rerun calls it:
+
+    full_cold_ms     every block rendered, fresh messages (no cached HTML) --
+                     what every rerun cost before messages cached their HTML
+    full_warm_ms     every block rendered, cached message HTML
+    window_warm_ms   newest ``--window`` blocks only, cached message HTML
+
+Usage (from ``src/``)::
+
+    python -m app.bench_panel --blocks 300 --window 60
+"""
+from __future__ import annotations
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+from .ui_components import DescriptionPanel, PanelMessage
+
+KINDS = ["body", "body", "body", "info", "success", "warning"]
+WORDS = ("the a hall door **brass** key _cold_ dark stair you see *faint* light north dust "
+         "shelf note under window <old> & creaking floor").split()
+
+
+def make_log(blocks: int, seed: int = 0) -> List[PanelMessage]:
+    rng = random.Random(seed)
+    return [PanelMessage(" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 60))), rng.choice(KINDS))
+            for _ in range(blocks)]
+
+
+def _per_call_ms(fn: Callable[[], object], n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e3
+
+
+def bench(blocks: int, window: int, iters: int, seed: int = 0) -> Dict[str, float]:
+    panel = DescriptionPanel(window=window)
+    log = make_log(blocks, seed)
+    texts = [(m.text, m.kind) for m in log]
+
+    def cold() -> str:
+        return panel.build_html([PanelMessage(t, k) for t, k in texts], 0)
+
+    return {
+        "full_cold_ms": round(_per_call_ms(cold, iters), 3),
+        "full_warm_ms": round(_per_call_ms(lambda: panel.build_html(log, 0), iters), 3),
+        "window_warm_ms": round(_per_call_ms(lambda: panel.build_html(log), iters), 3),
+        "full_html_kb": round(len(panel.build_html(log, 0)) / 1024, 1),
+        "window_html_kb": round(len(panel.build_html(log)) / 1024, 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark DescriptionPanel rendering.")
+    ap.add_argument("--blocks", type=int, default=300)
+    ap.add_argument("--window", type=int, default=DescriptionPanel.window)
+    ap.add_argument("--iters", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    r = bench(args.blocks, args.window, args.iters, args.seed)
+    print(f"{args.blocks} blocks, window {args.window}  " + "  ".join(f"{k}={v}" for k, v in r.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,7 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Optional, Literal, Union
-import html, re
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Literal, Union
+import html, re, time
 import streamlit as st
 
 Kind = Literal["body", "success", "info", "warning", "error"]
@@ -11,6 +11,13 @@ class PanelMessage:
     text: str
     kind: Kind = "body"
     id: Optional[str] = None
+    _html: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    def html(self) -> str:
+        """``text`` as HTML; computed once, since logged messages never change."""
+        if self._html is None:
+            self._html = _md_min(self.text)
+        return self._html
 
 def _md_min(s: str) -> str:
     """Very small Markdown -> HTML: bold/italic + line breaks. Escapes HTML first."""
@@ -22,6 +29,22 @@ def _md_min(s: str) -> str:
     s = s.replace("\n", "<br/>")
     return s
 
+# Inline color styles (block chrome). Text color is inherited from panel unless overridden.
+STYLE_MAP = {
+    "body":    "padding:0;border:0;background:transparent;color:inherit;",
+    "success": "background:#111;border:0px solid #15FF00;color:#15FF00;",
+    "info":    "background:#111;border:0px solid #00FFEA;color:#00FFEA;",
+    "warning": "background:#111;border:0px solid #FF0015;color:#FF0015;",
+    "error":   "background:#111;border:0px solid #EE4B2B;color:#EE4B2B;",
+}
+
+# per-kind block style up to the opacity; body (room prose) gets no extra padding
+BLOCK_STYLE = {
+    kind: ("margin:0 0 .6rem 0;" + style if kind == "body"
+           else "margin:0 0 .6rem 0;padding:.6rem .75rem;border-radius:.4rem;" + style)
+    for kind, style in STYLE_MAP.items()
+}
+
 @dataclass
 class DescriptionPanel:
     """Fixed-size panel that renders a stack of messages with colored backgrounds."""
@@ -35,10 +58,22 @@ class DescriptionPanel:
     font_size: Optional[int] = 50
     margin_bottom_px: int = 16
     text_color: str = "#f5f5f5"                   # LIGHT body text
-
-    def render(self, messages: list[Union[PanelMessage, str]]) -> None:
-        _ensure_css_once()  # layout styles; colors are inline below
-
+    window: int = 60                              # newest blocks rendered; 0 = all
+    inject_css: bool = True                       # False if the page already emits DESC_PANEL_CSS
+
+    def render(self, messages: list[Union[PanelMessage, str]], target=None,
+               window: Optional[int] = None) -> int:
+        """Render into ``target`` (e.g. an ``st.empty()`` slot, so it can be
+        redrawn in place) or the current container. Returns how many older
+        messages the window left out."""
+        if self.inject_css:
+            _ensure_css_once()  # layout styles; colors are inline below
+        (target or st).markdown(self.build_html(messages, window), unsafe_allow_html=True)
+        n = self.window if window is None else window
+        return max(0, len(messages or ()) - n) if n else 0
+
+    def build_html(self, messages: list[Union[PanelMessage, str]], window: Optional[int] = None) -> str:
+        """Panel HTML for the newest ``window`` messages (default ``self.window``; 0 = all)."""
         panel_style = (
             f"height:{self.height_px}px;"
             f"border:{self.border_css};"
@@ -52,59 +87,57 @@ class DescriptionPanel:
         if self.font_size:
             panel_style += f"font-size:{self.font_size};"
 
-        # Inline color styles (block chrome). Text color is inherited from panel unless overridden.
-        #style_map = {
-        #    "body":    "padding:0;border:0;background:transparent;color:inherit;",
-        #    "success": "background:#e6f4ea;border:1px solid #c7e8d0;color:#111;",
-        #    "info":    "background:#e8f0fe;border:1px solid #c8d3ff;color:#111;",
-        #    "warning": "background:#fff4e5;border:1px solid #ffe2bd;color:#111;",
-        #    "error":   "background:#fde8e8;border:1px solid #f8c7c7;color:#111;",
-        #}
-
-        style_map = {
-            "body":    "padding:0;border:0;background:transparent;color:inherit;",
-            "success": "background:#111;border:0px solid #15FF00;color:#15FF00;",
-            "info":    "background:#111;border:0px solid #00FFEA;color:#00FFEA;",
-            "warning": "background:#111;border:0px solid #FF0015;color:#FF0015;",
-            "error":   "background:#111;border:0px solid #EE4B2B;color:#EE4B2B;",
-        }
-
-        # Newest-first: reverse the list so latest message renders at the top
-        data = list(messages or [])
-        data.reverse()
+        # Newest-first; only the visible window is rendered
+        data = messages or []
+        n = self.window if window is None else window
+        hidden = max(0, len(data) - n) if n else 0
+        newest_first = reversed(data[hidden:])
 
         # Compute per-block opacity: newest = 1.0, then linearly down to fade_min_opacity over fade_span items
         blocks_html: list[str] = []
         span = max(1, int(self.fade_span))
         min_op = max(0.0, min(1.0, float(self.fade_min_opacity)))
 
-        for idx, raw in enumerate(data):
+        for idx, raw in enumerate(newest_first):
             m = raw if isinstance(raw, PanelMessage) else PanelMessage(str(raw), "info")
-            kind = m.kind if m.kind in style_map else "body"
+            kind = m.kind if m.kind in STYLE_MAP else "body"
 
             # opacity factor by age
             t = min(idx / span, 1.0)                # 0 .. 1 across the span
             opacity = (1.0 - t) * (1.0 - min_op) + min_op  # lerp to min opacity
 
-            block_style = (
-                "margin:0 0 .6rem 0;"
-                "padding:.6rem .75rem;"
-                "border-radius:.4rem;"
-                f"{style_map[kind]}"
-                f"opacity:{opacity};"
-            )
-            if kind == "body":  # no extra padding for room prose
-                block_style = "margin:0 0 .6rem 0;" + style_map[kind] + f"opacity:{opacity};"
+            blocks_html.append(f'<div style="{BLOCK_STYLE[kind]}opacity:{opacity};">{m.html()}</div>')
 
-            blocks_html.append(f'<div style="{block_style}">{_md_min(m.text)}</div>')
+        if hidden:
+            blocks_html.append(f'<div style="opacity:{min_op};font-size:.8em;">… {hidden} earlier</div>')
 
         panel_id = f"panel-{self.panel_id}"
-        panel_html = (
+        return (
             f'<div class="desc-panel" id="{panel_id}" style="{panel_style}">'
             + "".join(blocks_html)
             + "</div>"
         )
-        st.markdown(panel_html, unsafe_allow_html=True)
+
+    def render_stream(self, messages: list[Union[PanelMessage, str]], tokens: Iterable[str],
+                      target, min_interval_s: float = 0.05, window: Optional[int] = None,
+                      index: Optional[int] = None) -> str:
+        """Show ``tokens`` as a growing body block as they arrive (redrawn at
+        most every ``min_interval_s``): in place of ``messages[index]``, or on
+        top of the log if ``index`` is None. Returns the full text."""
+        shown = list(messages)
+        if index is None:
+            index = len(shown)
+            shown.append(PanelMessage("", "body"))
+        text = ""
+        last = 0.0
+        for tok in tokens:
+            text += tok
+            now = time.monotonic()
+            if now - last >= min_interval_s:
+                shown[index] = PanelMessage(text + " ▍", "body")
+                self.render(shown, target, window)
+                last = now
+        return text
 
 @dataclass
 class InventoryPanel:
@@ -131,13 +164,7 @@ class InventoryPanel:
             html = f'<div style="{box}"><ul style="margin:0 0 0 1.1rem;">{lis}</ul></div>'
         st.markdown(html, unsafe_allow_html=True)
 
-def _ensure_css_once():
-    # bump the key to force a one-time refresh of styles
-    if st.session_state.get("_ui_desc_panel_css_v2"):
-        return
-    st.session_state["_ui_desc_panel_css_v2"] = True
-    st.markdown(
-        """
+DESC_PANEL_CSS = """
         <style>
             .desc-panel { line-height: 1.35; }
             .desc-panel .msg { margin: 0 0 .6rem 0; padding: .6rem .75rem; border-radius: .4rem; }
@@ -150,7 +177,12 @@ def _ensure_css_once():
             .desc-panel strong, .desc-panel b { font-weight: 600; }
             .desc-panel em, .desc-panel i { font-style: italic; }
         </style>
-        """,
-        unsafe_allow_html=True,
-    )
+        """
+
+def _ensure_css_once():
+    # bump the key to force a one-time refresh of styles
+    if st.session_state.get("_ui_desc_panel_css_v2"):
+        return
+    st.session_state["_ui_desc_panel_css_v2"] = True
+    st.markdown(DESC_PANEL_CSS, unsafe_allow_html=True)
 
@@ -0,0 +1,206 @@
+# src/backend/bench.py
+"""Benchmark suite for the Python engine over synthetic worlds.
+
+For each world size it generates a synthetic world (see ``synth``) and times
+loading, the hot read paths (compass, visible_interactions, render_desc), the
+verbs (move, do), travel routing, state (de)serialization and peak load memory. Results are
+written as JSON and compared against a stored baseline; any metric slower than
+``--tolerance`` x baseline is reported as a regression (exit code 1).
+
+Load timings are the best of ``--repeat`` runs. ``new_game_from_path_s`` is a
+cold load (no binary cache) and ``cached_load_s`` a warm one from a
+``.worldc`` built beforehand; worlds and caches live in a temp directory.
+
+Usage (from ``src/``)::
+
+    python -m backend.bench --sizes 100,1000,10000,100000 --out ../bench/results.json
+    python -m backend.bench --sizes 100,1000,10000 --save-baseline
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .oo import Game
+from .oo_loader import compile_world_file, load_rooms, new_game_from_path
+from .validate import validate_world
+from .synth import write_world
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_OUT = ROOT_DIR / "bench" / "results.json"
+DEFAULT_BASELINE = ROOT_DIR / "bench" / "baseline.json"
+
+
+def _per_call_us(fn: Callable[[], Any], n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def _timed(fn: Callable[[], Any], repeat: int = 1) -> float:
+    """Best of ``repeat`` wall-clock runs of ``fn`` (single-shot load timings are noisy)."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _walk(game: Game, rng: random.Random, steps: int) -> None:
+    """Random-walk to spread later samples over many rooms and states."""
+    for _ in range(steps):
+        exits = game.room.index.exits
+        if exits:
+            game.move(rng.choice(exits).direction)
+
+
+def bench_size(rooms: int, iters: int, world_kw: Dict[str, Any], seed: int = 0,
+               repeat: int = 3) -> Dict[str, float]:
+    res: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"synth_{rooms}.json")
+        write_world(path, rooms, seed=seed, **world_kw)
+        res["file_mb"] = round(os.path.getsize(path) / 1e6, 3)
+
+        with open(path, "r", encoding="utf-8") as f:
+            raw = f.read()
+        res["json_parse_s"] = _timed(lambda: json.loads(raw), repeat)
+        world = json.loads(raw)
+        del raw
+        res["load_rooms_s"] = _timed(lambda: load_rooms(world), repeat)
+        # what check_world runs: part of every cold load
+        res["validate_s"] = _timed(lambda: validate_world(world, warnings=False, schema=False), repeat)
+        del world
+        res["new_game_from_path_s"] = _timed(lambda: new_game_from_path(path, use_cache=False), repeat)
+        compile_world_file(path)  # writes <path>.worldc inside tmp
+        res["cached_load_s"] = _timed(lambda: new_game_from_path(path), repeat)
+
+        gc.collect()
+        tracemalloc.start()
+        game = new_game_from_path(path, use_cache=False)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        res["peak_load_mem_mb"] = round(peak / 1e6, 3)
+        res["mem_per_room_bytes"] = round(peak / rooms, 1)
+
+    rng = random.Random(seed)
+    _walk(game, rng, 50)
+    res["compass_us"] = _per_call_us(game.compass, iters)
+    res["visible_interactions_us"] = _per_call_us(game.visible_interactions, iters)
+    res["render_desc_short_us"] = _per_call_us(game.desc_short, iters)
+    res["render_desc_long_us"] = _per_call_us(game.desc_long, iters)
+
+    def move() -> None:
+        exits = game.room.index.exits
+        game.move(exits[rng.randrange(len(exits))].direction)
+    res["move_us"] = _per_call_us(move, iters)
+
+    def do() -> None:
+        vis = game.visible_interactions()
+        if vis:
+            game.do(vis[rng.randrange(len(vis))].id)
+        if game.dead:
+            game.restart()
+        elif not vis:
+            move()
+    res["do_us"] = _per_call_us(do, iters)
+
+    _walk(game, rng, 200)
+    visited = sorted(game.state.visited)
+    res["route_us"] = _per_call_us(lambda: game.route_to(visited[rng.randrange(len(visited))]), iters)
+
+    game.restart()
+    _walk(game, rng, 20)
+    for _ in range(20):
+        do()
+    snap = game.to_dict()
+    res["to_dict_us"] = _per_call_us(game.to_dict, iters)
+    res["load_dict_us"] = _per_call_us(lambda: game.load_dict(snap), iters)
+    return {k: round(v, 6) if isinstance(v, float) else v for k, v in res.items()}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return human-readable regression lines (metric > tolerance x baseline)."""
+    out: List[str] = []
+    for size, metrics in current["results"].items():
+        base = baseline.get("results", {}).get(size)
+        if not base:
+            continue
+        for k, v in metrics.items():
+            b = base.get(k)
+            if not b or k == "file_mb":
+                continue
+            ratio = v / b
+            if ratio > tolerance:
+                out.append(f"{size:>8} rooms  {k:<24} {b:>12.3f} -> {v:>12.3f}  ({ratio:.2f}x)")
+    return out
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the Sorque engine on synthetic worlds.")
+    ap.add_argument("--sizes", default="100,1000,10000",
+                    help="comma-separated room counts; 100000+ needs several GB of RAM")
+    ap.add_argument("--iters", type=int, default=20000, help="calls per per-call metric")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per load timing (best is kept)")
+    ap.add_argument("--exits", type=int, default=3)
+    ap.add_argument("--interactions", type=int, default=4)
+    ap.add_argument("--overrides", type=int, default=2)
+    ap.add_argument("--globals", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default=str(DEFAULT_OUT))
+    ap.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    ap.add_argument("--save-baseline", action="store_true", help="also write results to --baseline")
+    ap.add_argument("--tolerance", type=float, default=1.25, help="regression threshold (ratio to baseline)")
+    args = ap.parse_args(argv)
+
+    world_kw = dict(exits_per_room=args.exits, interactions=args.interactions,
+                    overrides=args.overrides, global_interactions=args.globals)
+    report: Dict[str, Any] = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iters": args.iters,
+            "repeat": args.repeat,
+            "world": world_kw,
+        },
+        "results": {},
+    }
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        r = bench_size(size, args.iters, world_kw, seed=args.seed, repeat=args.repeat)
+        report["results"][str(size)] = r
+        print(f"{size:>8} rooms  " + "  ".join(f"{k}={v}" for k, v in r.items()), flush=True)
+
+    for dest in [args.out] + ([args.baseline] if args.save_baseline else []):
+        Path(dest).parent.mkdir(parents=True, exist_ok=True)
+        with open(dest, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {dest}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        regressions = compare(report, json.load(f), args.tolerance)
+    if regressions:
+        print(f"REGRESSIONS vs {args.baseline} (> {args.tolerance}x):")
+        print("\n".join(regressions))
+        return 1
+    print(f"no regressions vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
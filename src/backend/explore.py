@@ -0,0 +1,370 @@
+# src/backend/explore.py
+"""Exhaustive state-space explorer for authored worlds.
+
+Breadth-first search over every reachable ``(room, flags, inventory)`` state,
+using ``Game.look``/``move``/``do`` as transitions. Deaths and wins are
+terminal. Reports reachable/unreachable rooms, interactions that can never be
+shown, every distinct death transition (with a shortest example path) and the
+shortest winning path.
+
+State keys are 16-byte BLAKE2b digests of the compiled state. The visited set
+(with parent pointers for path reconstruction) stays in memory up to
+``mem_states`` entries and then spills to a SQLite file; BFS levels larger
+than ``mem_states`` spill to a temp file too, so memory stays bounded.
+
+Usage (from ``src/``)::
+
+    python -m backend.explore ../data/worlds/escape_house_01.json --win-room 3 --workers 4
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .oo import Game
+from .oo_loader import new_game_from_path
+
+State = Tuple[str, int, int]  # (current_room_id, flags mask, inventory mask)
+Key = bytes
+
+
+def state_key(state: State) -> Key:
+    rid, fm, im = state
+    return hashlib.blake2b(f"{rid}\x00{fm:x}\x00{im:x}".encode(), digest_size=16).digest()
+
+
+def set_state(game: Game, state: State) -> None:
+    game.current_room_id, game.flags.mask, game.inventory.mask = state
+    game.dead = False
+
+
+def get_state(game: Game) -> State:
+    return (game.current_room_id, game.flags.mask, game.inventory.mask)
+
+
+# -----------------------------
+# Transition function
+# -----------------------------
+
+@dataclass
+class Expansion:
+    parent: State
+    children: List[Tuple[str, State]]           # (action, child) for live, non-winning children
+    deaths: List[Tuple[str, str]]               # (action, death_cause)
+    wins: List[Tuple[str, str]]                 # (action, win room entered)
+    shown: List[str]                            # interaction ids visible in this state
+
+
+def expand(game: Game, state: State, win_rooms: Set[str]) -> Expansion:
+    """Apply every available action to ``state`` and classify the results."""
+    set_state(game, state)
+    rid = state[0]
+    actions = ["look"]
+    actions += [f"move:{ex['direction']}" for ex in game.compass() if not ex["locked"]]
+    shown = [it.id for it in game.visible_interactions()]
+    actions += [f"do:{iid}" for iid in shown]
+
+    out = Expansion(state, [], [], [], shown)
+    for action in actions:
+        set_state(game, state)
+        verb, _, arg = action.partition(":")
+        if verb == "look":
+            game.look()
+        elif verb == "move":
+            game.move(arg)
+        else:
+            game.do(arg)
+        if game.dead:
+            out.deaths.append((action, game.death_cause))
+            continue
+        child = get_state(game)
+        if child == state:
+            continue  # self-loop (e.g. a look that reveals nothing new)
+        if game.current_room_id in win_rooms and game.current_room_id != rid:
+            out.wins.append((action, game.current_room_id))
+            continue
+        out.children.append((action, child))
+    return out
+
+
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(world_path: str) -> None:
+    _WORKER["game"] = new_game_from_path(world_path)
+
+
+def _expand_chunk(states: List[State], win_rooms: Set[str], game: Optional[Game] = None) -> List[Expansion]:
+    game = game or _WORKER["game"]  # type: ignore[assignment]
+    return [expand(game, s, win_rooms) for s in states]
+
+
+def _bounded_map(pool: ProcessPoolExecutor, chunks: Iterable[List[State]], win_rooms: Set[str],
+                 window: int) -> Iterator[List[Expansion]]:
+    """Ordered pool map that keeps at most ``window`` chunks in flight (bounded memory)."""
+    pending: Deque = deque()
+    for c in chunks:
+        pending.append(pool.submit(_expand_chunk, c, win_rooms))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# -----------------------------
+# Bounded-memory storage
+# -----------------------------
+
+class StateStore:
+    """Visited set with parent pointers; spills to SQLite past ``mem_limit`` entries."""
+
+    def __init__(self, mem_limit: int, path: Optional[str] = None):
+        self.mem_limit = mem_limit
+        self._mem: Dict[Key, Tuple[Optional[Key], str]] = {}
+        self._path = path
+        self._own_path = path is None  # temp file we created (and delete on close)
+        self._db: Optional[sqlite3.Connection] = None
+        self._spilled = 0
+
+    def _open_db(self) -> sqlite3.Connection:
+        if self._db is None:
+            if self._path is None:
+                fd, self._path = tempfile.mkstemp(prefix="sorque-explore-", suffix=".db")
+                os.close(fd)
+            self._db = sqlite3.connect(self._path)
+            self._db.execute("PRAGMA journal_mode=OFF")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute("CREATE TABLE IF NOT EXISTS seen (k BLOB PRIMARY KEY, parent BLOB, action TEXT) WITHOUT ROWID")
+        return self._db
+
+    def __len__(self) -> int:
+        return len(self._mem) + self._spilled
+
+    def add_new(self, entries: List[Tuple[Key, Optional[Key], str]]) -> List[bool]:
+        """Insert unseen keys; return which entries were new (first wins within a batch)."""
+        mem = self._mem
+        fresh: Dict[Key, int] = {}
+        for n, (k, _, _) in enumerate(entries):
+            if k not in mem and k not in fresh:
+                fresh[k] = n
+        if self._spilled and fresh:
+            db = self._open_db()
+            ks = list(fresh)
+            for i in range(0, len(ks), 500):
+                part = ks[i:i + 500]
+                q = "SELECT k FROM seen WHERE k IN (%s)" % ",".join("?" * len(part))
+                for (k,) in db.execute(q, part):
+                    fresh.pop(k, None)
+        new = [False] * len(entries)
+        for k, n in fresh.items():
+            new[n] = True
+            mem[k] = entries[n][1:]
+        if len(mem) > self.mem_limit:
+            self._spill()
+        return new
+
+    def _spill(self) -> None:
+        db = self._open_db()
+        with db:
+            db.executemany("INSERT OR IGNORE INTO seen VALUES (?, ?, ?)",
+                           ((k, p, a) for k, (p, a) in self._mem.items()))
+        self._spilled += len(self._mem)
+        self._mem.clear()
+
+    def parent(self, key: Key) -> Optional[Tuple[Optional[Key], str]]:
+        hit = self._mem.get(key)
+        if hit is not None or self._db is None:
+            return hit
+        row = self._db.execute("SELECT parent, action FROM seen WHERE k = ?", (key,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def path_to(self, key: Optional[Key]) -> List[str]:
+        path: List[str] = []
+        while key is not None:
+            hit = self.parent(key)
+            if hit is None or hit[0] is None:
+                break
+            key, action = hit
+            path.append(action)
+        path.reverse()
+        return path
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            if self._own_path and self._path and os.path.exists(self._path):
+                os.remove(self._path)
+
+
+class Frontier:
+    """One BFS level; buffered in memory and spilled to a temp file past ``mem_limit`` states."""
+
+    def __init__(self, mem_limit: int):
+        self.mem_limit = mem_limit
+        self._buf: List[State] = []
+        self._file = None
+        self.size = 0
+
+    def append(self, s: State) -> None:
+        self._buf.append(s)
+        self.size += 1
+        if len(self._buf) >= self.mem_limit:
+            if self._file is None:
+                self._file = tempfile.TemporaryFile(prefix="sorque-frontier-")
+            pickle.dump(self._buf, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+            self._buf = []
+
+    def chunks(self, size: int) -> Iterator[List[State]]:
+        def _all() -> Iterator[List[State]]:
+            if self._file is not None:
+                self._file.seek(0)
+                while True:
+                    try:
+                        yield pickle.load(self._file)
+                    except EOFError:
+                        break
+                self._file.close()
+                self._file = None
+            yield self._buf
+        for block in _all():
+            for i in range(0, len(block), size):
+                yield block[i:i + size]
+
+
+# -----------------------------
+# Search
+# -----------------------------
+
+def explore(world_path: str, win_rooms: Optional[Set[str]] = None, workers: int = 1,
+            mem_states: int = 2_000_000, max_states: Optional[int] = None,
+            chunk_size: int = 2000, spill_path: Optional[str] = None) -> Dict[str, object]:
+    """Breadth-first search of the world's state space; returns a report dict."""
+    win_rooms = set(win_rooms or ())
+    game = new_game_from_path(world_path)
+    start = get_state(game)
+    store = StateStore(mem_states, spill_path)
+    store.add_new([(state_key(start), None, "")])
+
+    rooms_seen: Set[str] = {start[0]}
+    shown: Set[Tuple[str, str]] = set()
+    deaths: Dict[Tuple[str, str, str], Dict[str, object]] = {}  # (cause, room, action) -> info
+    win_path: Optional[List[str]] = None
+    expanded = depth = 0
+    truncated = False
+
+    frontier = Frontier(mem_states)
+    frontier.append(start)
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(world_path,)) if workers > 1 else None
+    t0 = time.perf_counter()
+    try:
+        while frontier.size and not truncated:
+            nxt = Frontier(mem_states)
+            chunks = frontier.chunks(chunk_size)
+            if pool is not None:
+                results: Iterable[List[Expansion]] = _bounded_map(pool, chunks, win_rooms, 2 * workers)
+            else:
+                results = (_expand_chunk(c, win_rooms, game) for c in chunks)
+
+            for batch in results:
+                entries: List[Tuple[Key, Optional[Key], str]] = []
+                children: List[State] = []
+                for ex in batch:
+                    expanded += 1
+                    rid = ex.parent[0]
+                    pkey = state_key(ex.parent)
+                    shown.update((rid, iid) for iid in ex.shown)
+                    for action, cause in ex.deaths:
+                        info = deaths.get((cause, rid, action))
+                        if info is None:
+                            deaths[(cause, rid, action)] = {"cause": cause, "room": rid, "action": action, "count": 1,
+                                                            "path": store.path_to(pkey) + [action]}
+                        else:
+                            info["count"] += 1  # type: ignore[operator]
+                    if ex.wins and win_path is None:
+                        win_path = store.path_to(pkey) + [ex.wins[0][0]]
+                    rooms_seen.update(room for _, room in ex.wins)
+                    for action, child in ex.children:
+                        entries.append((state_key(child), pkey, action))
+                        children.append(child)
+                for is_new, child in zip(store.add_new(entries), children):
+                    if is_new:
+                        rooms_seen.add(child[0])
+                        nxt.append(child)
+                if max_states is not None and len(store) >= max_states:
+                    truncated = True
+                    break
+            frontier = nxt
+            depth += 1
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    elapsed = time.perf_counter() - t0
+
+    # win rooms are terminal, so their own interactions are never expected to show
+    all_pairs = {(rid, it.id) for rid, room in game.rooms.items() if rid not in win_rooms for it in room.interactions}
+    globals_shown = {iid for _, iid in shown}
+    never_shown = sorted(f"{rid}:{iid}" for rid, iid in all_pairs - shown)
+    never_shown += sorted(f"*:{it.id}" for it in game.global_interactions if it.id not in globals_shown)
+    report = {
+        "world": world_path,
+        "states": len(store),
+        "expanded": expanded,
+        "depth": depth,
+        "truncated": truncated,
+        "elapsed_s": round(elapsed, 3),
+        "states_per_sec": round(expanded / elapsed, 1) if elapsed else None,
+        "rooms_reachable": sorted(rooms_seen),
+        "rooms_unreachable": sorted(set(game.rooms) - rooms_seen),
+        "interactions_unreachable": never_shown,
+        "deaths": sorted(deaths.values(), key=lambda d: (len(d["path"]), d["cause"], d["room"])),  # type: ignore[arg-type]
+        "shortest_win": win_path,
+    }
+    store.close()
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Enumerate every reachable state of a Sorque world.")
+    ap.add_argument("world", help="path to world JSON")
+    ap.add_argument("--win-room", action="append", default=[], help="room id that counts as a win (repeatable)")
+    ap.add_argument("--workers", type=int, default=1, help="processes for frontier expansion")
+    ap.add_argument("--mem-states", type=int, default=2_000_000, help="visited entries kept in RAM before spilling")
+    ap.add_argument("--max-states", type=int, default=None, help="stop after this many distinct states")
+    ap.add_argument("--spill", default=None, help="SQLite file for the spilled visited set (default: temp file)")
+    ap.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = ap.parse_args(argv)
+
+    r = explore(args.world, set(args.win_room), workers=args.workers, mem_states=args.mem_states,
+                max_states=args.max_states, spill_path=args.spill)
+    if args.json:
+        json.dump(r, sys.stdout, indent=2)
+        print()
+        return 0
+    print(f"states {r['states']}  expanded {r['expanded']}  depth {r['depth']}"
+          f"  {r['elapsed_s']}s{'  (TRUNCATED)' if r['truncated'] else ''}")
+    print(f"rooms reachable   {', '.join(r['rooms_reachable'])}")  # type: ignore[arg-type]
+    print(f"rooms unreachable {', '.join(r['rooms_unreachable']) or '-'}")  # type: ignore[arg-type]
+    print(f"interactions never shown: {len(r['interactions_unreachable'])}")  # type: ignore[arg-type]
+    for x in r["interactions_unreachable"]:  # type: ignore[union-attr]
+        print(f"  {x}")
+    print(f"death transitions: {len(r['deaths'])}")  # type: ignore[arg-type]
+    for d in r["deaths"]:  # type: ignore[union-attr]
+        print(f"  [{d['cause']}] room {d['room']} via {d['action']} x{d['count']}  shortest: {' > '.join(d['path'])}")
+    win = r["shortest_win"]
+    print("shortest win: " + (f"{len(win)} actions: {' > '.join(win)}" if win else "none found"))  # type: ignore[arg-type]
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,279 @@
+# src/backend/lazy.py
+"""Lazy world loading: index room byte offsets in one pass, parse rooms on demand.
+
+``scan_world`` walks the world file's raw bytes once and decodes nothing but
+the top-level members other than ``rooms`` (they are small): each room is
+only skipped over, with a string- and escape-aware byte scanner, and recorded
+as a byte span. ``LazyRooms`` is a read-only ``Mapping`` that decodes, parses
+and builds a Room the first time it is looked up, so resident memory scales
+with the rooms a player actually visits.
+
+The index (spans, top-level members and the file's SHA-256) is saved next to
+the source as ``<world>.json.lazyidx``, keyed by the file's size and mtime;
+while those match, opening the world reads the index instead of scanning or
+hashing the file, so cold start no longer grows with the world's size.
+The loader validates a world (``backend.validate``) when its index is built,
+from the raw room JSON, so only validated worlds are indexed.
+
+Rooms are keyed by their key in the ``rooms`` object (authored worlds keep that
+equal to the room's ``id``).
+"""
+from __future__ import annotations
+import json
+import marshal
+import mmap
+import os
+import re
+import tempfile
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from . import world_cache
+from .oo import Room
+
+INDEX_SUFFIX = ".lazyidx"
+INDEX_VERSION = 2  # 2: only validated worlds are indexed
+
+# -----------------------------
+# Byte scanner
+# -----------------------------
+
+_WS = rb"[ \t\n\r]*"
+_STRING = rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+_PLAIN = rb'[^"\[\]{}]*+'  # anything but strings and brackets
+_NEST_DEPTH = 16  # deeper values fall back to _skip_deep
+
+
+def _nested(depth: int) -> bytes:
+    """A regex for an object/array nested at most ``depth`` levels deep. It
+    only balances brackets outside strings; the JSON is parsed on access."""
+    pat = rb"[\[{]" + _PLAIN + rb"(?:" + _STRING + _PLAIN + rb")*+[\]}]"
+    for _ in range(depth - 1):
+        pat = rb"[\[{]" + _PLAIN + rb"(?:(?:" + _STRING + rb"|" + pat + rb")" + _PLAIN + rb")*+[\]}]"
+    return pat
+
+
+_OPEN = re.compile(_WS + rb"\{" + _WS)
+_KEY = re.compile(rb"(" + _STRING + rb")" + _WS + rb":" + _WS, re.S)
+_VALUE = re.compile(_STRING + rb"|" + _nested(_NEST_DEPTH) + rb"|[^\s,\[\]{}\"]++", re.S)
+_SEP = re.compile(_WS + rb"([,}])" + _WS)
+_STRING_RE = re.compile(_STRING, re.S)
+
+
+def _skip_deep(data, i: int) -> int:
+    """Index just past the object/array starting at ``data[i]``, one byte at a time."""
+    depth = 0
+    n = len(data)
+    while i < n:
+        c = data[i]
+        if c == 0x22:  # '"'
+            m = _STRING_RE.match(data, i)
+            if m is None:
+                break
+            i = m.end()
+            continue
+        if c in b"[{":
+            depth += 1
+        elif c in b"]}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise ValueError(f"unterminated value at byte {i}")
+
+
+def _skip(data, i: int) -> int:
+    """Index just past the JSON value starting at ``data[i]``."""
+    m = _VALUE.match(data, i)
+    if m is not None:
+        return m.end()
+    if data[i:i + 1] in (b"{", b"["):
+        return _skip_deep(data, i)
+    raise ValueError(f"expected a value at byte {i}")
+
+
+def _members(data, i: int, value: Callable[[str, int], int]) -> int:
+    """Walk the object starting at data[i]; ``value(key, start)`` must skip each
+    member's value and return the index just past it. Returns the index past '}'.
+    """
+    m = _OPEN.match(data, i)
+    if m is None:
+        raise ValueError(f"expected an object at byte {i}")
+    i = m.end()
+    if data[i:i + 1] == b"}":
+        return i + 1
+    while True:
+        m = _KEY.match(data, i)
+        if m is None:
+            raise ValueError(f"expected a key at byte {i}")
+        raw = m.group(1)
+        key = raw[1:-1].decode("utf-8") if b"\\" not in raw else json.loads(raw)
+        end = value(key, m.end())
+        m = _SEP.match(data, end)
+        if m is None:
+            raise ValueError(f"expected ',' or '}}' at byte {end}")
+        i = m.end()
+        if m.group(1) == b"}":
+            return i
+
+
+def scan_world(data) -> Tuple[Dict[str, Any], Dict[str, int], array]:
+    """One pass over a world JSON file's bytes (any buffer, e.g. an mmap).
+
+    Returns ``(world, room_slot, spans)``: ``world`` has every top-level member
+    except ``rooms``; ``room_slot`` maps room key -> slot n, whose byte span
+    is ``spans[2n]:spans[2n + 1]``. Rooms are skipped over without decoding,
+    so nothing proportional to the file is allocated.
+    """
+    world: Dict[str, Any] = {}
+    slots: Dict[str, int] = {}
+    spans = array("q")
+
+    def room(rid: str, start: int) -> int:
+        end = _skip(data, start)
+        slots[rid] = len(slots)
+        spans.append(start)
+        spans.append(end)
+        return end
+
+    def top(key: str, start: int) -> int:
+        if key == "rooms":
+            return _members(data, start, room)
+        end = _skip(data, start)
+        world[key] = json.loads(data[start:end])
+        return end
+
+    _members(data, 0, top)
+    return world, slots, spans
+
+
+# -----------------------------
+# Index file
+# -----------------------------
+
+Index = Tuple[Dict[str, Any], Dict[str, int], array, str]  # (world, room_slot, spans, sha256 hex)
+
+
+def index_path(json_path: str) -> str:
+    return json_path + INDEX_SUFFIX
+
+
+def load_index(json_path: str, st: os.stat_result) -> Optional[Index]:
+    """The saved index, if it was written for a file of this size and mtime."""
+    try:
+        with open(index_path(json_path), "rb") as f:
+            version, size, mtime_ns, digest, world, keys, spans_b = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if (version, size, mtime_ns) != (INDEX_VERSION, st.st_size, st.st_mtime_ns):
+        return None
+    spans = array("q")
+    spans.frombytes(spans_b)
+    return world, {k: n for n, k in enumerate(keys)}, spans, digest
+
+
+def save_index(json_path: str, st: os.stat_result, index: Index) -> Optional[str]:
+    """Write the index atomically. Returns its path, or None if it couldn't be written."""
+    world, slots, spans, digest = index
+    dest = index_path(json_path)
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            marshal.dump((INDEX_VERSION, st.st_size, st.st_mtime_ns, digest, world, list(slots),
+                          spans.tobytes()), f)
+        os.replace(tmp, dest)
+    except (OSError, ValueError):  # read-only checkout, or a member marshal can't store
+        return None
+    return dest
+
+
+class _RawRooms(Mapping):
+    """``Dict[str, room JSON]`` view of a LazyRooms; parses a room per lookup."""
+
+    def __init__(self, rooms: "LazyRooms"):
+        self._rooms = rooms
+
+    def __getitem__(self, rid: str) -> Dict[str, Any]:
+        return self._rooms.raw(rid)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._rooms)
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+
+class LazyRooms(Mapping):
+    """Read-only ``Dict[str, Room]`` that materializes rooms on first access.
+
+    ``build(room_key, room_json) -> Room`` is supplied by the loader and must
+    return a compiled, indexed Room. With ``use_index`` the byte-offset index
+    is read from / written to ``<path>.lazyidx`` (see the module docstring).
+    ``check(lazy_rooms)``, if given, runs whenever the file had to be scanned
+    (before the index is saved) and may raise to reject the world.
+    """
+
+    def __init__(self, path: str, build: Callable[[str, Dict[str, Any]], Room], use_index: bool = True,
+                 check: Optional[Callable[["LazyRooms"], Any]] = None):
+        self._file = open(path, "rb")
+        st = os.fstat(self._file.fileno())
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._build = build
+        self._rooms: Dict[str, Room] = {}
+        self._lock = threading.Lock()
+        index = load_index(path, st) if use_index else None
+        if index is not None:
+            self.world, self._slots, self._spans, self.source_hash = index
+            return
+        try:
+            self.world, self._slots, self._spans = scan_world(self._buf)
+            if check is not None:
+                check(self)
+        except Exception:
+            self.close()
+            raise
+        self.source_hash = world_cache.file_hash(path).hex()
+        if use_index:
+            save_index(path, st, (self.world, self._slots, self._spans, self.source_hash))
+
+    def raw(self, rid: str) -> Dict[str, Any]:
+        """Parse (without building) one room's JSON."""
+        n = self._slots[rid]
+        return json.loads(self._buf[self._spans[2 * n]:self._spans[2 * n + 1]])
+
+    @property
+    def raw_rooms(self) -> Mapping:
+        """Every room's JSON as a mapping, parsed on each lookup (for validation)."""
+        return _RawRooms(self)
+
+    def __getitem__(self, rid: str) -> Room:
+        room = self._rooms.get(rid)
+        if room is not None:
+            return room
+        if rid not in self._slots:
+            raise KeyError(rid)
+        with self._lock:
+            room = self._rooms.get(rid)
+            if room is None:
+                room = self._rooms[rid] = self._build(rid, self.raw(rid))
+        return room
+
+    def __contains__(self, rid: object) -> bool:
+        return rid in self._slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @property
+    def loaded(self) -> int:
+        """How many rooms have been materialized so far."""
+        return len(self._rooms)
+
+    def close(self) -> None:
+        self._buf.close()
+        self._file.close()
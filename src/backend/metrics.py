@@ -0,0 +1,347 @@
+# src/backend/metrics.py
+"""Optional engine instrumentation: timing histograms, counters, slowest calls.
+
+Off by default and free when off: nothing in ``backend.oo`` checks for it.
+``enable()`` swaps ``Game.look/move/do/compass/visible_interactions`` and
+``Room.render_desc`` for timed wrappers (``disable()`` puts the plain methods
+back); world loads report through ``ACTIVE`` from ``load_world``. Every
+observation is tagged with the world name and the room it started in; per
+room only a total time and call count are kept, which is what ``hot_rooms``
+ranks.
+
+    from backend import metrics
+    m = metrics.enable(profile_every=1000)   # cProfile one call in 1000
+    ...play...
+    print(m.to_prometheus())                 # or m.write_json("metrics.json")
+    for s in m.slowest(5): print(s.ms, s.op, s.room, s.arg)
+
+Engine calls that aren't a player's -- prefetch forks, ``backend.sim`` games --
+run inside ``untracked()`` and are not recorded. ``deaths`` counts the ``do``
+calls that killed a living player.
+
+Callers with their own timings (the app's reruns, the story panel) feed them
+in with ``observe``; they show up under their own ``op`` names. Histogram
+series are labelled by op and world only: a room label multiplies them by
+the room count (one histogram per op per room), so ``per_room=True`` is for
+small authored worlds, never the 10k+ room synthetic ones.
+"""
+from __future__ import annotations
+import bisect
+import cProfile
+import functools
+import heapq
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .oo import Game, Room
+
+# Histogram bucket upper bounds, seconds (Prometheus ``le``); +Inf is implicit
+BUCKETS_S: Tuple[float, ...] = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                                1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Engine calls wrapped by ``enable``: (class, method)
+TARGETS: Tuple[Tuple[type, str], ...] = (
+    (Game, "look"), (Game, "move"), (Game, "do"), (Game, "compass"), (Game, "visible_interactions"),
+    (Room, "render_desc"),
+)
+
+# Key of one series: (op, world, room)
+Series = Tuple[str, str, str]
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "n", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_S) + 1)
+        self.total = 0.0
+        self.n = 0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS_S, seconds)] += 1
+        self.total += seconds
+        self.n += 1
+        if seconds > self.max:
+            self.max = seconds
+
+
+class SlowAction(NamedTuple):
+    ms: float
+    op: str
+    world: str
+    room: str
+    arg: Any                        # str from ``slowest``; the raw call args until then
+    at: float                       # time.time() when it finished
+    profile: Optional[str] = None   # pstats text, if this call was sampled
+
+
+class Metrics:
+    """Thread-safe registry of timings and counters.
+
+    Args:
+        per_room: also label histograms and counters with the room id
+            (one series per op per room: only for small worlds)
+        keep_slowest: how many of the slowest calls ``slowest`` remembers
+        slow_ms: calls at least this slow are passed to ``on_slow``
+        on_slow: ``on_slow(SlowAction)`` hook (e.g. log it); runs inline
+        profile_every: run every Nth call under cProfile (0: never) and keep
+            the profile if the call makes the slowest list
+    """
+
+    def __init__(self, per_room: bool = False, keep_slowest: int = 50, slow_ms: Optional[float] = None,
+                 on_slow: Optional[Callable[[SlowAction], None]] = None, profile_every: int = 0):
+        self.per_room = per_room
+        self.keep_slowest = keep_slowest
+        self.slow_ms = slow_ms
+        self.on_slow = on_slow
+        self.profile_every = profile_every
+        self._lock = threading.Lock()
+        self._autosave: Optional[threading.Event] = None
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist: Dict[Series, Histogram] = {}
+            self._counters: Dict[Series, int] = {}
+            self._rooms: Dict[Tuple[str, str], List[float]] = {}  # (world, room) -> [seconds, calls]
+            self._slowest: List[Tuple[float, int, SlowAction]] = []  # min-heap
+            self._seq = 0
+            self._calls = 0
+            self._profiling = False
+
+    # ---------- recording ----------
+    def observe(self, op: str, seconds: float, world: str = "", room: str = "", arg: Any = "",
+                profile: Optional[cProfile.Profile] = None) -> None:
+        """Record one timing of ``op``."""
+        key = (op, world, room if self.per_room else "")
+        slow = None
+        with self._lock:
+            h = self._hist.get(key)
+            if h is None:
+                h = self._hist[key] = Histogram()
+            h.add(seconds)
+            if room and op in _ENGINE_OPS:
+                t = self._rooms.get((world, room))
+                if t is None:
+                    t = self._rooms[(world, room)] = [0.0, 0]
+                t[0] += seconds
+                t[1] += 1
+            keep = len(self._slowest) < self.keep_slowest or seconds > self._slowest[0][0]
+            over = self.slow_ms is not None and seconds * 1e3 >= self.slow_ms
+            if keep or over:
+                self._seq += 1
+                slow = SlowAction(round(seconds * 1e3, 4), op, world, room, arg, time.time(),
+                                  _profile_text(profile) if profile is not None and keep else None)
+                if keep:
+                    entry = (seconds, self._seq, slow)
+                    if len(self._slowest) < self.keep_slowest:
+                        heapq.heappush(self._slowest, entry)
+                    else:
+                        heapq.heapreplace(self._slowest, entry)
+        if over and self.on_slow is not None:
+            self.on_slow(slow._replace(arg=_arg_text(slow.arg)))
+
+    def count(self, name: str, world: str = "", room: str = "", n: int = 1) -> None:
+        key = (name, world, room if self.per_room else "")
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def call(self, op: str, world: str, room: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """``fn(*args)``, timed as ``op`` (and profiled if its turn is up)."""
+        prof = None
+        if self.profile_every:
+            with self._lock:
+                self._calls += 1
+                if self._calls % self.profile_every == 0 and not self._profiling:
+                    self._profiling = True  # cProfile can't nest: one at a time
+                    prof = cProfile.Profile()
+        if prof is not None:
+            prof.enable()
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            dt = time.perf_counter() - t0
+            if prof is not None:
+                prof.disable()
+                self._profiling = False
+            self.observe(op, dt, world, room, args[1:], prof)  # formatted only if read
+
+    # ---------- reading ----------
+    def slowest(self, n: Optional[int] = None) -> List[SlowAction]:
+        """The slowest recorded calls, slowest first."""
+        with self._lock:
+            out = [s for _, _, s in sorted(self._slowest, reverse=True)]
+        return [s._replace(arg=_arg_text(s.arg)) for s in (out[:n] if n is not None else out)]
+
+    def hot_rooms(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Rooms by total engine time (every op but world loads), hottest first."""
+        with self._lock:
+            ranked = heapq.nlargest(n, self._rooms.items(), key=lambda kv: kv[1][0])
+            return [{"world": w, "room": r, "seconds": round(s, 6), "calls": int(c)} for (w, r), (s, c) in ranked]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything as plain JSON-able data."""
+        with self._lock:
+            hists = [{"op": op, "world": world, "room": room, "count": h.n, "sum_s": round(h.total, 9),
+                      "max_s": round(h.max, 9), "buckets": list(h.counts)}
+                     for (op, world, room), h in sorted(self._hist.items())]
+            counters = [{"name": name, "world": world, "room": room, "value": v}
+                        for (name, world, room), v in sorted(self._counters.items())]
+        return {
+            "generated_at": time.time(),
+            "buckets_s": list(BUCKETS_S),
+            "histograms": hists,
+            "counters": counters,
+            "slowest": [s._asdict() for s in self.slowest()],
+            "hot_rooms": self.hot_rooms(),
+        }
+
+    def write_json(self, path: os.PathLike | str) -> None:
+        """Write ``snapshot()`` to ``path`` (atomically)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def to_prometheus(self, prefix: str = "sorque") -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            hists = sorted(self._hist.items())
+            counters = sorted(self._counters.items())
+        lines = [f"# HELP {prefix}_op_seconds Time spent per call.", f"# TYPE {prefix}_op_seconds histogram"]
+        for (op, world, room), h in hists:
+            labels = f'op="{_esc(op)}",world="{_esc(world)}",room="{_esc(room)}"'
+            cum = 0
+            for le, c in zip(BUCKETS_S, h.counts):
+                cum += c
+                lines.append(f'{prefix}_op_seconds_bucket{{{labels},le="{le:g}"}} {cum}')
+            lines.append(f'{prefix}_op_seconds_bucket{{{labels},le="+Inf"}} {h.n}')
+            lines.append(f"{prefix}_op_seconds_sum{{{labels}}} {h.total:.9g}")
+            lines.append(f"{prefix}_op_seconds_count{{{labels}}} {h.n}")
+        if counters:
+            lines += [f"# HELP {prefix}_events_total Counted engine events.", f"# TYPE {prefix}_events_total counter"]
+            for (name, world, room), v in counters:
+                lines.append(f'{prefix}_events_total{{name="{_esc(name)}",world="{_esc(world)}",'
+                             f'room="{_esc(room)}"}} {v}')
+        return "\n".join(lines) + "\n"
+
+    # ---------- periodic export ----------
+    def start_autosave(self, path: os.PathLike | str, every_s: float = 10.0) -> None:
+        """Rewrite ``path`` with ``write_json`` every ``every_s`` seconds on a daemon thread."""
+        self.stop_autosave()
+        stop = self._autosave = threading.Event()
+
+        def loop() -> None:
+            while not stop.wait(every_s):
+                try:
+                    self.write_json(path)
+                except OSError:
+                    pass
+        threading.Thread(target=loop, name="metrics-autosave", daemon=True).start()
+
+    def stop_autosave(self) -> None:
+        if self._autosave is not None:
+            self._autosave.set()
+            self._autosave = None
+
+
+_ENGINE_OPS = frozenset(name for _, name in TARGETS)
+
+
+def _arg_text(arg: Any) -> str:
+    return " ".join(map(str, arg)) if isinstance(arg, tuple) else str(arg)
+
+
+def _esc(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _profile_text(prof: cProfile.Profile, limit: int = 15) -> str:
+    out = io.StringIO()
+    pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+# -----------------------------
+# Switching instrumentation on/off
+# -----------------------------
+
+ACTIVE: Optional[Metrics] = None   # the enabled registry, if any
+_ORIGINALS: Dict[Tuple[type, str], Callable[..., Any]] = {}
+
+
+class _Local(threading.local):
+    untracked = False
+
+
+_LOCAL = _Local()
+
+
+@contextmanager
+def untracked() -> Iterator[None]:
+    """Engine calls made by this thread inside the block are not recorded."""
+    prev = _LOCAL.untracked
+    _LOCAL.untracked = True
+    try:
+        yield
+    finally:
+        _LOCAL.untracked = prev
+
+
+def _timed_game(fn: Callable[..., Any], op: str, m: Metrics) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    def wrapper(self: Game, *args: Any) -> Any:
+        if _LOCAL.untracked:
+            return fn(self, *args)
+        was_dead = self.state.dead
+        result = m.call(op, self.world.name, self.state.current_room_id, fn, self, *args)
+        if op == "do" and self.state.dead and not was_dead:
+            m.count("deaths", self.world.name, self.state.current_room_id)
+        return result
+    return wrapper
+
+
+def _timed_room(fn: Callable[..., Any], m: Metrics) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    def wrapper(self: Room, game: Game, long: bool) -> str:
+        if _LOCAL.untracked:
+            return fn(self, game, long)
+        return m.call("render_desc", game.world.name, self.id, fn, self, game, long)
+    return wrapper
+
+
+def enable(metrics: Optional[Metrics] = None, **kwargs: Any) -> Metrics:
+    """Start timing engine calls into ``metrics`` (default: ``Metrics(**kwargs)``)."""
+    global ACTIVE
+    disable()
+    m = metrics if metrics is not None else Metrics(**kwargs)
+    for cls, name in TARGETS:
+        fn = cls.__dict__[name]
+        _ORIGINALS[(cls, name)] = fn
+        setattr(cls, name, _timed_room(fn, m) if cls is Room else _timed_game(fn, name, m))
+    ACTIVE = m
+    return m
+
+
+def disable() -> None:
+    """Put the plain engine methods back."""
+    global ACTIVE
+    for (cls, name), fn in _ORIGINALS.items():
+        setattr(cls, name, fn)
+    _ORIGINALS.clear()
+    ACTIVE = None
+
+
+def observe(op: str, seconds: float, world: str = "", room: str = "", arg: Any = "") -> None:
+    """Record into ``ACTIVE`` if instrumentation is on (a no-op otherwise)."""
+    m = ACTIVE
+    if m is not None:
+        m.observe(op, seconds, world, room, arg)
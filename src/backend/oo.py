@@ -1,13 +1,144 @@
 # src/backend/oo.py
 from __future__ import annotations
+import sys
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set, Tuple, Any
+from types import MappingProxyType
+from typing import Callable, Container, Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple, Any
+
+from .symbols import Symbols, BitSet
 
 # -----------------------------
 # Core data structures
 # -----------------------------
 
-@dataclass
+# Stable UI order for exits (unknown directions sort last, in authored order)
+COMPASS_ORDER: Dict[str, int] = {k: i for i, k in enumerate([
+    "north", "northeast", "east", "southeast",
+    "south", "southwest", "west", "northwest",
+    "up", "down", "in", "out"
+])}
+
+DEFAULT_LOCKED_TEXT = "It's stuck. You'll need something to pry it open."
+
+# Max resolved-description entries kept per room before the memo is reset
+DESC_CACHE_LIMIT = 256
+
+# Default depth of a History (undo) stack
+UNDO_LIMIT = 100
+
+# Event kinds passed to Game.on_event (see adapters/events.py)
+EV_LOOK, EV_MOVE, EV_DO, EV_DEATH, EV_RESTART, EV_UNDO = "look", "move", "do", "death", "restart", "undo"
+
+# on_event(kind, loc_id, payload): loc_id is the room the action started in
+EventHook = Callable[[str, str, Dict[str, Any]], None]
+
+# Shared empties: most gates and many collections are empty, so every object
+# points at one singleton instead of owning an empty set/list/dict.
+EMPTY_NAMES: FrozenSet[str] = frozenset()
+EMPTY_EXITS: Mapping[str, "Exit"] = MappingProxyType({})
+
+GATE_FIELDS = ("visible_if_flags", "visible_if_not_flags", "visible_if_items", "visible_if_not_items")
+
+# World objects are frozen; compile steps and normalization write through this
+_set = object.__setattr__
+
+
+# Distinct name sets seen so far; gates repeat the same few sets a lot
+_NAME_SETS: Dict[FrozenSet[str], FrozenSet[str]] = {}
+
+
+def names(values: Optional[Iterable[str]]) -> FrozenSet[str]:
+    """Interned frozenset of interned flag/item names; equal sets are shared
+    (the empty one is EMPTY_NAMES)."""
+    if not values:
+        return EMPTY_NAMES
+    fs = frozenset(map(sys.intern, values))
+    return _NAME_SETS.setdefault(fs, fs) if fs else EMPTY_NAMES
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value else value
+
+
+def _freeze_gates(obj: Any) -> None:
+    # frozensets are taken as-is (names() already interned them)
+    for name in GATE_FIELDS:
+        value = getattr(obj, name)
+        if type(value) is not frozenset:
+            _set(obj, name, names(value))
+
+# -----------------------------
+# Effect opcodes
+# -----------------------------
+
+OP_ADD_FLAG, OP_REMOVE_FLAG, OP_ADD_ITEM, OP_REMOVE_ITEM, OP_SET_ROOM, OP_KILL = range(6)
+
+# Action keys in the order they apply when one effect dict carries several
+EFFECT_OPS: Dict[str, int] = {
+    "add_flag": OP_ADD_FLAG,
+    "remove_flag": OP_REMOVE_FLAG,
+    "add_item": OP_ADD_ITEM,
+    "remove_item": OP_REMOVE_ITEM,
+    "set_room": OP_SET_ROOM,
+    "kill_player": OP_KILL,
+}
+# Sibling keys that only make sense next to kill_player
+KILL_KEYS = frozenset({"cause", "message", "msg"})
+
+Op = Tuple[int, Any]
+
+
+def compile_effects(effects: Optional[List[Dict[str, Any]]], room_ids: Optional[Container[str]] = None) -> Tuple[Op, ...]:
+    """Validate authored effect dicts and flatten them into (opcode, arg) pairs.
+
+    Flag/item args are names, set_room args are room ids, and kill_player
+    payloads (bool/str/dict, cause/message/msg/text) are normalized to a
+    ``(cause, message)`` pair. Raises ValueError for unknown keys, malformed
+    values, or ``set_room`` targets missing from ``room_ids`` (when given).
+    """
+    ops: List[Op] = []
+    for n, eff in enumerate(effects or []):
+        if not isinstance(eff, dict):
+            raise ValueError(f"effect #{n} must be an object, got {type(eff).__name__}")
+        unknown = set(eff) - EFFECT_OPS.keys() - KILL_KEYS
+        if unknown:
+            raise ValueError(f"effect #{n} has unknown key(s): {', '.join(sorted(unknown))}")
+        if "kill_player" not in eff and KILL_KEYS & eff.keys():
+            raise ValueError(f"effect #{n}: {', '.join(sorted(KILL_KEYS & eff.keys()))} only valid with kill_player")
+
+        for key, op in EFFECT_OPS.items():
+            if key not in eff:
+                continue
+            val = eff[key]
+            if op == OP_SET_ROOM:
+                val = str(val)
+                if room_ids is not None and val not in room_ids:
+                    raise ValueError(f"effect #{n}: set_room target '{val}' not in rooms")
+                ops.append((op, val))
+            elif op == OP_KILL:
+                # base values from sibling fields
+                cause = eff.get("cause") or "generic"
+                msg = eff.get("message") or eff.get("msg")
+                # Normalize payload forms
+                if isinstance(val, bool):
+                    if not val:
+                        continue  # explicit false → no-op
+                elif isinstance(val, str):
+                    cause = val or cause  # treat value as a cause shorthand
+                elif isinstance(val, dict):
+                    cause = val.get("cause") or cause
+                    msg = msg or val.get("message") or val.get("msg") or val.get("text")
+                else:
+                    raise ValueError(f"effect #{n}: kill_player must be bool, str or object")
+                ops.append((op, (str(cause), msg or None)))
+            else:
+                if not isinstance(val, str) or not val:
+                    raise ValueError(f"effect #{n}: {key} needs a non-empty string")
+                ops.append((op, val))
+    return tuple(ops)
+
+@dataclass(frozen=True, slots=True)
 class Exit:
     """A directional exit from a room.
 
@@ -18,6 +149,8 @@ class Exit:
         locked_by_flag: optional flag name that must be present to pass
         locked_text: message if locked (default falls back to a generic one)
         label: optional UI label (defaults to title-cased direction)
+
+    Frozen; ids and names are interned on construction.
     """
     direction: str
     to_room: str
@@ -25,19 +158,38 @@ class Exit:
     locked_by_flag: Optional[str] = None
     locked_text: Optional[str] = None
     label: Optional[str] = None
+    # compiled gate bits (see compile_world)
+    _need_items: int = field(default=0, init=False, repr=False, compare=False)
+    _need_flags: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        _set(self, "direction", sys.intern(self.direction))
+        _set(self, "to_room", sys.intern(self.to_room))
+        _set(self, "locked_by_item", _intern(self.locked_by_item))
+        _set(self, "locked_by_flag", _intern(self.locked_by_flag))
+
+    def compile(self, symbols: Symbols) -> None:
+        _set(self, "_need_items", symbols.bit(self.locked_by_item) if self.locked_by_item else 0)
+        _set(self, "_need_flags", symbols.bit(self.locked_by_flag) if self.locked_by_flag else 0)
 
     def is_locked(self, inventory: Set[str], flags: Set[str]) -> bool:
+        if type(inventory) is BitSet and type(flags) is BitSet:
+            return self.is_locked_mask(inventory.mask, flags.mask)
         if self.locked_by_item and self.locked_by_item not in inventory:
             return True
         if self.locked_by_flag and self.locked_by_flag not in flags:
             return True
         return False
 
+    def is_locked_mask(self, items_mask: int, flags_mask: int) -> bool:
+        return (items_mask & self._need_items) != self._need_items \
+            or (flags_mask & self._need_flags) != self._need_flags
+
     def display_label(self) -> str:
         return self.label or self.direction.title()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Interaction:
     """An authored interaction available in a room.
 
@@ -59,36 +211,72 @@ class Interaction:
            {"add_item": str}
            {"remove_item": str}
            {"set_room": str}
-           {"kill_player": True, "message": Optional[str]}
+           {"kill_player": True, "cause": Optional[str], "message": Optional[str]}
+        Effects are compiled once into ``ops`` (see compile_effects); anything
+        else is rejected at load time. Loaders pass ``ops`` only and leave
+        ``effects`` empty, so the authored dicts are not kept in memory.
       - sort: optional int to control ordering in UI
+
+    Frozen: gate fields are interned frozensets, ``effects`` is a tuple.
     """
     id: str
     label: str
     text: Optional[str] = None
     once: bool = False
-    visible_if_flags: Set[str] = field(default_factory=set)
-    visible_if_not_flags: Set[str] = field(default_factory=set)
-    visible_if_items: Set[str] = field(default_factory=set)
-    visible_if_not_items: Set[str] = field(default_factory=set)
-    effects: List[Dict[str, Any]] = field(default_factory=list)
+    visible_if_flags: FrozenSet[str] = EMPTY_NAMES
+    visible_if_not_flags: FrozenSet[str] = EMPTY_NAMES
+    visible_if_items: FrozenSet[str] = EMPTY_NAMES
+    visible_if_not_items: FrozenSet[str] = EMPTY_NAMES
+    effects: Tuple[Dict[str, Any], ...] = ()
     sort: int = 0
+    ops: Optional[Tuple[Op, ...]] = None  # compiled effects; built from `effects` if omitted
+    # compiled gate masks (see compile_world)
+    _need_flags: int = field(default=0, init=False, repr=False, compare=False)
+    _forbid_flags: int = field(default=0, init=False, repr=False, compare=False)
+    _need_items: int = field(default=0, init=False, repr=False, compare=False)
+    _forbid_items: int = field(default=0, init=False, repr=False, compare=False)
+    _done_bit: int = field(default=0, init=False, repr=False, compare=False)
+    # ops with flag/item names replaced by bitmasks (removals pre-inverted)
+    _code: Tuple[Op, ...] = field(default=(), init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        _set(self, "id", sys.intern(self.id))
+        _freeze_gates(self)
+        if type(self.effects) is not tuple:
+            _set(self, "effects", tuple(self.effects))
+        if self.ops is None:
+            _set(self, "ops", compile_effects(self.effects))
 
     def _done_flag(self) -> str:
         return f"done:{self.id}"
 
-    def is_visible(self, game: "Game") -> bool:
+    def compile(self, symbols: Symbols) -> None:
         # once-only interactions disappear after completion
-        if self.once and self._done_flag() in game.flags:
-            return False
-        if any(f not in game.flags for f in self.visible_if_flags):
-            return False
-        if any(f in game.flags for f in self.visible_if_not_flags):
-            return False
-        if any(i not in game.inventory for i in self.visible_if_items):
-            return False
-        if any(i in game.inventory for i in self.visible_if_not_items):
-            return False
-        return True
+        done_bit = symbols.bit(self._done_flag()) if self.once else 0
+        _set(self, "_done_bit", done_bit)
+        _set(self, "_need_flags", symbols.mask(self.visible_if_flags))
+        forbid = symbols.mask(self.visible_if_not_flags)
+        # done bits can be wide (one per once-interaction); share the int when possible
+        _set(self, "_forbid_flags", forbid | done_bit if forbid else done_bit)
+        _set(self, "_need_items", symbols.mask(self.visible_if_items))
+        _set(self, "_forbid_items", symbols.mask(self.visible_if_not_items))
+        code: List[Op] = []
+        for op, arg in self.ops:
+            if op in (OP_ADD_FLAG, OP_ADD_ITEM):
+                arg = symbols.bit(arg)
+            elif op in (OP_REMOVE_FLAG, OP_REMOVE_ITEM):
+                arg = ~symbols.bit(arg)
+            code.append((op, arg))
+        _set(self, "_code", tuple(code))
+
+    def admits(self, flags_mask: int, items_mask: int) -> bool:
+        return (flags_mask & self._need_flags) == self._need_flags \
+            and not flags_mask & self._forbid_flags \
+            and (items_mask & self._need_items) == self._need_items \
+            and not items_mask & self._forbid_items
+
+    def is_visible(self, game: "Game") -> bool:
+        return self.admits(game.flags.mask, game.inventory.mask)
 
     def perform(self, game: "Game") -> Tuple[str, bool]:
         """Applies effects and returns (message, dead?)."""
@@ -96,202 +284,698 @@ class Interaction:
         if self.text:
             out_lines.append(self.text)
         dead = False
-
-        for eff in self.effects:
-            if "add_flag" in eff:
-                game.flags.add(eff["add_flag"])
-            if "remove_flag" in eff:
-                game.flags.discard(eff["remove_flag"])
-            if "add_item" in eff:
-                game.inventory.add(eff["add_item"])
-            if "remove_item" in eff:
-                game.inventory.discard(eff["remove_item"])
-            if "set_room" in eff:
-                target = eff["set_room"]
-                if target in game.rooms:
-                    game.current_room_id = target
-            # --- unified death handling ---
-            if "kill_player" in eff:
-                payload = eff["kill_player"]
-
-                # base values from sibling fields
-                cause = eff.get("cause") or "generic"
-                msg = eff.get("message") or eff.get("msg")
-
-                # Normalize payload forms
-                if isinstance(payload, bool):
-                    if not payload:
-                        continue  # explicit false → ignore
-                elif isinstance(payload, str):
-                    # treat value as a cause shorthand
-                    cause = payload or cause
-                elif isinstance(payload, dict):
-                    cause = payload.get("cause") or cause
-                    msg = msg or payload.get("message") or payload.get("msg") or payload.get("text")
-
-                # Mark game dead and record metadata
+        st = game.state
+        flags, inv = st.flags, st.inventory
+
+        for op, arg in self._code:
+            if op == OP_ADD_FLAG:
+                flags.mask |= arg
+            elif op == OP_REMOVE_FLAG:
+                flags.mask &= arg
+            elif op == OP_ADD_ITEM:
+                inv.mask |= arg
+            elif op == OP_REMOVE_ITEM:
+                inv.mask &= arg
+            elif op == OP_SET_ROOM:
+                st.current_room_id = arg
+            else:  # OP_KILL — mark game dead and record metadata
+                cause, msg = arg
                 dead = True
-                game.dead = True
-                game.death_cause = cause
+                st.dead = True
+                st.death_cause = cause
                 if msg:
-                    game.death_message = msg
+                    st.death_message = msg
                     out_lines.append(msg)
 
         if self.once:
-            game.flags.add(self._done_flag())
+            flags.mask |= self._done_bit
 
         return ("\n".join(out_lines).strip(), dead)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Room:
+    """A room. Frozen: exits are a read-only mapping, interactions and
+    overrides are tuples, and only ``index``/the description memo are filled
+    in later by compile_world.
+    """
     id: str
     name: Optional[str] = None
     desc_short: str = ""
     desc_long: str = ""
-    exits: Dict[str, Exit] = field(default_factory=dict)
-    interactions: List[Interaction] = field(default_factory=list)
-    on_look_add_flags: Set[str] = field(default_factory=set)
-    desc_overrides: List[DescOverride] = field(default_factory=list)  # <— NEW
+    exits: Mapping[str, Exit] = field(default_factory=lambda: EMPTY_EXITS)
+    interactions: Tuple[Interaction, ...] = ()
+    on_look_add_flags: FrozenSet[str] = EMPTY_NAMES
+    desc_overrides: Tuple[DescOverride, ...] = ()  # <— NEW
+    index: Optional[RoomIndex] = field(default=None, init=False, repr=False, compare=False)
+    # (relevant flag bits, relevant item bits) -> winning override (or None);
+    # only rooms that have overrides ever allocate it
+    _desc_cache: Optional[Dict[Tuple[int, int], Optional[DescOverride]]] = field(
+        default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        _set(self, "id", sys.intern(self.id))
+        if type(self.exits) is not MappingProxyType:
+            _set(self, "exits", MappingProxyType(dict(self.exits)) if self.exits else EMPTY_EXITS)
+        if type(self.interactions) is not tuple:
+            _set(self, "interactions", tuple(self.interactions))
+        if type(self.on_look_add_flags) is not frozenset:
+            _set(self, "on_look_add_flags", names(self.on_look_add_flags))
+        if type(self.desc_overrides) is not tuple:
+            _set(self, "desc_overrides", tuple(self.desc_overrides))
+
+    def compile(self, symbols: Symbols) -> None:
+        for ex in self.exits.values():
+            ex.compile(symbols)
+        for it in self.interactions:
+            it.compile(symbols)
+        for ov in self.desc_overrides:
+            ov.compile(symbols)
+        symbols.mask(self.on_look_add_flags)
+
+    def build_index(self, global_interactions: List[Interaction], symbols: Symbols) -> RoomIndex:
+        by_id: Dict[str, Interaction] = {}
+        for it in self.interactions:
+            by_id.setdefault(it.id, it)
+        for it in global_interactions:
+            by_id.setdefault(it.id, it)  # room interactions shadow globals
+        exits = sorted(self.exits.values(), key=lambda ex: COMPASS_ORDER.get(ex.direction, 999))
+        merged = sorted(list(self.interactions) + list(global_interactions), key=lambda it: (it.sort, it.label))
+        # priority first, then specificity; stable, so authored order breaks ties
+        overrides = sorted(self.desc_overrides, key=lambda ov: (ov.priority, ov.specificity()), reverse=True)
+        override_flags = override_items = 0
+        for ov in overrides:
+            override_flags |= ov._need_flags | ov._forbid_flags
+            override_items |= ov._need_items | ov._forbid_items
+        index = RoomIndex(
+            by_id=MappingProxyType(by_id),
+            exits=tuple(exits),
+            interactions=tuple(merged),
+            look_flags=symbols.mask(self.on_look_add_flags),
+            overrides=tuple(overrides),
+            override_flags=override_flags,
+            override_items=override_items,
+        )
+        _set(self, "index", index)
+        _set(self, "_desc_cache", None)
+        return index
+
+    def resolve_override(self, flags_mask: int, items_mask: int) -> Optional[DescOverride]:
+        """Return the winning DescOverride for this state, memoized per room.
+
+        The memo key keeps only the bits this room's overrides mention, so
+        unrelated flag/item changes reuse the cached answer and relevant ones
+        select a different entry.
+        """
+        idx = self.index
+        if not idx.overrides:
+            return None
+        key = (flags_mask & idx.override_flags, items_mask & idx.override_items)
+        cache = self._desc_cache
+        if cache is None:
+            cache = {}
+            _set(self, "_desc_cache", cache)
+        else:
+            try:
+                return cache[key]
+            except KeyError:
+                pass
+        best = next((ov for ov in idx.overrides if ov.admits(key[0], key[1])), None)
+        if len(cache) >= DESC_CACHE_LIMIT:
+            cache.clear()
+        cache[key] = best
+        return best
 
     def render_desc(self, game: "Game", long: bool) -> str:
-        candidates = []
-        for ov in self.desc_overrides:
-            # must-pass gating
-            if ov.visible_if_flags and not ov.visible_if_flags.issubset(game.flags): continue
-            if ov.visible_if_not_flags & game.flags: continue
-            if ov.visible_if_items and not ov.visible_if_items.issubset(game.inventory): continue
-            if ov.visible_if_not_items & game.inventory: continue
-
-            # matched → compute specificity score
-            score = 0
-            score += 10 * bool(ov.visible_if_items) + len(ov.visible_if_items)
-            score += 10 * bool(ov.visible_if_flags) + len(ov.visible_if_flags)
-            score += 5  * bool(ov.visible_if_not_items)
-            score += 5  * bool(ov.visible_if_not_flags)
-            candidates.append((ov.priority, score, ov))
-
-        if candidates:
-            candidates.sort(key=lambda t: (t[0], t[1]), reverse=True)  # priority first, then specificity
-            best = candidates[0][2]
+        st = game.state
+        best = self.resolve_override(st.flags.mask, st.inventory.mask)
+        if best is not None:
             return (best.long or self.desc_long) if long else (best.short or self.desc_short)
 
         return self.desc_long if long else self.desc_short
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DescOverride:
     short: Optional[str] = None
     long: Optional[str] = None
-    visible_if_flags: Set[str] = field(default_factory=set)
-    visible_if_not_flags: Set[str] = field(default_factory=set)
-    visible_if_items: Set[str] = field(default_factory=set)
-    visible_if_not_items: Set[str] = field(default_factory=set)
+    visible_if_flags: FrozenSet[str] = EMPTY_NAMES
+    visible_if_not_flags: FrozenSet[str] = EMPTY_NAMES
+    visible_if_items: FrozenSet[str] = EMPTY_NAMES
+    visible_if_not_items: FrozenSet[str] = EMPTY_NAMES
     priority: int = 0  # NEW
+    # compiled gate masks (see compile_world)
+    _need_flags: int = field(default=0, init=False, repr=False, compare=False)
+    _forbid_flags: int = field(default=0, init=False, repr=False, compare=False)
+    _need_items: int = field(default=0, init=False, repr=False, compare=False)
+    _forbid_items: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        _freeze_gates(self)
+
+    def compile(self, symbols: Symbols) -> None:
+        _set(self, "_need_flags", symbols.mask(self.visible_if_flags))
+        _set(self, "_forbid_flags", symbols.mask(self.visible_if_not_flags))
+        _set(self, "_need_items", symbols.mask(self.visible_if_items))
+        _set(self, "_forbid_items", symbols.mask(self.visible_if_not_items))
+
+    def admits(self, flags_mask: int, items_mask: int) -> bool:
+        return (flags_mask & self._need_flags) == self._need_flags \
+            and not flags_mask & self._forbid_flags \
+            and (items_mask & self._need_items) == self._need_items \
+            and not items_mask & self._forbid_items
 
     def is_visible(self, game: "Game") -> bool:
-        if any(f not in game.flags for f in self.visible_if_flags): return False
-        if any(f in game.flags for f in self.visible_if_not_flags): return False
-        if any(i not in game.inventory for i in self.visible_if_items): return False
-        if any(i in game.inventory for i in self.visible_if_not_items): return False
-        return True
+        return self.admits(game.flags.mask, game.inventory.mask)
+
+    def specificity(self) -> int:
+        """Tie-breaker among equal priorities: more specific gates win."""
+        score = 0
+        score += 10 * bool(self.visible_if_items) + len(self.visible_if_items)
+        score += 10 * bool(self.visible_if_flags) + len(self.visible_if_flags)
+        score += 5  * bool(self.visible_if_not_items)
+        score += 5  * bool(self.visible_if_not_flags)
+        return score
+
+
+@dataclass(frozen=True, slots=True)
+class RoomIndex:
+    """Immutable per-room lookup tables, built once by compile_world.
+
+    Attributes:
+        by_id: interaction id -> Interaction (room interactions, then globals)
+        exits: exits already in compass order
+        interactions: room + global interactions pre-sorted by (sort, label)
+        look_flags: mask of on_look_add_flags
+        overrides: desc overrides pre-sorted by (priority, specificity), best first
+        override_flags / override_items: every bit any override gates on
+    """
+    by_id: Mapping[str, Interaction]
+    exits: Tuple[Exit, ...]
+    interactions: Tuple[Interaction, ...]
+    look_flags: int = 0
+    overrides: Tuple[DescOverride, ...] = ()
+    override_flags: int = 0
+    override_items: int = 0
+
+
+def _check_targets(interactions: Iterable[Interaction], room_ids: Container[str]) -> None:
+    for it in interactions:
+        for op, arg in it.ops:
+            if op == OP_SET_ROOM and arg not in room_ids:
+                raise ValueError(f"interaction '{it.id}': set_room target '{arg}' not in rooms")
+
+
+def compile_world(rooms: Dict[str, Room], global_interactions: Optional[List[Interaction]] = None,
+                  symbols: Optional[Symbols] = None, room_ids: Optional[Container[str]] = None) -> Symbols:
+    """Intern every flag/item name the world mentions, compile all gates to
+    bitmasks and build each room's RoomIndex.
+
+    Every ``set_room`` target must be in ``room_ids`` (default: ``rooms``),
+    since perform() moves the player without checking; a bad one raises
+    ValueError here rather than a KeyError mid-game.
+
+    Compiled masks are bound to the returned table, so every Game over these
+    rooms must be created with the same ``symbols``.
+    """
+    symbols = symbols if symbols is not None else Symbols()
+    room_ids = room_ids if room_ids is not None else rooms
+    global_interactions = list(global_interactions or [])
+    _check_targets(global_interactions, room_ids)
+    for it in global_interactions:
+        it.compile(symbols)
+    for room in rooms.values():
+        _check_targets(room.interactions, room_ids)
+        room.compile(symbols)
+        room.build_index(global_interactions, symbols)
+    return symbols
 
 # -----------------------------
 # Game state & API
 # -----------------------------
 
-class Game:
-    def __init__(self, rooms: Dict[str, Room], start_room_id: str, global_interactions: Optional[List[Interaction]] = None):
-        if start_room_id not in rooms:
-            raise ValueError(f"start_room '{start_room_id}' not in rooms")
-        self.rooms = rooms
-        self.start_room_id = start_room_id
-        self.current_room_id = start_room_id
-        self.flags: Set[str] = set()
-        self.inventory: Set[str] = set()
+@dataclass(frozen=True, eq=False)
+class World:
+    """The immutable world graph: rooms, start room, global interactions and the
+    compiled symbol table. Loaded once per process and shared by every session.
+
+    ``room_symbols`` numbers the room ids (separately from flags and items) so
+    a player's visited rooms are one int mask too. ``name`` labels the world
+    in metrics and logs (load_world uses the file name); ``source_hash`` is
+    the SHA-256 (hex) of the file it was loaded from, which traces record.
+    """
+    rooms: Mapping[str, Room]
+    start_room_id: str
+    global_interactions: Tuple[Interaction, ...] = ()
+    symbols: Optional[Symbols] = None
+    room_symbols: Optional[Symbols] = None
+    name: str = ""
+    source_hash: str = ""
+
+    def __post_init__(self) -> None:
+        if self.start_room_id not in self.rooms:
+            raise ValueError(f"start_room '{self.start_room_id}' not in rooms")
+        if isinstance(self.rooms, dict):
+            object.__setattr__(self, "rooms", MappingProxyType(self.rooms))
+        object.__setattr__(self, "global_interactions", tuple(self.global_interactions))
+        # compiled world: rooms built by oo_loader arrive with their symbol table
+        if self.symbols is None:
+            object.__setattr__(self, "symbols", compile_world(self.rooms, self.global_interactions))
+        if self.room_symbols is None:
+            object.__setattr__(self, "room_symbols", Symbols(self.rooms))  # ids only; lazy rooms stay unparsed
+
+    def new_state(self) -> "PlayerState":
+        return PlayerState(self.symbols, self.start_room_id, self.room_symbols)
+
+    def new_game(self, state: Optional["PlayerState"] = None, history: Optional["History"] = None,
+                 on_event: Optional[EventHook] = None, navigator: Optional["Navigator"] = None) -> "Game":
+        return Game.from_world(self, state, history, on_event, navigator)
+
+
+class PlayerState:
+    """Everything that differs between two players of the same World.
+
+    ``visited`` (rooms entered this run, over ``World.room_symbols``) is map
+    knowledge rather than game state: snapshots leave it out, so undo does
+    not forget rooms; restart and load_dict reset it.
+    """
+    __slots__ = ("current_room_id", "flags", "inventory", "visited", "dead", "death_cause", "death_message",
+                 "last_message")
+
+    def __init__(self, symbols: Symbols, room_id: str, room_symbols: Optional[Symbols] = None):
+        self.current_room_id = room_id
+        self.flags = BitSet(symbols)
+        self.inventory = BitSet(symbols)
+        self.visited = BitSet(room_symbols if room_symbols is not None else Symbols(), (room_id,))
         self.dead = False
+        self.death_cause = "generic"
+        self.death_message = ""
         self.last_message = ""
-        self.death_cause: str = "generic"
-        self.death_message: str = ""
-        self.global_interactions: List[Interaction] = list(global_interactions or [])
+
+    def snapshot(self) -> "Snapshot":
+        return Snapshot(self.current_room_id, self.flags.mask, self.inventory.mask,
+                        self.dead, self.death_cause, self.death_message, self.last_message)
+
+    def restore(self, snap: "Snapshot") -> None:
+        (self.current_room_id, self.flags.mask, self.inventory.mask,
+         self.dead, self.death_cause, self.death_message, self.last_message) = snap
+
+
+class Snapshot(NamedTuple):
+    """A frozen PlayerState. Every field is an immutable value (flag/item sets
+    are int masks), so taking one is O(1) and snapshots share all their data
+    with the live state and with each other.
+    """
+    current_room_id: str
+    flags: int
+    inventory: int
+    dead: bool
+    death_cause: str
+    death_message: str
+    last_message: str
+
+
+class History:
+    """Bounded undo stack of Snapshots; the oldest fall off past ``limit``."""
+    __slots__ = ("_snaps",)
+
+    def __init__(self, limit: int = UNDO_LIMIT):
+        self._snaps: deque = deque(maxlen=limit)
+
+    @property
+    def limit(self) -> int:
+        return self._snaps.maxlen
+
+    def push(self, snap: Snapshot) -> None:
+        self._snaps.append(snap)
+
+    def peek(self) -> Optional[Snapshot]:
+        return self._snaps[-1] if self._snaps else None
+
+    def rewind(self, steps: int = 1) -> Optional[Snapshot]:
+        """Drop the newest ``steps`` snapshots and return the last one dropped
+        (the state before the ``steps``-th most recent action), or None if empty."""
+        snap = None
+        for _ in range(min(steps, len(self._snaps))):
+            snap = self._snaps.pop()
+        return snap
+
+    def clear(self) -> None:
+        self._snaps.clear()
+
+    def __len__(self) -> int:
+        return len(self._snaps)
+
+
+# A directed edge of the visited map: (from room id, exit)
+_Edge = Tuple[str, Exit]
+
+
+class Navigator:
+    """Shortest unlocked routes between the rooms one player has visited.
+
+    The known map is a table of the exits that are open right now and lead
+    between two visited rooms. ``sync`` keeps it current incrementally:
+    newly visited rooms link in their own exits and the ones waiting for
+    them, and when an item or flag that gates a known exit changes, only the
+    exits behind that bit are re-checked. Other state changes cost one mask
+    compare. The BFS tree from the current room (the reachable region) is
+    kept until the room or the table changes.
+
+    One Navigator serves one player; hand it to every Game view of that
+    player (``World.new_game(..., navigator=)``) to keep the cache warm.
+    """
+    __slots__ = ("world", "_known", "_open", "_pending", "_by_item", "_by_flag",
+                 "_item_bits", "_flag_bits", "_items", "_flags", "_version", "_tree")
+
+    def __init__(self, world: World):
+        self.world = world
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the map (rebuilt on the next ``sync``)."""
+        self._known = 0                                 # visited mask already in the table
+        self._open: Dict[str, Dict[str, str]] = {}      # room -> {direction: to_room}, open exits only
+        self._pending: Dict[str, List[_Edge]] = {}      # unvisited room -> known exits into it
+        self._by_item: Dict[int, List[_Edge]] = {}      # gate bit -> linked exits it locks
+        self._by_flag: Dict[int, List[_Edge]] = {}
+        self._item_bits = self._flag_bits = 0           # every gate bit of a linked exit
+        self._items = self._flags = 0                   # the gate bits the table was built against
+        self._version = 0
+        self._tree: Optional[Tuple[str, int, Dict[str, Optional[Tuple[str, str]]]]] = None
+
+    # ---------- maintenance ----------
+    def sync(self, state: PlayerState) -> None:
+        """Bring the table up to date with ``state`` (visited rooms, items, flags)."""
+        visited = state.visited.mask
+        if self._known & ~visited:  # restarted or loaded: the map shrank
+            self.reset()
+        im, fm = state.inventory.mask, state.flags.mask
+        for index, changed in ((self._by_item, (im ^ self._items) & self._item_bits),
+                               (self._by_flag, (fm ^ self._flags) & self._flag_bits)):
+            while changed:
+                low = changed & -changed
+                for rid, ex in index[low]:
+                    self._update(rid, ex, im, fm)
+                changed ^= low
+        new = visited & ~self._known
+        if new:
+            self._known = visited
+            for rid in self.world.room_symbols.names(new):
+                self._add_room(rid, im, fm)
+        self._items, self._flags = im & self._item_bits, fm & self._flag_bits
+
+    def _update(self, rid: str, ex: Exit, im: int, fm: int) -> None:
+        exits = self._open[rid]
+        if ex.is_locked_mask(im, fm):
+            if exits.pop(ex.direction, None) is not None:
+                self._version += 1
+        elif exits.get(ex.direction) != ex.to_room:
+            exits[ex.direction] = ex.to_room
+            self._version += 1
+
+    def _link(self, rid: str, ex: Exit, im: int, fm: int) -> None:
+        if ex._need_items:
+            self._by_item.setdefault(ex._need_items, []).append((rid, ex))
+            self._item_bits |= ex._need_items
+        if ex._need_flags:
+            self._by_flag.setdefault(ex._need_flags, []).append((rid, ex))
+            self._flag_bits |= ex._need_flags
+        self._update(rid, ex, im, fm)
+
+    def _add_room(self, rid: str, im: int, fm: int) -> None:
+        ids = self.world.room_symbols
+        self._open[rid] = {}
+        for ex in self.world.rooms[rid].index.exits:
+            if ex.to_room not in ids:
+                continue
+            if ex.to_room in self._open:  # already linked in (later ones pick this up from _pending)
+                self._link(rid, ex, im, fm)
+            else:
+                self._pending.setdefault(ex.to_room, []).append((rid, ex))
+        for src, ex in self._pending.pop(rid, ()):
+            self._link(src, ex, im, fm)
+        self._version += 1
+
+    # ---------- queries ----------
+    def tree(self, state: PlayerState) -> Dict[str, Optional[Tuple[str, str]]]:
+        """BFS tree over open exits from the current room: reachable room ->
+        (previous room, direction), None for the current room itself."""
+        self.sync(state)
+        here = state.current_room_id
+        cached = self._tree
+        if cached is not None and cached[0] == here and cached[1] == self._version:
+            return cached[2]
+        parents: Dict[str, Optional[Tuple[str, str]]] = {here: None}
+        frontier = [here]
+        empty: Dict[str, str] = {}
+        while frontier:
+            nxt = []
+            for rid in frontier:
+                for direction, to in self._open.get(rid, empty).items():
+                    if to not in parents:
+                        parents[to] = (rid, direction)
+                        nxt.append(to)
+            frontier = nxt
+        self._tree = (here, self._version, parents)
+        return parents
+
+    def route(self, state: PlayerState, room_id: str) -> Optional[List[str]]:
+        """Directions of a shortest open route to visited ``room_id``, or None."""
+        parents = self.tree(state)
+        if room_id not in parents:
+            return None
+        path: List[str] = []
+        step = parents[room_id]
+        while step is not None:
+            room_id, direction = step
+            path.append(direction)
+            step = parents[room_id]
+        path.reverse()
+        return path
+
+    def approx_bytes(self) -> int:
+        return (sys.getsizeof(self._open) + sum(sys.getsizeof(e) for e in self._open.values())
+                + sys.getsizeof(self._pending) + (sys.getsizeof(self._tree[2]) if self._tree else 0))
+
+
+def _world_attr(name: str) -> property:
+    return property(lambda self: getattr(self.world, name), doc=f"Shortcut for ``world.{name}``.")
+
+
+def _state_attr(name: str) -> property:
+    return property(lambda self: getattr(self.state, name),
+                    lambda self, value: setattr(self.state, name, value),
+                    doc=f"Shortcut for ``state.{name}``.")
+
+
+class Game:
+    """A thin view pairing a shared World with one player's PlayerState.
+
+    ``Game(rooms, start_room_id, ...)`` still builds a private World; sessions
+    sharing a loaded world should use ``Game.from_world`` / ``World.new_game``.
+
+    With a ``history`` attached, look/move/do push a Snapshot of the state
+    before they act, so ``undo()`` can step back (e.g. out of a death).
+    With ``on_event`` set, every verb, death, restart and undo is reported
+    to it after it happens (enough to replay the session).
+    """
+    def __init__(self, rooms: Dict[str, Room], start_room_id: str, global_interactions: Optional[List[Interaction]] = None,
+                 symbols: Optional[Symbols] = None):
+        world = World(rooms, start_room_id, tuple(global_interactions or ()), symbols)
+        self.world = world
+        self.state = world.new_state()
+        self.history: Optional[History] = None
+        self.on_event: Optional[EventHook] = None
+        self._navigator: Optional[Navigator] = None
+
+    @classmethod
+    def from_world(cls, world: World, state: Optional[PlayerState] = None,
+                   history: Optional[History] = None, on_event: Optional[EventHook] = None,
+                   navigator: Optional[Navigator] = None) -> "Game":
+        game = cls.__new__(cls)
+        game.world = world
+        game.state = state if state is not None else world.new_state()
+        game.history = history
+        game.on_event = on_event
+        game._navigator = navigator
+        return game
+
+    rooms = _world_attr("rooms")
+    start_room_id = _world_attr("start_room_id")
+    global_interactions = _world_attr("global_interactions")
+    symbols = _world_attr("symbols")
+
+    current_room_id = _state_attr("current_room_id")
+    dead = _state_attr("dead")
+    death_cause = _state_attr("death_cause")
+    death_message = _state_attr("death_message")
+    last_message = _state_attr("last_message")
+
+    # ---------- player state (set-like views over bitmasks) ----------
+    @property
+    def flags(self) -> BitSet:
+        return self.state.flags
+
+    @flags.setter
+    def flags(self, value) -> None:
+        self.state.flags = BitSet(self.world.symbols, value)
+
+    @property
+    def inventory(self) -> BitSet:
+        return self.state.inventory
+
+    @inventory.setter
+    def inventory(self, value) -> None:
+        self.state.inventory = BitSet(self.world.symbols, value)
 
     # ---------- derived helpers ----------
     @property
     def room(self) -> Room:
-        return self.rooms[self.current_room_id]
+        return self.world.rooms[self.state.current_room_id]
+
+    @property
+    def navigator(self) -> Navigator:
+        """This player's route cache (created on first use)."""
+        if self._navigator is None:
+            self._navigator = Navigator(self.world)
+        return self._navigator
 
     def compass(self) -> List[Dict[str, Any]]:
         """Return UI-friendly exit info with lock status."""
-        data = []
-        for direction, ex in self.room.exits.items():
-            locked = ex.is_locked(self.inventory, self.flags)
-            data.append({
-                "direction": direction,
-                "label": ex.display_label(),
-                "to": ex.to_room,
-                "locked": locked,
-                "locked_text": ex.locked_text or "It's stuck. You'll need something to pry it open.",
-            })
-        # Stable order by common compass ordering
-        order = {k: i for i, k in enumerate([
-            "north", "northeast", "east", "southeast",
-            "south", "southwest", "west", "northwest",
-            "up", "down", "in", "out"
-        ])}
-        data.sort(key=lambda d: order.get(d["direction"], 999))
-        return data
+        st = self.state
+        fm, im = st.flags.mask, st.inventory.mask
+        # exits are pre-sorted in compass order by the room index
+        return [{
+            "direction": ex.direction,
+            "label": ex.display_label(),
+            "to": ex.to_room,
+            "locked": ex.is_locked_mask(im, fm),
+            "locked_text": ex.locked_text or DEFAULT_LOCKED_TEXT,
+        } for ex in self.room.index.exits]
 
     def visible_interactions(self) -> List[Interaction]:
-        vis = [it for it in self.room.interactions if it.is_visible(self)]
-        vis += [it for it in self.global_interactions if it.is_visible(self)]
-        vis.sort(key=lambda it: (it.sort, it.label))
-        return vis
+        st = self.state
+        fm, im = st.flags.mask, st.inventory.mask
+        # room + global interactions are pre-merged in (sort, label) order
+        return [it for it in self.room.index.interactions if it.admits(fm, im)]
 
     # ---------- player verbs ----------
     def look(self) -> str:
+        st = self.state
+        if self.history is not None:
+            self.history.push(st.snapshot())
         # Looking reveals authored flags (e.g., saw_glint)
-        for f in self.room.on_look_add_flags:
-            self.flags.add(f)
-        self.last_message = self.desc_long()   # <-- was: self.room.desc_long
-        return self.last_message
+        st.flags.mask |= self.room.index.look_flags
+        st.last_message = self.desc_long()   # <-- was: self.room.desc_long
+        if self.on_event is not None:
+            self.on_event(EV_LOOK, st.current_room_id, {})
+        return st.last_message
 
     def move(self, direction: str) -> str:
+        st = self.state
+        if self.history is not None:
+            self.history.push(st.snapshot())
+        origin = st.current_room_id
         ex = self.room.exits.get(direction)
         if not ex:
-            self.last_message = "You can't go that way."
-            return self.last_message
-        if ex.is_locked(self.inventory, self.flags):
-            self.last_message = ex.locked_text or "It's stuck. You can't force it."
-            return self.last_message
-        self.current_room_id = ex.to_room
-        self.last_message = self.desc_short()
-        return self.last_message
+            st.last_message = "You can't go that way."
+        elif ex.is_locked_mask(st.inventory.mask, st.flags.mask):
+            st.last_message = ex.locked_text or "It's stuck. You can't force it."
+        else:
+            st.current_room_id = ex.to_room
+            st.visited.mask |= self.world.room_symbols.bit(ex.to_room)
+            st.last_message = self.desc_short()
+        if self.on_event is not None:
+            self.on_event(EV_MOVE, origin, {"dir": direction, "to": st.current_room_id})
+        return st.last_message
+
+    def route_to(self, room_id: str) -> Optional[List[str]]:
+        """Directions of a shortest route to visited room ``room_id`` through
+        visited rooms and exits unlocked by the current items and flags
+        ([] if already there); None if there is none."""
+        return self.navigator.route(self.state, room_id)
+
+    def reachable_rooms(self) -> List[str]:
+        """Visited rooms ``travel`` can reach from here, nearest first."""
+        here = self.state.current_room_id
+        return [rid for rid in self.navigator.tree(self.state) if rid != here]
+
+    def travel(self, room_id: str) -> Optional[str]:
+        """Walk ``route_to(room_id)`` as one batch of moves, each recorded and
+        reported like a single ``move``. The arrival message, or None (and no
+        move) if there is no route."""
+        route = None if self.state.dead else self.route_to(room_id)
+        if route is None:
+            return None
+        for direction in route:
+            self.move(direction)
+        return self.state.last_message
 
     def do(self, interaction_id: str):
-        it = next((i for i in self.room.interactions if i.id == interaction_id), None)
-        if not it:
-            it = next((i for i in self.global_interactions if i.id == interaction_id), None)
-
-        if not it or not it.is_visible(self):
-            self.last_message = "Nothing happens."
-            return self.last_message, False
+        st = self.state
+        if self.history is not None:
+            self.history.push(st.snapshot())
+        origin = st.current_room_id
+        it = self.room.index.by_id.get(interaction_id)
+
+        if not it or not it.admits(st.flags.mask, st.inventory.mask):
+            st.last_message = "Nothing happens."
+            if self.on_event is not None:
+                self.on_event(EV_DO, origin, {"id": interaction_id, "ok": False})
+            return st.last_message, False
 
         msg, dead = it.perform(self)
-        self.dead = dead
+        st.dead = dead
+        if st.current_room_id != origin:  # set_room
+            st.visited.mask |= self.world.room_symbols.bit(st.current_room_id)
         if not msg:
             msg = self.desc_short()
-        self.last_message = msg
+        st.last_message = msg
+        if self.on_event is not None:
+            self.on_event(EV_DO, origin, {"id": interaction_id, "ok": True})
+            if dead:
+                self.on_event(EV_DEATH, st.current_room_id, {"cause": st.death_cause, "message": st.death_message})
         return msg, dead
 
     # ---------- lifecycle ----------
     def restart(self) -> None:
         """Clean restart after death or manual reset."""
-        self.current_room_id = self.start_room_id
-        self.flags.clear()
-        self.inventory.clear()
-        self.dead = False
-        self.last_message = self.room.desc_short
-        self.death_cause = "generic"
-        self.death_message = ""
+        st = self.state
+        st.current_room_id = self.world.start_room_id
+        st.flags.clear()
+        st.inventory.clear()
+        st.visited.mask = self.world.room_symbols.bit(st.current_room_id)
+        st.dead = False
+        st.last_message = self.room.desc_short
+        st.death_cause = "generic"
+        st.death_message = ""
+        if self.on_event is not None:
+            self.on_event(EV_RESTART, st.current_room_id, {})
+
+    # ---------- snapshots ----------
+    def snapshot(self) -> Snapshot:
+        return self.state.snapshot()
+
+    def restore(self, snap: Snapshot) -> None:
+        self.state.restore(snap)
+
+    def fork(self, snap: Optional[Snapshot] = None) -> "Game":
+        """A new Game on the same World starting from ``snap`` (default: now).
+        The fork has its own state and no history."""
+        state = self.world.new_state()
+        state.restore(snap if snap is not None else self.state.snapshot())
+        state.visited.mask = self.state.visited.mask
+        return Game.from_world(self.world, state)
+
+    def undo(self, steps: int = 1) -> bool:
+        """Rewind ``steps`` recorded actions. False if there is nothing to undo."""
+        snap = self.history.rewind(steps) if self.history is not None else None
+        if snap is None:
+            return False
+        self.state.restore(snap)
+        if self.on_event is not None:
+            self.on_event(EV_UNDO, snap.current_room_id, {"steps": steps})
+        return True
 
     # ---------- (de)serialization ----------
     def to_dict(self) -> Dict[str, Any]:
@@ -300,7 +984,13 @@ class Game:
             "current_room_id": self.current_room_id,
             "flags": sorted(self.flags),
             "inventory": sorted(self.inventory),
+            # room ids, not the mask: bit positions follow the room order in the
+            # world file and would point elsewhere once a room is added or moved
+            "visited": list(self.state.visited),
             "dead": self.dead,
+            "death_cause": self.death_cause,
+            "death_message": self.death_message,
+            "last_message": self.last_message,
         }
 
     def load_dict(self, data: Dict[str, Any]) -> None:
@@ -308,7 +998,14 @@ class Game:
         self.flags = set(data.get("flags", []))
         self.inventory = set(data.get("inventory", []))
         self.dead = bool(data.get("dead", False))
-        # last_message is ephemeral/UI-only; do not restore
+        rooms = self.world.room_symbols
+        visited = data.get("visited")
+        if not isinstance(visited, list):  # missing, or a room mask from a pre-release save
+            visited = ()
+        self.state.visited.mask = rooms.mask(rid for rid in (*visited, self.current_room_id) if rid in rooms)
+        self.death_cause = str(data.get("death_cause") or "generic")
+        self.death_message = str(data.get("death_message") or "")
+        self.last_message = str(data.get("last_message") or "")
     
     def desc_short(self) -> str:
         return self.room.render_desc(self, long=False)
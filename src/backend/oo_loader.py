@@ -1,14 +1,27 @@
 from __future__ import annotations
-from typing import Dict, Any, List, Set
+from typing import Container, Dict, Any, FrozenSet, List, Optional, Tuple
+import gc
 import json
-from .oo import Room, Exit, Interaction, Game, DescOverride
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from .oo import Room, Exit, Interaction, Game, DescOverride, World, compile_world, compile_effects, names
+from .lazy import LazyRooms
+from . import metrics, world_cache
+from .symbols import Symbols
+from .validate import check_world
 
-def _to_interactions(raw_list):
+def _to_interactions(raw_list, room_ids: Optional[Container[str]] = None):
     out = []
     for idata in (raw_list or []):
+        iid = str(idata.get("id"))
+        try:
+            ops = compile_effects(idata.get("effects"), room_ids)
+        except ValueError as e:
+            raise ValueError(f"interaction '{iid}': {e}") from None
         out.append(
             Interaction(
-                id=str(idata.get("id")),
+                id=iid,
                 label=str(idata.get("label", "Interact")),
                 text=idata.get("text"),
                 once=bool(idata.get("once", False)),
@@ -16,18 +29,18 @@ def _to_interactions(raw_list):
                 visible_if_not_flags=_to_set(idata.get("visible_if_not_flags")),
                 visible_if_items=_to_set(idata.get("visible_if_items")),
                 visible_if_not_items=_to_set(idata.get("visible_if_not_items")),
-                effects=list(idata.get("effects") or []),
                 sort=int(idata.get("sort", 0)),
+                ops=ops,
             )
         )
     return out
 
-def _to_set(v: Any) -> Set[str]:
+def _to_set(v: Any) -> FrozenSet[str]:
     if not v:
-        return set()
+        return names(None)
     if isinstance(v, list):
-        return set(str(x) for x in v)
-    return {str(v)}
+        return names(str(x) for x in v)
+    return names((str(v),))
 
 def _to_overrides(raw_list):
     out = []
@@ -43,41 +56,45 @@ def _to_overrides(raw_list):
         ))
     return out
 
+def _to_room(rid: str, rdata: Dict[str, Any], room_ids: Container[str]) -> Room:
+    # Exits
+    exits: Dict[str, Exit] = {}
+    for direction, edata in (rdata.get("exits") or {}).items():
+        exits[direction] = Exit(
+            direction=direction,
+            to_room=str(edata.get("to")),
+            locked_by_item=edata.get("locked_by_item"),
+            locked_by_flag=edata.get("locked_by_flag"),
+            locked_text=edata.get("locked_text"),
+            label=edata.get("label"),
+        )
+
+    # Interactions (now via helper)
+    interactions = tuple(_to_interactions(rdata.get("interactions"), room_ids))
+
+    # Description overrides
+    desc_overrides = tuple(_to_overrides(rdata.get("desc_overrides")))
+
+    # Room
+    return Room(
+        id=str(rdata.get("id", rid)),
+        name=rdata.get("name"),
+        desc_short=rdata.get("desc_short", ""),
+        desc_long=rdata.get("desc_long", ""),
+        exits=exits,
+        interactions=interactions,
+        on_look_add_flags=_to_set(rdata.get("on_look_add_flags")),
+        desc_overrides=desc_overrides,
+    )
+
 def load_rooms(world: Dict[str, Any]) -> Dict[str, Room]:
     """Build Room objects (exits, interactions, desc overrides) from world JSON."""
     rooms: Dict[str, Room] = {}
 
     raw_rooms = world.get("rooms") or {}
+    room_ids = {str(rdata.get("id", rid)) for rid, rdata in raw_rooms.items()}  # set_room targets
     for rid, rdata in raw_rooms.items():
-        # Exits
-        exits: Dict[str, Exit] = {}
-        for direction, edata in (rdata.get("exits") or {}).items():
-            exits[direction] = Exit(
-                direction=direction,
-                to_room=str(edata.get("to")),
-                locked_by_item=edata.get("locked_by_item"),
-                locked_by_flag=edata.get("locked_by_flag"),
-                locked_text=edata.get("locked_text"),
-                label=edata.get("label"),
-            )
-
-        # Interactions (now via helper)
-        interactions: List[Interaction] = _to_interactions(rdata.get("interactions"))
-
-        # Description overrides
-        desc_overrides: List[DescOverride] = _to_overrides(rdata.get("desc_overrides"))
-
-        # Room
-        room = Room(
-            id=str(rdata.get("id", rid)),
-            name=rdata.get("name"),
-            desc_short=rdata.get("desc_short", ""),
-            desc_long=rdata.get("desc_long", ""),
-            exits=exits,
-            interactions=interactions,
-            on_look_add_flags=_to_set(rdata.get("on_look_add_flags")),
-            desc_overrides=desc_overrides,
-        )
+        room = _to_room(rid, rdata, room_ids)
         rooms[room.id] = room
 
     return rooms
@@ -98,12 +115,102 @@ def _resolve_start_room(world: Dict[str, Any], rooms: Dict[str, Room]) -> str:
         return next(iter(rooms.keys()))
     raise ValueError("World JSON has no rooms; cannot determine start_room.")
 
-def new_game_from_path(json_path: str) -> Game:
-    with open(json_path, "r", encoding="utf-8") as f:
-        world = json.load(f)
+def _parse_world(raw: bytes, json_path: str = "<world>") -> world_cache.CompiledWorld:
+    world = json.loads(raw)
+    check_world(world, json_path)  # raises WorldValidationError; see backend.validate
     rooms = load_rooms(world)
     start = _resolve_start_room(world, rooms)
 
-    global_interactions = _to_interactions(world.get("global_interactions"))
+    global_interactions = _to_interactions(world.get("global_interactions"), set(rooms))
+    return rooms, start, global_interactions
+
+def _new_world(rooms: Dict[str, Room], start: str, global_interactions: List[Interaction], name: str = "",
+               source_hash: str = "") -> World:
+    # Compiled world: intern every flag/item name and turn gates into bitmasks
+    symbols = compile_world(rooms, global_interactions)
+
+    return World(rooms=rooms, start_room_id=start, global_interactions=tuple(global_interactions), symbols=symbols,
+                 name=name, source_hash=source_hash)
+
+def new_game_from_path(json_path: str, lazy: bool = False, use_cache: bool = True) -> Game:
+    """Load a world JSON file into a new Game with its own World (see load_world)."""
+    return load_world(json_path, lazy=lazy, use_cache=use_cache).new_game()
+
+def load_world(json_path: str, lazy: bool = False, use_cache: bool = True) -> World:
+    """Load a world JSON file into an immutable, shareable World.
+
+    By default a binary cache next to the source (see backend.world_cache) is
+    used when it matches the file's content hash, and (re)written otherwise.
+    With ``lazy=True`` the file is indexed in one pass and rooms are parsed and
+    compiled on first access from ``Game.rooms`` (see backend.lazy); the index
+    is kept next to the source when ``use_cache`` is set.
+    Both paths validate a world (backend.validate) whenever they compile it
+    rather than reuse a cache or index, which were only written for valid
+    worlds; one with errors raises WorldValidationError, so exit and set_room
+    targets always exist.
+    With ``backend.metrics`` enabled the load is timed as ``world_load``.
+    """
+    t0 = time.perf_counter()
+    name = Path(json_path).stem
+    if lazy:
+        world, how = _new_lazy_world(json_path, name, use_cache), "lazy"
+    else:
+        world, how = _load_compiled(json_path, use_cache, name)
+    metrics.observe("world_load", time.perf_counter() - t0, name, "", how)
+    return world
+
+def _load_compiled(json_path: str, use_cache: bool, name: str) -> Tuple[World, str]:
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    digest = world_cache.source_hash(raw).hex()
+    with _gc_paused():
+        if use_cache:
+            cached = world_cache.load(json_path, raw)
+            if cached is not None:
+                return _new_world(*cached, name=name, source_hash=digest), "cache"
+        loaded = _parse_world(raw, json_path)
+        if use_cache:
+            world_cache.save(json_path, raw, *loaded)
+        return _new_world(*loaded, name=name, source_hash=digest), "parse"
+
+@contextmanager
+def _gc_paused():
+    """World construction allocates only long-lived, acyclic-enough objects; letting
+    the cyclic GC rescan the growing heap mid-load roughly doubles load time."""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+def compile_world_file(json_path: str) -> Optional[str]:
+    """Parse a world and (re)write its binary cache. Returns the cache path, or None."""
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    return world_cache.save(json_path, raw, *_parse_world(raw, json_path))
+
+
+def _new_lazy_world(json_path: str, name: str = "", use_index: bool = True) -> World:
+    symbols = Symbols()
+    global_interactions: List[Interaction] = []
+
+    def build(rid: str, rdata: Dict[str, Any]) -> Room:
+        room = _to_room(rid, rdata, rooms)
+        room.compile(symbols)
+        room.build_index(global_interactions, symbols)
+        return room
+
+    def check(lazy: LazyRooms) -> None:
+        check_world({**lazy.world, "rooms": lazy.raw_rooms}, json_path)
+
+    rooms = LazyRooms(json_path, build, use_index, check)
+    world = rooms.world
+    start = _resolve_start_room(world, rooms)
+
+    global_interactions += _to_interactions(world.get("global_interactions"), rooms)
+    compile_world({}, global_interactions, symbols, room_ids=rooms)
 
-    return Game(rooms=rooms, start_room_id=start, global_interactions=global_interactions)
+    return World(rooms=rooms, start_room_id=start, global_interactions=tuple(global_interactions), symbols=symbols,
+                 name=name, source_hash=rooms.source_hash)
@@ -0,0 +1,292 @@
+# src/backend/sim.py
+"""Headless playthrough simulator.
+
+Runs many independent games against one world across a process pool and
+reports throughput, death causes and win rates. Each worker loads the world
+once and resets between games with ``Game.restart``.
+
+Usage (from ``src/``)::
+
+    python -m backend.sim ../data/worlds/escape_house_01.json \\
+        --games 10000 --policy greedy --workers 4 --win-room 3
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from . import metrics
+from .oo import Game
+from .oo_loader import new_game_from_path
+
+Action = Tuple[str, str]  # (verb, arg): ("look", ""), ("move", dir), ("do", interaction_id)
+
+
+def available_actions(game: Game, include_locked: bool = False) -> List[Action]:
+    """Every action a player could click in the current state."""
+    acts: List[Action] = [("look", "")]
+    acts += [("move", ex["direction"]) for ex in game.compass() if include_locked or not ex["locked"]]
+    acts += [("do", it.id) for it in game.visible_interactions()]
+    return acts
+
+
+def apply_action(game: Game, action: Action) -> str:
+    verb, arg = action
+    if verb == "move":
+        return game.move(arg)
+    if verb == "do":
+        return game.do(arg)[0]
+    if verb == "look":
+        return game.look()
+    raise ValueError(f"unknown verb '{verb}'")
+
+
+def parse_action(s: str) -> Action:
+    """'look' | 'move:north' | 'do:take_hatchet' -> (verb, arg)."""
+    verb, _, arg = s.strip().partition(":")
+    if verb not in ("look", "move", "do"):
+        raise ValueError(f"bad action '{s}'")
+    return verb, arg
+
+
+# -----------------------------
+# Policies
+# -----------------------------
+
+class Policy:
+    """Chooses the next action. One instance plays many games in a worker."""
+    def reset(self, game: Game, rng: random.Random) -> None:
+        pass
+
+    def choose(self, game: Game, rng: random.Random) -> Optional[Action]:
+        raise NotImplementedError
+
+
+class RandomPolicy(Policy):
+    """Uniform over look, unlocked exits and visible interactions."""
+    def choose(self, game: Game, rng: random.Random) -> Optional[Action]:
+        return rng.choice(available_actions(game))
+
+
+class ScriptedPolicy(Policy):
+    """Replays a fixed action list; stops when it runs out."""
+    def __init__(self, actions: Sequence[Action]):
+        self.actions = list(actions)
+        self._pos = 0
+
+    def reset(self, game: Game, rng: random.Random) -> None:
+        self._pos = 0
+
+    def choose(self, game: Game, rng: random.Random) -> Optional[Action]:
+        if self._pos >= len(self.actions):
+            return None
+        self._pos += 1
+        return self.actions[self._pos - 1]
+
+
+class GreedyExplorePolicy(Policy):
+    """Prefers novelty: look in unseen rooms, untried interactions, unvisited exits."""
+    def __init__(self):
+        self._looked: Set[str] = set()
+        self._tried: Set[Tuple[str, str]] = set()
+        self._visited: Set[str] = set()
+
+    def reset(self, game: Game, rng: random.Random) -> None:
+        self._looked.clear()
+        self._tried.clear()
+        self._visited = {game.current_room_id}
+
+    def choose(self, game: Game, rng: random.Random) -> Optional[Action]:
+        rid = game.current_room_id
+        self._visited.add(rid)
+        if rid not in self._looked:
+            self._looked.add(rid)
+            return ("look", "")
+        fresh = [it.id for it in game.visible_interactions() if (rid, it.id) not in self._tried]
+        if fresh:
+            iid = rng.choice(fresh)
+            self._tried.add((rid, iid))
+            return ("do", iid)
+        exits = [ex for ex in game.compass() if not ex["locked"]]
+        unseen = [ex for ex in exits if ex["to"] not in self._visited]
+        pick = unseen or exits
+        if pick:
+            return ("move", rng.choice(pick)["direction"])
+        return rng.choice(available_actions(game))
+
+
+POLICIES: Dict[str, Callable[..., Policy]] = {
+    "random": RandomPolicy,
+    "scripted": ScriptedPolicy,
+    "greedy": GreedyExplorePolicy,
+}
+
+
+def make_policy(name: str, script: Optional[Sequence[Action]] = None) -> Policy:
+    if name not in POLICIES:
+        raise ValueError(f"unknown policy '{name}' (choose from {', '.join(POLICIES)})")
+    if name == "scripted":
+        if not script:
+            raise ValueError("scripted policy needs a script")
+        return ScriptedPolicy(script)
+    return POLICIES[name]()
+
+
+# -----------------------------
+# Running games
+# -----------------------------
+
+@dataclass
+class SimStats:
+    games: int = 0
+    actions: int = 0
+    wins: int = 0
+    deaths: Counter = field(default_factory=Counter)  # death_cause -> count
+    timeouts: int = 0  # hit max_steps (or script end) without winning or dying
+
+    def merge(self, other: "SimStats") -> None:
+        self.games += other.games
+        self.actions += other.actions
+        self.wins += other.wins
+        self.deaths.update(other.deaths)
+        self.timeouts += other.timeouts
+
+
+def play(game: Game, policy: Policy, rng: random.Random, max_steps: int, win_rooms: Set[str]) -> Tuple[str, int]:
+    """Play one game from a fresh restart. Returns (outcome, actions taken).
+
+    outcome is 'win', 'death' or 'timeout'.
+    """
+    game.restart()
+    policy.reset(game, rng)
+    for step in range(max_steps):
+        action = policy.choose(game, rng)
+        if action is None:
+            return "timeout", step
+        apply_action(game, action)
+        if game.dead:
+            return "death", step + 1
+        if game.current_room_id in win_rooms:
+            return "win", step + 1
+    return "timeout", max_steps
+
+
+def run_games(game: Game, policy: Policy, seeds: Sequence[int], max_steps: int, win_rooms: Set[str]) -> SimStats:
+    """Play one game per seed (simulated play is kept out of ``backend.metrics``)."""
+    stats = SimStats()
+    for seed in seeds:
+        with metrics.untracked():
+            outcome, steps = play(game, policy, random.Random(seed), max_steps, win_rooms)
+        stats.games += 1
+        stats.actions += steps
+        if outcome == "win":
+            stats.wins += 1
+        elif outcome == "death":
+            stats.deaths[game.death_cause] += 1
+        else:
+            stats.timeouts += 1
+    return stats
+
+
+# Per-worker state: the world is parsed once per process, then reused via restart()
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(world_path: str, policy_name: str, script: Optional[List[Action]]) -> None:
+    _WORKER["game"] = new_game_from_path(world_path)
+    _WORKER["policy"] = make_policy(policy_name, script)
+
+
+def _run_batch(seeds: Sequence[int], max_steps: int, win_rooms: Set[str]) -> SimStats:
+    return run_games(_WORKER["game"], _WORKER["policy"], seeds, max_steps, win_rooms)  # type: ignore[arg-type]
+
+
+def simulate(world_path: str, games: int, policy: str = "random", workers: Optional[int] = None,
+             max_steps: int = 200, win_rooms: Optional[Set[str]] = None, seed: int = 0,
+             script: Optional[List[Action]] = None, batch_size: int = 250) -> Dict[str, object]:
+    """Run ``games`` playthroughs and return a report dict."""
+    workers = workers or os.cpu_count() or 1
+    win_rooms = set(win_rooms or ())
+    seeds = list(range(seed, seed + games))
+    batches = [seeds[i:i + batch_size] for i in range(0, len(seeds), batch_size)]
+
+    stats = SimStats()
+    t0 = time.perf_counter()
+    if workers <= 1:
+        _init_worker(world_path, policy, script)
+        for b in batches:
+            stats.merge(_run_batch(b, max_steps, win_rooms))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(world_path, policy, script)) as pool:
+            futs = [pool.submit(_run_batch, b, max_steps, win_rooms) for b in batches]
+            for f in futs:
+                stats.merge(f.result())
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "world": world_path,
+        "policy": policy,
+        "workers": workers,
+        "games": stats.games,
+        "actions": stats.actions,
+        "elapsed_s": round(elapsed, 4),
+        "games_per_sec": round(stats.games / elapsed, 1) if elapsed else None,
+        "actions_per_sec": round(stats.actions / elapsed, 1) if elapsed else None,
+        "wins": stats.wins,
+        "win_rate": (stats.wins / stats.games) if win_rooms and stats.games else None,
+        "deaths": dict(stats.deaths.most_common()),
+        "death_rate": (sum(stats.deaths.values()) / stats.games) if stats.games else 0.0,
+        "timeouts": stats.timeouts,
+    }
+
+
+def _print_report(r: Dict[str, object]) -> None:
+    print(f"world    {r['world']}  policy={r['policy']}  workers={r['workers']}")
+    print(f"games    {r['games']}  in {r['elapsed_s']}s  ({r['games_per_sec']} games/s)")
+    print(f"actions  {r['actions']}  ({r['actions_per_sec']} actions/s)")
+    wr = r["win_rate"]
+    print(f"wins     {r['wins']}" + (f"  ({wr:.1%})" if wr is not None else "  (no --win-room given)"))
+    print(f"timeouts {r['timeouts']}")
+    print(f"deaths   {sum(r['deaths'].values())}  ({r['death_rate']:.1%})")  # type: ignore[union-attr]
+    for cause, n in r["deaths"].items():  # type: ignore[union-attr]
+        print(f"  {cause:<12} {n}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Run headless Sorque playthroughs.")
+    ap.add_argument("world", help="path to world JSON")
+    ap.add_argument("--games", type=int, default=1000)
+    ap.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    ap.add_argument("--script", help="file with one action per line (look | move:<dir> | do:<id>)")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count; 1 = inline)")
+    ap.add_argument("--max-steps", type=int, default=200)
+    ap.add_argument("--win-room", action="append", default=[], help="room id that counts as a win (repeatable)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = ap.parse_args(argv)
+
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = [parse_action(line) for line in f if line.strip() and not line.startswith("#")]
+
+    report = simulate(args.world, args.games, policy=args.policy, workers=args.workers,
+                      max_steps=args.max_steps, win_rooms=set(args.win_room), seed=args.seed, script=script)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+# src/backend/symbols.py
+from __future__ import annotations
+import threading
+from collections.abc import MutableSet
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# -----------------------------
+# Name interning for compiled worlds
+# -----------------------------
+
+# Masks wider than this (e.g. visited rooms of a big world) are decoded bytewise
+WIDE_MASK_BITS = 1024
+_NONZERO = bytes([0] + [1] * 255)  # bytes.translate table: 1 for any set byte
+
+class Symbols:
+    """Interns flag and item names into small integer ids.
+
+    A compiled world shares one table between all of its games. Player state is
+    then a pair of integer bitmasks (bit ``n`` set == symbol ``n`` present), and
+    every visibility/lock gate becomes a couple of mask comparisons.
+
+    The table is append-only: names seen only at runtime (e.g. flags added by the
+    app) are interned on first use, so existing masks never change meaning.
+    Interning a new name takes a lock, since one world (and so one table) is
+    shared by every session thread; lookups of known names stay lock-free.
+    """
+    __slots__ = ("_ids", "_names", "_lock")
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._lock = threading.Lock()
+        for n in names:
+            self.id(n)
+
+    def id(self, name: str) -> int:
+        i = self._ids.get(name)
+        if i is None:
+            with self._lock:
+                i = self._ids.get(name)  # another thread may have won the race
+                if i is None:
+                    self._names.append(name)
+                    i = self._ids[name] = len(self._names) - 1
+        return i
+
+    def bit(self, name: str) -> int:
+        return 1 << self.id(name)
+
+    def mask(self, names: Iterable[str]) -> int:
+        m = 0
+        for n in names:
+            m |= 1 << self.id(n)
+        return m
+
+    def names(self, mask: int) -> Iterator[str]:
+        """Yield the names whose bits are set in ``mask`` (in interning order)."""
+        names = self._names
+        if mask.bit_length() > WIDE_MASK_BITS:
+            # every op on a wide int copies it: take its bytes once and let
+            # bytes.find skip the zero ones (a world's flag masks are sparse)
+            data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+            set_bytes = data.translate(_NONZERO)
+            i = set_bytes.find(1)
+            while i >= 0:
+                byte = data[i]
+                while byte:
+                    low = byte & -byte
+                    yield names[8 * i + low.bit_length() - 1]
+                    byte ^= low
+                i = set_bytes.find(1, i + 1)
+            return
+        while mask:
+            low = mask & -mask
+            yield names[low.bit_length() - 1]
+            mask ^= low
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._ids
+
+
+class BitSet(MutableSet):
+    """A ``set[str]``-compatible view over an integer bitmask.
+
+    Drop-in for the old ``Game.flags`` / ``Game.inventory`` sets: supports
+    ``in``, iteration, ``len``, ``add``/``discard``/``clear`` and the usual set
+    operators (which return plain ``set`` objects). The engine itself reads
+    ``mask`` directly.
+    """
+    __slots__ = ("symbols", "mask")
+
+    def __init__(self, symbols: Symbols, names: Optional[Iterable[str]] = None, mask: int = 0):
+        self.symbols = symbols
+        self.mask = mask
+        if names:
+            self.mask |= symbols.mask(names)
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable[str]) -> set:
+        # results of &, |, -, ^ are plain sets (no symbol table to bind to)
+        return set(it)
+
+    def __contains__(self, name: object) -> bool:
+        i = self.symbols._ids.get(name)  # type: ignore[arg-type]
+        return i is not None and (self.mask >> i) & 1 == 1
+
+    def __iter__(self) -> Iterator[str]:
+        return self.symbols.names(self.mask)
+
+    def __len__(self) -> int:
+        return self.mask.bit_count()
+
+    def add(self, name: str) -> None:
+        self.mask |= 1 << self.symbols.id(name)
+
+    def discard(self, name: str) -> None:
+        i = self.symbols._ids.get(name)
+        if i is not None:
+            self.mask &= ~(1 << i)
+
+    def clear(self) -> None:
+        self.mask = 0
+
+    def copy(self) -> "BitSet":
+        return BitSet(self.symbols, mask=self.mask)
+
+    def __repr__(self) -> str:
+        return f"BitSet({sorted(self)!r})"
@@ -0,0 +1,125 @@
+# src/backend/synth.py
+"""Synthetic world generator (same JSON schema as data/worlds/escape_house_01.json).
+
+Used by the benchmark suite; also handy for load-testing the tools in this
+package on worlds far larger than anything authored by hand.
+
+Usage (from ``src/``)::
+
+    python -m backend.synth /tmp/world_100k.json --rooms 100000
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+DIRECTIONS = ["north", "northeast", "east", "southeast", "south", "southwest", "west", "northwest", "up", "down"]
+
+
+def make_world(rooms: int, exits_per_room: int = 3, interactions: int = 4, overrides: int = 2,
+               global_interactions: int = 3, flags: int = 64, items: int = 32, lock_ratio: float = 0.1,
+               death_ratio: float = 0.02, seed: int = 0) -> Dict[str, Any]:
+    """Build a world dict. Rooms form a ring (r0 -> r1 -> ... -> r0) so every room is reachable;
+    the remaining exits point at random rooms."""
+    rng = random.Random(seed)
+    flag_names = [f"f{i}" for i in range(flags)]
+    item_names = [f"i{i}" for i in range(items)]
+    ids = [f"r{i}" for i in range(rooms)]
+    exits_per_room = max(1, min(exits_per_room, len(DIRECTIONS)))
+
+    def gate(d: Dict[str, Any]) -> Dict[str, Any]:
+        r = rng.random()
+        if r < 0.4:
+            d["visible_if_flags"] = rng.sample(flag_names, 1)
+        elif r < 0.6:
+            d["visible_if_not_flags"] = rng.sample(flag_names, 1)
+        elif r < 0.8:
+            d["visible_if_items"] = rng.sample(item_names, 1)
+        elif r < 0.9:
+            d["visible_if_not_items"] = rng.sample(item_names, 1)
+        return d
+
+    def interaction(iid: str) -> Dict[str, Any]:
+        effects: List[Dict[str, Any]] = []
+        for _ in range(rng.randint(1, 3)):
+            k = rng.random()
+            if k < 0.4:
+                effects.append({"add_flag": rng.choice(flag_names)})
+            elif k < 0.55:
+                effects.append({"remove_flag": rng.choice(flag_names)})
+            elif k < 0.8:
+                effects.append({"add_item": rng.choice(item_names)})
+            else:
+                effects.append({"remove_item": rng.choice(item_names)})
+        if rng.random() < death_ratio:
+            effects.append({"kill_player": True, "cause": rng.choice(["dog", "fall", "trap", "poison"])})
+        elif rng.random() < 0.02:
+            effects.append({"set_room": rng.choice(ids)})
+        return gate({
+            "id": iid,
+            "label": f"Do {iid}",
+            "text": f"You do {iid}.",
+            "once": rng.random() < 0.5,
+            "sort": rng.randint(-5, 5),
+            "effects": effects,
+        })
+
+    out_rooms: Dict[str, Any] = {}
+    for n, rid in enumerate(ids):
+        dirs = rng.sample(DIRECTIONS, exits_per_room)
+        exits: Dict[str, Any] = {}
+        for j, d in enumerate(dirs):
+            to = ids[(n + 1) % rooms] if j == 0 else rng.choice(ids)
+            ex: Dict[str, Any] = {"to": to, "label": f"To {to}"}
+            if j and rng.random() < lock_ratio:
+                if rng.random() < 0.5:
+                    ex["locked_by_item"] = rng.choice(item_names)
+                else:
+                    ex["locked_by_flag"] = rng.choice(flag_names)
+                ex["locked_text"] = "It won't budge."
+            exits[d] = ex
+        out_rooms[rid] = {
+            "id": rid,
+            "name": f"Room {n}",
+            "desc_short": f"Room {n}, briefly.",
+            "desc_long": f"Room {n}, at length. " * 4,
+            "exits": exits,
+            "interactions": [interaction(f"{rid}_a{k}") for k in range(interactions)],
+            "desc_overrides": [gate({"short": f"Room {n} (v{k}).", "long": f"Room {n}, changed (v{k}).",
+                                     "priority": rng.randint(0, 50)}) for k in range(overrides)],
+            "on_look_add_flags": rng.sample(flag_names, 1),
+        }
+
+    return {
+        "title": f"Synthetic {rooms}",
+        "start_room": ids[0],
+        "items": {i: {"id": i, "name": i.upper(), "desc": "Synthetic."} for i in item_names},
+        "global_interactions": [interaction(f"g{k}") for k in range(global_interactions)],
+        "rooms": out_rooms,
+    }
+
+
+def write_world(path: str, rooms: int, **kw: Any) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(make_world(rooms, **kw), f)
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Generate a synthetic Sorque world JSON.")
+    ap.add_argument("out")
+    ap.add_argument("--rooms", type=int, default=1000)
+    ap.add_argument("--exits", type=int, default=3)
+    ap.add_argument("--interactions", type=int, default=4)
+    ap.add_argument("--overrides", type=int, default=2)
+    ap.add_argument("--globals", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    a = ap.parse_args(argv)
+    write_world(a.out, a.rooms, exits_per_room=a.exits, interactions=a.interactions,
+                overrides=a.overrides, global_interactions=a.globals, seed=a.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,393 @@
+# src/backend/trace.py
+"""Action traces: record sessions' clicks, replay them headless.
+
+A trace is a JSON Lines file of segments. A segment starts with a header
+(the world's content hash and the player state it starts from) and is
+followed by one compact line per action: the verb, its argument and the
+outcome -- room after, dead after and a short digest of the message::
+
+    {"trace": 1, "world": "escape_house_01", "world_hash": "418f...", "undo_limit": 100, "state": {...}}
+    ["move", "south", "5", 0, "9c1f04aa"]
+    ["do", "take_corn", "5", 0, "03be7d21"]
+    ["look", "", "5", 0, "77a2e910"]
+    ["restart", "", "1", 0, "51c0e3f2"]
+    ["undo", "1", "5", 0, "03be7d21"]
+
+``Tracer`` records: attach it to a Game (``tracer.attach(game, sid)``) and
+every look/move/do/restart/undo goes to ``<dir>/<sid>.trace.jsonl``, written
+in batches. A new segment starts whenever the session's state object is new
+to the tracer (a fresh, restarted-from-scratch or rehydrated session), so
+every segment replays on its own.
+
+``replay_trace`` re-runs a trace against a headless Game and reports the
+first action whose outcome differs (different room, message or death), e.g.
+after a world edit; ``replay_files`` does many traces across a process pool.
+
+Usage (from ``src/``)::
+
+    python -m backend.trace replay ../data/worlds/escape_house_01.json traces/*.trace.jsonl --workers 4
+    python -m backend.trace record ../data/worlds/escape_house_01.json --games 1000 --out traces/
+"""
+from __future__ import annotations
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+from .oo import EV_DO, EV_LOOK, EV_MOVE, EV_RESTART, EV_UNDO, EventHook, Game, History, PlayerState, World
+from .oo_loader import load_world
+
+TRACE_VERSION = 1
+SUFFIX = ".trace.jsonl"
+
+# Event kind -> (verb, payload key holding the argument)
+_VERBS: Dict[str, Tuple[str, Optional[str]]] = {
+    EV_LOOK: ("look", None), EV_MOVE: ("move", "dir"), EV_DO: ("do", "id"),
+    EV_RESTART: ("restart", None), EV_UNDO: ("undo", "steps"),
+}
+
+Action = Tuple[str, str, str, int, str]  # (verb, arg, room after, dead after, message digest)
+
+
+def digest(message: str) -> str:
+    """Short, stable fingerprint of a message (8 hex chars)."""
+    return hashlib.blake2b(message.encode("utf-8"), digest_size=4).hexdigest()
+
+
+def outcome(game: Game) -> Tuple[str, int, str]:
+    st = game.state
+    return st.current_room_id, int(st.dead), digest(st.last_message or "")
+
+
+# -----------------------------
+# Recording
+# -----------------------------
+
+class _Session:
+    __slots__ = ("state", "lines")
+
+    def __init__(self, state: PlayerState):
+        self.state = state
+        self.lines: List[str] = []
+
+
+class Tracer:
+    """Buffered trace writer, one file per session id.
+
+    Args:
+        directory: where ``<sid>.trace.jsonl`` files go
+        flush_lines: buffered lines per session before they are appended
+        max_sessions: sessions tracked at once; the least recently active
+            is flushed and forgotten (its next action starts a new segment)
+    """
+
+    def __init__(self, directory: os.PathLike | str, flush_lines: int = 64, max_sessions: int = 10_000):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.flush_lines = flush_lines
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"actions": 0, "segments": 0, "writes": 0}
+        atexit.register(self.flush)
+
+    def path(self, sid: str) -> Path:
+        return self.dir / f"{quote(sid, safe='-_')}{SUFFIX}"
+
+    def hook(self, game: Game, sid: str, then: Optional[EventHook] = None) -> EventHook:
+        """An ``on_event`` callback tracing ``game`` under ``sid`` (after calling ``then``)."""
+        self._begin(game, sid)
+
+        def on_event(kind: str, loc_id: str, payload: Dict[str, Any]) -> None:
+            if then is not None:
+                then(kind, loc_id, payload)
+            self.record(game, sid, kind, payload)
+        return on_event
+
+    def attach(self, game: Game, sid: str) -> Game:
+        game.on_event = self.hook(game, sid, game.on_event)
+        return game
+
+    def record(self, game: Game, sid: str, kind: str, payload: Dict[str, Any]) -> None:
+        verb = _VERBS.get(kind)
+        if verb is None:  # deaths are outcomes of the preceding do
+            return
+        name, key = verb
+        line = json.dumps([name, str(payload.get(key, "")) if key else "", *outcome(game)],
+                          separators=(",", ":"))
+        with self._lock:
+            s = self._sessions.get(sid)
+            if s is None or s.state is not game.state:
+                self._begin_locked(game, sid)  # forgotten meanwhile: a new segment starts after this action
+                return
+            self._sessions.move_to_end(sid)
+            s.lines.append(line)
+            self.stats["actions"] += 1
+            if len(s.lines) >= self.flush_lines:
+                self._write(sid, s)
+
+    def flush(self, sid: Optional[str] = None) -> None:
+        """Append buffered lines (one session's, or everyone's)."""
+        with self._lock:
+            for k in ([sid] if sid is not None else list(self._sessions)):
+                s = self._sessions.get(k)
+                if s is not None:
+                    self._write(k, s)
+
+    def resync(self, game: Game, sid: str) -> None:
+        """Start a new segment from ``game``'s current state, after it was
+        changed other than by a verb (e.g. ``load_dict``)."""
+        with self._lock:
+            s = self._sessions.pop(sid, None)
+            if s is not None:
+                self._write(sid, s)
+            self._begin_locked(game, sid)
+
+    def close(self, sid: str) -> None:
+        """Flush and forget a session (its next trace starts a new segment)."""
+        with self._lock:
+            s = self._sessions.pop(sid, None)
+            if s is not None:
+                self._write(sid, s)
+
+    # ---------- internals ----------
+    def _begin(self, game: Game, sid: str) -> None:
+        with self._lock:
+            self._begin_locked(game, sid)
+
+    def _begin_locked(self, game: Game, sid: str) -> _Session:
+        s = self._sessions.get(sid)
+        if s is not None and s.state is game.state:
+            self._sessions.move_to_end(sid)
+            return s
+        if s is not None:
+            self._write(sid, s)
+        s = self._sessions[sid] = _Session(game.state)
+        self._sessions.move_to_end(sid)
+        history = game.history
+        s.lines.append(json.dumps({
+            "trace": TRACE_VERSION,
+            "world": game.world.name,
+            "world_hash": game.world.source_hash,
+            "undo_limit": history.limit if history is not None else 0,
+            "state": game.to_dict(),
+        }, separators=(",", ":")))
+        self.stats["segments"] += 1
+        while len(self._sessions) > self.max_sessions:
+            old, gone = self._sessions.popitem(last=False)
+            self._write(old, gone)
+        return s
+
+    def _write(self, sid: str, s: _Session) -> None:
+        if not s.lines:
+            return
+        with open(self.path(sid), "a", encoding="utf-8") as f:
+            f.write("\n".join(s.lines) + "\n")
+        s.lines.clear()
+        self.stats["writes"] += 1
+
+
+# -----------------------------
+# Replay
+# -----------------------------
+
+class Divergence(NamedTuple):
+    line: int       # 1-based line in the trace file
+    verb: str
+    arg: str
+    field: str      # room | dead | message | state
+    expected: Any
+    got: Any
+
+
+@dataclass
+class TraceResult:
+    path: str
+    actions: int = 0
+    segments: int = 0
+    world_changed: bool = False          # recorded against a different world file
+    divergence: Optional[Divergence] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.divergence is None and self.error is None
+
+    def as_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"path": self.path, "ok": self.ok, "actions": self.actions,
+                               "segments": self.segments, "world_changed": self.world_changed,
+                               "seconds": round(self.seconds, 6)}
+        if self.divergence is not None:
+            out["divergence"] = self.divergence._asdict()
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+
+def read_trace(path: os.PathLike | str) -> Iterator[Tuple[int, Any]]:
+    """(line number, header dict or action list) for each non-empty line."""
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if line.strip():
+                yield n, json.loads(line)
+
+
+def _apply(game: Game, verb: str, arg: str) -> None:
+    if verb == "move":
+        game.move(arg)
+    elif verb == "do":
+        game.do(arg)
+    elif verb == "look":
+        game.look()
+    elif verb == "restart":
+        game.restart()
+    elif verb == "undo":
+        game.undo(int(arg or 1))
+    else:
+        raise ValueError(f"unknown verb '{verb}'")
+
+
+def replay_trace(world: World, path: os.PathLike | str) -> TraceResult:
+    """Re-run every segment of the trace at ``path``; stops at the first divergence."""
+    res = TraceResult(str(path))
+    t0 = time.perf_counter()
+    game: Optional[Game] = None
+    try:
+        for n, rec in read_trace(path):
+            if isinstance(rec, dict):
+                res.segments += 1
+                res.world_changed |= bool(rec.get("world_hash")) and rec["world_hash"] != world.source_hash
+                state = rec.get("state") or {}
+                room = state.get("current_room_id", world.start_room_id)
+                if room not in world.rooms:
+                    res.divergence = Divergence(n, "start", "", "state", room, None)
+                    break
+                limit = int(rec.get("undo_limit") or 0)
+                game = world.new_game(history=History(limit) if limit else None)
+                game.load_dict(state)
+                continue
+            if game is None:
+                raise ValueError("action before the first header")
+            verb, arg, room, dead, msg = rec
+            _apply(game, verb, arg)
+            res.actions += 1
+            got = outcome(game)
+            for field, want, have in (("room", room, got[0]), ("dead", dead, got[1]), ("message", msg, got[2])):
+                if want != have:
+                    res.divergence = Divergence(n, verb, arg, field, want, have)
+                    break
+            if res.divergence is not None:
+                break
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        res.error = f"{type(e).__name__}: {e}"
+    res.seconds = time.perf_counter() - t0
+    return res
+
+
+# Per-worker world: loaded once per process
+_WORKER: Dict[str, World] = {}
+
+
+def _init_worker(world_path: str) -> None:
+    _WORKER["world"] = load_world(world_path)
+
+
+def _replay_one(path: str) -> TraceResult:
+    return replay_trace(_WORKER["world"], path)
+
+
+def replay_files(world_path: str, paths: List[str], workers: Optional[int] = None) -> List[TraceResult]:
+    """Results for ``paths`` in order, across a process pool when ``workers > 1``."""
+    workers = min(workers or os.cpu_count() or 1, max(1, len(paths)))
+    if workers <= 1:
+        _init_worker(world_path)
+        return [_replay_one(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(world_path,)) as pool:
+        return list(pool.map(_replay_one, paths, chunksize=max(1, len(paths) // (workers * 8))))
+
+
+# -----------------------------
+# Synthetic traces (a workload without players)
+# -----------------------------
+
+def record_games(world_path: str, out_dir: str, games: int, policy: str = "random",
+                 max_steps: int = 200, seed: int = 0) -> int:
+    """Play ``games`` simulated sessions (``backend.sim`` policies), one trace
+    file each; returns the number of actions recorded."""
+    from .sim import make_policy, play
+
+    world = load_world(world_path)
+    tracer = Tracer(out_dir)
+    pol = make_policy(policy)
+    for s in range(seed, seed + games):
+        game = world.new_game()
+        sid = f"sim-{s}"
+        tracer.attach(game, sid)
+        play(game, pol, random.Random(s), max_steps, set())
+        tracer.close(sid)
+    return tracer.stats["actions"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Record and replay Sorque action traces.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("replay", help="replay traces and report divergences")
+    rp.add_argument("world", help="path to world JSON")
+    rp.add_argument("traces", nargs="+", help="trace files or directories of them")
+    rp.add_argument("--workers", type=int, default=None, help="processes (default: CPU count; 1 = inline)")
+    rp.add_argument("--json", action="store_true", help="print results as JSON")
+    rc = sub.add_parser("record", help="write traces of simulated games")
+    rc.add_argument("world", help="path to world JSON")
+    rc.add_argument("--out", required=True, help="directory for trace files")
+    rc.add_argument("--games", type=int, default=100)
+    rc.add_argument("--policy", default="random", help="backend.sim policy")
+    rc.add_argument("--max-steps", type=int, default=200)
+    rc.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "record":
+        t0 = time.perf_counter()
+        n = record_games(args.world, args.out, args.games, args.policy, args.max_steps, args.seed)
+        print(f"recorded {args.games} traces, {n} actions in {time.perf_counter() - t0:.2f}s -> {args.out}")
+        return 0
+
+    paths: List[str] = []
+    for p in args.traces:
+        paths += sorted(str(q) for q in Path(p).glob(f"*{SUFFIX}")) if os.path.isdir(p) else [p]
+    t0 = time.perf_counter()
+    results = replay_files(args.world, paths, args.workers)
+    elapsed = time.perf_counter() - t0
+    actions = sum(r.actions for r in results)
+    bad = [r for r in results if not r.ok]
+    if args.json:
+        json.dump({"traces": len(results), "actions": actions, "elapsed_s": round(elapsed, 4),
+                   "actions_per_sec": round(actions / elapsed, 1) if elapsed else None,
+                   "diverged": len(bad), "results": [r.as_dict() for r in results]}, sys.stdout, indent=2)
+        print()
+    else:
+        for r in bad:
+            if r.error is not None:
+                print(f"ERROR {r.path}: {r.error}")
+            else:
+                d = r.divergence
+                print(f"DIVERGED {r.path}:{d.line} {d.verb} {d.arg!r}: {d.field} "
+                      f"expected {d.expected!r}, got {d.got!r}" + (" (world changed)" if r.world_changed else ""))
+        rate = f"{actions / elapsed:,.0f} actions/s" if elapsed else ""
+        print(f"{len(results)} traces, {actions} actions, {len(bad)} diverged  ({elapsed:.2f}s, {rate})")
+    return 1 if bad else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,397 @@
+# src/backend/validate.py
+"""World validator and static analyzer.
+
+Checks world JSON against ``schemas/world.schema.json``, then builds the exit
+graph (exits and ``set_room`` effects, with networkx) and reports:
+
+    errors    schema violations, malformed rooms/exits/interactions the
+              loader can't read, duplicate room ids, exits and set_room
+              targets that point at no room, a start room that doesn't
+              exist, effects the engine would reject
+    warnings  no start room given (the first room is used), rooms
+              unreachable from the start (locks ignored, so this is a
+              lower bound -- backend.explore has the exact answer), items
+              required by locks/gates but never granted by ``add_item``,
+              flags checked by locks/gates but never set
+
+``load_world`` runs the error checks (``check_world``) whenever it compiles a
+world -- when it writes the binary cache (``backend.world_cache``) or the lazy
+index (``backend.lazy``), or on every load with ``use_cache=False`` -- and a
+world with errors does not load. Cache and index hits skip it, having been
+validated when they were written. Either way a loaded World's exits and
+set_room targets always resolve and callers need no per-render guards.
+
+jsonschema takes about 2 ms a room, minutes for a 100k-room world, so only
+this command (``validate_world``'s default) runs the full schema. The loader
+relies on the structural checks ``analyze`` makes anyway: the shapes it and
+the loader read, and every effect through ``compile_effects``.
+
+Usage (from ``src/``)::
+
+    python -m backend.validate ../data/worlds/*.json [--workers 4] [--strict] [--json]
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import jsonschema
+import networkx as nx
+
+from .oo import KILL_KEYS, compile_effects
+
+SCHEMA_PATH = Path(__file__).resolve().parents[2] / "schemas" / "world.schema.json"
+
+# keys _resolve_start_room looks at, in order
+START_KEYS = (("start_room",), ("start",), ("startRoom",), ("meta", "start_room"), ("meta", "start_room_id"))
+
+ERROR, WARNING = "error", "warning"
+
+
+class Issue(NamedTuple):
+    level: str      # ERROR | WARNING
+    code: str       # e.g. "dangling-exit"
+    where: str      # JSON path, e.g. "rooms/4/exits/north"
+    message: str
+
+
+@dataclass
+class Report:
+    path: str
+    issues: List[Issue] = field(default_factory=list)
+    rooms: int = 0
+    exits: int = 0
+    reachable: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def errors(self) -> List[Issue]:
+        return [i for i in self.issues if i.level == ERROR]
+
+    @property
+    def warnings(self) -> List[Issue]:
+        return [i for i in self.issues if i.level == WARNING]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def add(self, level: str, code: str, where: str, message: str) -> None:
+        self.issues.append(Issue(level, code, where, message))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"path": self.path, "ok": self.ok, "rooms": self.rooms, "exits": self.exits,
+                "reachable": self.reachable, "elapsed_s": self.elapsed_s,
+                "issues": [i._asdict() for i in self.issues]}
+
+
+class WorldValidationError(ValueError):
+    """Raised by the loader for a world with errors; ``report`` has them all."""
+
+    def __init__(self, report: Report):
+        first = report.errors[:3]
+        more = len(report.errors) - len(first)
+        super().__init__(f"{report.path}: " + "; ".join(f"{i.where}: {i.message}" for i in first)
+                         + (f" (+{more} more)" if more else ""))
+        self.report = report
+
+
+# -----------------------------
+# Schema
+# -----------------------------
+
+_VALIDATOR: Optional[Any] = None
+
+
+def _validator() -> Any:
+    """The jsonschema validator for world.schema.json, built on first use."""
+    global _VALIDATOR
+    if _VALIDATOR is None:
+        with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+            schema = json.load(f)
+        cls = jsonschema.validators.validator_for(schema)
+        cls.check_schema(schema)
+        _VALIDATOR = cls(schema)
+    return _VALIDATOR
+
+
+def _where(prefix: str, path: Iterable[Any]) -> str:
+    return "/".join([prefix, *map(str, path)]) if prefix else "/".join(map(str, path)) or "/"
+
+
+def _check_schema(world: Any, report: Report) -> bool:
+    """Schema errors into ``report``; False if there are any."""
+    rooms = world.get("rooms") if isinstance(world, dict) else None
+    if isinstance(rooms, Mapping) and type(rooms) is not dict:
+        world = {**world, "rooms": dict(rooms)}  # jsonschema only takes dicts as objects
+    for err in _validator().iter_errors(world):
+        report.add(ERROR, "schema", _where("", err.absolute_path), err.message)
+    return report.ok
+
+
+# -----------------------------
+# Analysis
+# -----------------------------
+
+def _names(v: Any) -> List[str]:
+    if not v:
+        return []
+    return [str(x) for x in v] if type(v) is list else [str(v)]
+
+
+def resolve_start(world: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """(first start-room value given, the key path it came from) or (None, None)."""
+    for keys in START_KEYS:
+        node: Any = world
+        for k in keys:
+            node = node.get(k) if isinstance(node, dict) else None
+        if node is not None:
+            return str(node), "/".join(keys)
+    return None, None
+
+
+_DANGLING = {"dangling-exit": "exit leads to '{}', which is not a room",
+             "dangling-set-room": "set_room target '{}' is not a room"}
+
+
+def analyze(world: Dict[str, Any], report: Report, warnings: bool = True) -> None:
+    """Structural, graph and bookkeeping checks on a world dict. With
+    ``warnings=False`` only errors are looked for (no exit graph is built).
+
+    Needs no schema check first: every shape the loader reads is checked
+    where it is read (``bad-shape``) and every effect goes through the
+    engine's own ``compile_effects``.
+    """
+    raw_rooms = world.get("rooms")
+    if not isinstance(raw_rooms, Mapping) or not raw_rooms:
+        report.add(ERROR, "bad-shape", "rooms", "rooms must be a non-empty object")
+        return
+    ids: Dict[str, str] = {}  # room id -> key it was authored under
+    # (from room id, or None for a global interaction; target; code; where = f"{at}/{name}"),
+    # checked once every id is known so the rooms are walked only once (a lazy world
+    # parses per lookup); ``at`` is shared by a room's exits to keep this list small
+    links: List[Tuple[Optional[str], str, str, str, Any]] = []
+    required: Dict[Tuple[str, str], str] = {}  # ("flag"|"item", name) -> first place it is checked
+    granted: Set[Tuple[str, str]] = set()
+    first: Optional[str] = None
+    exits = 0
+
+    def bad(where: str, message: str) -> None:
+        report.add(ERROR, "bad-shape", where, message)
+
+    def objects(where: str, value: Any) -> List[Tuple[int, Dict[str, Any]]]:
+        """The objects in a list-or-null field, reporting anything else."""
+        if value is None:
+            return []
+        if type(value) is not list:
+            bad(where, "must be a list")
+            return []
+        out = []
+        for n, v in enumerate(value):
+            if type(v) is dict:
+                out.append((n, v))
+            else:
+                bad(f"{where}/{n}", "must be an object")
+        return out
+
+    def link(rid: Optional[str], to: str, code: str, at: str, name: Any) -> None:
+        if warnings or to not in ids:  # without the graph only unresolved targets are kept
+            links.append((rid, to, code, at, name))
+
+    def interaction(where: str, it: Dict[str, Any], rid: Optional[str]) -> None:
+        if "id" not in it:
+            bad(where, "interaction needs an 'id'")
+        for n, eff in objects(f"{where}/effects", it.get("effects")):
+            try:
+                compile_effects([eff])
+            except ValueError as e:
+                report.add(ERROR, "bad-effect", f"{where}/effects/{n}", str(e))
+                continue
+            if "set_room" in eff:
+                link(rid, str(eff["set_room"]), "dangling-set-room", f"{where}/effects", n)
+            if warnings and "add_flag" in eff:
+                granted.add(("flag", eff["add_flag"]))
+            if warnings and "add_item" in eff:
+                granted.add(("item", eff["add_item"]))
+        if warnings:
+            if it.get("once"):
+                granted.add(("flag", f"done:{it.get('id')}"))
+            gate(where, it)
+
+    def gate(where: str, obj: Dict[str, Any]) -> None:
+        for name in _names(obj.get("visible_if_flags")):
+            required.setdefault(("flag", name), where)
+        for name in _names(obj.get("visible_if_items")):
+            required.setdefault(("item", name), where)
+
+    for n, it in objects("global_interactions", world.get("global_interactions")):
+        interaction(f"global_interactions/{n}", it, None)
+
+    for key, r in raw_rooms.items():
+        if type(r) is not dict:
+            bad(f"rooms/{key}", "room must be an object")
+            continue
+        rid = str(r.get("id", key))
+        if rid in ids:
+            report.add(ERROR, "duplicate-room", f"rooms/{key}", f"room id '{rid}' also used by rooms/{ids[rid]}")
+        elif first is None:
+            first = rid
+        ids[rid] = key
+        at = f"rooms/{key}/exits"
+        room_exits = r.get("exits") or {}
+        if type(room_exits) is not dict:
+            bad(at, "exits must be an object")
+            room_exits = {}
+        for d, ex in room_exits.items():
+            if type(ex) is not dict or type(ex.get("to")) not in (str, int):
+                bad(f"{at}/{d}", "exit must be an object with a room id in 'to'")
+                continue
+            exits += 1
+            link(rid, str(ex["to"]), "dangling-exit", at, d)
+            for lock in ("locked_by_item", "locked_by_flag"):
+                if not isinstance(ex.get(lock), (str, type(None))):
+                    bad(f"{at}/{d}/{lock}", f"{lock} must be a name")
+                elif warnings and ex.get(lock):
+                    required.setdefault(("item" if lock == "locked_by_item" else "flag", ex[lock]), f"{at}/{d}")
+        for n, it in objects(f"rooms/{key}/interactions", r.get("interactions")):
+            interaction(f"rooms/{key}/interactions/{n}", it, rid)
+        overrides = objects(f"rooms/{key}/desc_overrides", r.get("desc_overrides"))
+        if not warnings:  # the rest only feeds the never-granted/never-set warnings
+            continue
+        for n, ov in overrides:
+            gate(f"rooms/{key}/desc_overrides/{n}", ov)
+        for name in _names(r.get("on_look_add_flags")):
+            granted.add(("flag", name))
+    report.rooms = len(ids)
+    report.exits = exits
+
+    start, start_key = resolve_start(world)
+    if start is None:
+        start = first
+        report.add(WARNING, "no-start-room", "/", f"no start_room given; the first room '{start}' is used")
+    elif start not in ids:
+        report.add(ERROR, "missing-start-room", start_key, f"start room '{start}' is not a room")
+        start = None
+
+    edges: List[Tuple[str, str]] = []
+    teleports: List[str] = []  # set_room targets of global interactions: reachable from anywhere
+    for rid, to, code, at, name in links:
+        if to not in ids:
+            report.add(ERROR, code, f"{at}/{name}", _DANGLING[code].format(to))
+        elif not warnings:
+            continue
+        elif rid is None:
+            teleports.append(to)
+        else:
+            edges.append((rid, to))
+    if not warnings:
+        return
+
+    if start is not None:
+        g = nx.DiGraph()
+        g.add_nodes_from(ids)
+        g.add_edges_from(edges)
+        reach = nx.descendants(g, start) | {start}
+        for to in teleports:
+            if to not in reach:
+                reach |= nx.descendants(g, to) | {to}
+        report.reachable = len(reach)
+        for rid, key in ids.items():
+            if rid not in reach:
+                report.add(WARNING, "unreachable-room", f"rooms/{key}", f"room '{rid}' can't be reached from '{start}'")
+    for (kind, name), where in required.items():
+        if (kind, name) in granted:
+            continue
+        if kind == "item":
+            report.add(WARNING, "item-never-granted", where, f"item '{name}' is required but no add_item grants it")
+        else:
+            report.add(WARNING, "flag-never-set", where, f"flag '{name}' is checked but never set")
+
+
+def validate_world(world: Any, path: str = "<world>", warnings: bool = True, schema: bool = True) -> Report:
+    """Every issue in a parsed world JSON document (errors only with
+    ``warnings=False``; without the jsonschema pass with ``schema=False``).
+    ``world["rooms"]`` may be any mapping of room key to room JSON, e.g.
+    ``backend.lazy.LazyRooms.raw_rooms``."""
+    t0 = time.perf_counter()
+    report = Report(path)
+    if schema:
+        ok = _check_schema(world, report)
+    else:
+        ok = isinstance(world, dict)
+        if not ok:
+            report.add(ERROR, "bad-shape", "/", "a world must be a JSON object")
+    if ok:
+        analyze(world, report, warnings)
+    report.elapsed_s = round(time.perf_counter() - t0, 4)
+    return report
+
+
+def validate_file(path: str) -> Report:
+    try:
+        with open(path, "rb") as f:
+            world = json.loads(f.read())
+    except (OSError, ValueError) as e:
+        report = Report(path)
+        report.add(ERROR, "unreadable", "/", str(e))
+        return report
+    return validate_world(world, path)
+
+
+def check_world(world: Any, path: str = "<world>") -> Report:
+    """The loader's check: the errors ``analyze`` finds (no warnings, which
+    never stop a load, and no jsonschema pass; see the module docstring),
+    raising WorldValidationError if there are any."""
+    report = validate_world(world, path, warnings=False, schema=False)
+    if not report.ok:
+        raise WorldValidationError(report)
+    return report
+
+
+def validate_files(paths: List[str], workers: int = 1) -> List[Report]:
+    """Reports for ``paths`` in order, across a process pool when ``workers > 1``."""
+    if workers <= 1 or len(paths) <= 1:
+        return [validate_file(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        return list(pool.map(validate_file, paths))
+
+
+def _print_report(r: Report, max_issues: int) -> None:
+    status = "ok" if r.ok else "FAILED"
+    print(f"{r.path}: {status}  rooms={r.rooms} exits={r.exits} reachable={r.reachable}  "
+          f"{len(r.errors)} errors, {len(r.warnings)} warnings  ({r.elapsed_s}s)")
+    for i in r.issues[:max_issues]:
+        print(f"  {i.level:<7} {i.code:<20} {i.where}: {i.message}")
+    if len(r.issues) > max_issues:
+        print(f"  ... {len(r.issues) - max_issues} more")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Validate Sorque world JSON files.")
+    ap.add_argument("worlds", nargs="+", help="world JSON files")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes when given several files")
+    ap.add_argument("--strict", action="store_true", help="fail on warnings too")
+    ap.add_argument("--max-issues", type=int, default=50, help="issues printed per file")
+    ap.add_argument("--json", action="store_true", help="print the reports as JSON")
+    args = ap.parse_args(argv)
+
+    reports = validate_files(args.worlds, args.workers)
+    if args.json:
+        json.dump([r.as_dict() for r in reports], sys.stdout, indent=2)
+        print()
+    else:
+        for r in reports:
+            _print_report(r, args.max_issues)
+    failed = [r for r in reports if not r.ok or (args.strict and r.warnings)]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
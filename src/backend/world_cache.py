@@ -0,0 +1,160 @@
+# src/backend/world_cache.py
+"""Precompiled binary world cache.
+
+A loaded world (rooms, resolved start room, global interactions, compiled
+effect ops) is flattened to plain tuples and written with ``marshal`` next to
+the source as ``<world>.json.worldc``. The header carries a format version and
+the SHA-256 of the source bytes; a cache is only used when both match, so
+editing the JSON (or bumping FORMAT_VERSION) invalidates it automatically.
+
+Loading mmaps the file and unmarshals straight from the mapping, skipping JSON
+parsing, effect compilation and validation.
+
+Usage (from ``src/``)::
+
+    python -m backend.world_cache ../data/worlds/*.json     # (re)compile caches
+"""
+from __future__ import annotations
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from .oo import DescOverride, Exit, Interaction, Room, names
+
+FORMAT_VERSION = 3  # 3: only validated worlds are cached
+MAGIC = b"SORQWC\r\n"
+_HEADER = struct.Struct("<8sI32s")  # magic, format version, sha256(source)
+SUFFIX = ".worldc"
+
+CompiledWorld = Tuple[Dict[str, Room], str, List[Interaction]]  # (rooms, start_room_id, global_interactions)
+
+
+def cache_path(json_path: str) -> str:
+    return json_path + SUFFIX
+
+
+def source_hash(raw: bytes) -> bytes:
+    return hashlib.sha256(raw).digest()
+
+
+def file_hash(path: str, chunk: int = 1 << 20) -> bytes:
+    """``source_hash`` of a file's bytes, read a chunk at a time."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.digest()
+
+
+# -----------------------------
+# Flattening
+# -----------------------------
+
+def _pack_interaction(it: Interaction) -> tuple:
+    return (it.id, it.label, it.text, it.once,
+            tuple(it.visible_if_flags), tuple(it.visible_if_not_flags),
+            tuple(it.visible_if_items), tuple(it.visible_if_not_items),
+            it.sort, it.ops)
+
+
+def _unpack_interaction(t: tuple) -> Interaction:
+    return Interaction(id=t[0], label=t[1], text=t[2], once=t[3],
+                       visible_if_flags=names(t[4]), visible_if_not_flags=names(t[5]),
+                       visible_if_items=names(t[6]), visible_if_not_items=names(t[7]),
+                       sort=t[8], ops=t[9])
+
+
+def _pack_room(r: Room) -> tuple:
+    exits = tuple((ex.direction, ex.to_room, ex.locked_by_item, ex.locked_by_flag, ex.locked_text, ex.label)
+                  for ex in r.exits.values())
+    overrides = tuple((ov.short, ov.long, tuple(ov.visible_if_flags), tuple(ov.visible_if_not_flags),
+                       tuple(ov.visible_if_items), tuple(ov.visible_if_not_items), ov.priority)
+                      for ov in r.desc_overrides)
+    return (r.id, r.name, r.desc_short, r.desc_long, exits,
+            tuple(_pack_interaction(it) for it in r.interactions),
+            tuple(r.on_look_add_flags), overrides)
+
+
+def _unpack_room(t: tuple) -> Room:
+    return Room(
+        id=t[0], name=t[1], desc_short=t[2], desc_long=t[3],
+        exits={e[0]: Exit(direction=e[0], to_room=e[1], locked_by_item=e[2], locked_by_flag=e[3],
+                          locked_text=e[4], label=e[5]) for e in t[4]},
+        interactions=tuple(_unpack_interaction(i) for i in t[5]),
+        on_look_add_flags=names(t[6]),
+        desc_overrides=tuple(DescOverride(short=o[0], long=o[1], visible_if_flags=names(o[2]),
+                                          visible_if_not_flags=names(o[3]), visible_if_items=names(o[4]),
+                                          visible_if_not_items=names(o[5]), priority=o[6]) for o in t[7]),
+    )
+
+
+# -----------------------------
+# Read / write
+# -----------------------------
+
+def save(json_path: str, raw: bytes, rooms: Dict[str, Room], start: str,
+         global_interactions: List[Interaction]) -> Optional[str]:
+    """Write the cache atomically. Returns its path, or None if it couldn't be written."""
+    payload = marshal.dumps((start,
+                             tuple(_pack_room(r) for r in rooms.values()),
+                             tuple(_pack_interaction(it) for it in global_interactions)))
+    dest = cache_path(json_path)
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, source_hash(raw)))
+            f.write(payload)
+        os.replace(tmp, dest)
+    except OSError:
+        return None  # read-only checkout etc. — caching is best-effort
+    return dest
+
+
+def load(json_path: str, raw: bytes) -> Optional[CompiledWorld]:
+    """Return the cached world if a cache exists for exactly these source bytes."""
+    path = cache_path(json_path)
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return None
+        with mm:
+            if len(mm) < _HEADER.size:
+                return None
+            magic, version, digest = _HEADER.unpack_from(mm)
+            if magic != MAGIC or version != FORMAT_VERSION or digest != source_hash(raw):
+                return None
+            view = memoryview(mm)[_HEADER.size:]
+            try:
+                start, rooms_t, globals_t = marshal.loads(view)
+            except (EOFError, ValueError, TypeError):
+                return None
+            finally:
+                view.release()
+    rooms = {t[0]: _unpack_room(t) for t in rooms_t}
+    return rooms, start, [_unpack_interaction(t) for t in globals_t]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .oo_loader import compile_world_file
+    paths = argv if argv is not None else sys.argv[1:]
+    if not paths:
+        print("usage: python -m backend.world_cache WORLD.json [...]")
+        return 2
+    for p in paths:
+        out = compile_world_file(p)
+        print(f"{p} -> {out or 'FAILED (not writable)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1 @@
+"""Headless asyncio game server (JSON over HTTP and WebSocket) for the Python engine."""
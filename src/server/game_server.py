@@ -0,0 +1,435 @@
+# src/server/game_server.py
+"""Asyncio JSON game server: many sessions, one shared World.
+
+Each session is a ``Game`` view over the loaded World and its own tiny
+PlayerState; engine calls take microseconds, so they run inline on the event
+loop (no threads, no locks).
+
+HTTP (JSON bodies, keep-alive)::
+
+    POST   /sessions                      new session -> {"session": id, ...view}
+    GET    /sessions/<id>                 view: room, message, dead, inventory, compass, interactions
+    GET    /sessions/<id>/compass         {"compass": [...]}
+    GET    /sessions/<id>/interactions    {"interactions": [{"id", "label"}]}
+    POST   /sessions/<id>/look
+    POST   /sessions/<id>/move            {"dir": "north"}
+    POST   /sessions/<id>/do              {"id": "take_hatchet"}
+    POST   /sessions/<id>/travel          {"to": "3"} (shortest unlocked route to a visited room)
+    POST   /sessions/<id>/restart
+    POST   /sessions/<id>/save            -> {"state": to_dict()} (also stored with --db)
+    POST   /sessions/<id>/load            {"state": {...}} (or, with --db, the stored state)
+    DELETE /sessions/<id>
+    GET    /stats
+    GET    /metrics                       Prometheus text (``?format=json``: JSON snapshot); needs --metrics
+
+WebSocket ``/ws`` (``?session=<id>`` to attach, else a new session): send
+``{"op": "move", "dir": "north", "rid": 7}``, get ``{"rid": 7, "ok": true, ...}``
+back; ops are the same as the HTTP paths (plus ``state``).
+
+Bad requests get a 4xx with ``{"error": ...}``; an unexpected exception is
+logged and answered with a 500 (over WebSocket: ``"status": 500``), and the
+connection stays up.
+
+Usage (from ``src/``)::
+
+    python -m server.game_server ../data/worlds/escape_house_01.json --port 8080 [--db ../data/sorque.db]
+        [--spill /tmp/sorque-sessions --max-sessions 10000 --max-mb 64 --idle 1800]
+        [--metrics [--metrics-json /tmp/sorque-metrics.json]] [--traces /tmp/sorque-traces]
+
+Live sessions are held by an ``adapters.sessions.SessionManager``: past the
+budget or idle time they are spilled to ``--spill`` (or the ``--db`` table)
+and loaded back on their next request. With ``--traces`` every session's
+actions are recorded for ``python -m backend.trace replay``.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from adapters.sessions import FileStore, SessionManager
+from backend import metrics
+from backend.oo import Game, World
+from backend.oo_loader import load_world
+from backend.trace import Tracer
+from .protocol import (OP_TEXT, ProtocolError, Request, json_response, read_request, text_response,
+                       ws_frame, ws_handshake_response, ws_read_message)
+
+Payload = Dict[str, Any]
+
+MAX_TEXT = 4096  # longest death_cause/death_message/last_message a loaded state may carry
+
+log = logging.getLogger(__name__)
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def view(game: Game) -> Payload:
+    """Everything a client needs to draw the current state."""
+    st = game.state
+    room = game.room
+    return {
+        "room": {"id": room.id, "name": room.name},
+        "message": st.last_message,
+        "dead": st.dead,
+        "inventory": sorted(game.inventory),
+        "compass": game.compass(),
+        "interactions": [{"id": it.id, "label": it.label} for it in game.visible_interactions()],
+    }
+
+
+def _arg(args: Payload, name: str) -> str:
+    value = args.get(name)
+    if not isinstance(value, str) or not value:
+        raise ApiError(400, f"missing '{name}'")
+    return value
+
+
+def _is_names(value: Any, limit: int) -> bool:
+    return isinstance(value, list) and len(value) <= limit and all(isinstance(v, str) for v in value)
+
+
+def _check_state(game: Game, data: Payload) -> None:
+    """Reject a ``load`` state that ``Game.load_dict`` cannot take whole.
+
+    Flags and items must already be in the world's symbol table: loading
+    would otherwise intern them into the table every session shares, so a
+    client could widen every player's masks.
+    """
+    room = data.get("current_room_id", game.start_room_id)
+    if not isinstance(room, str) or room not in game.rooms:
+        raise ApiError(400, "state refers to an unknown room")
+    symbols = game.world.symbols
+    for key in ("flags", "inventory"):
+        names = data.get(key, [])
+        if not _is_names(names, len(symbols)):
+            raise ApiError(400, f"state '{key}' must be a list of at most {len(symbols)} strings")
+        unknown = next((n for n in names if n not in symbols), None)
+        if unknown is not None:
+            raise ApiError(400, f"state '{key}' has unknown name '{unknown[:80]}'")
+    if not _is_names(data.get("visited", []), len(game.rooms)):
+        raise ApiError(400, f"state 'visited' must be a list of at most {len(game.rooms)} room ids")
+    if not isinstance(data.get("dead", False), bool):
+        raise ApiError(400, "state 'dead' must be true or false")
+    for key in ("death_cause", "death_message", "last_message"):
+        text = data.get(key, "")
+        if not isinstance(text, str) or len(text) > MAX_TEXT:
+            raise ApiError(400, f"state '{key}' must be a string of at most {MAX_TEXT} characters")
+
+
+class GameServer:
+    """Routes JSON requests to per-session Games over one World.
+
+    Args:
+        world: the loaded World every session plays
+        storage: optional ``adapters.storage.Storage`` backing save/load
+        sessions: the live sessions (default: a SessionManager spilling idle
+            sessions to ``storage``, or keeping them all without one)
+        tracer: optional ``backend.trace.Tracer`` recording every session
+    """
+
+    def __init__(self, world: World, storage: Any = None, sessions: Optional[SessionManager] = None,
+                 tracer: Optional[Tracer] = None):
+        self.world = world
+        self.storage = storage
+        self.sessions = sessions if sessions is not None else SessionManager(world, storage)
+        self.tracer = tracer
+        self.stats: Counter = Counter()
+        self.started = time.time()
+        self._ops: Dict[str, Callable[[Game, str, Payload], Payload]] = {
+            "state": lambda g, sid, a: view(g),
+            "compass": lambda g, sid, a: {"compass": g.compass()},
+            "interactions": lambda g, sid, a: {"interactions": view(g)["interactions"]},
+            "look": self._look,
+            "move": self._move,
+            "do": self._do,
+            "travel": self._travel,
+            "restart": self._restart,
+            "save": self._save,
+            "load": self._load,
+        }
+
+    # ---------- sessions ----------
+    def create_session(self) -> Tuple[str, Game]:
+        sid, game = self.sessions.create()
+        game.state.last_message = game.desc_short()
+        if self.tracer is not None:
+            self.tracer.attach(game, sid)
+        self.stats["sessions_created"] += 1
+        return sid, game
+
+    def session(self, sid: str) -> Game:
+        game = self.sessions.get(sid)
+        if game is None:
+            raise ApiError(404, f"unknown session '{sid}'")
+        if not game.state.last_message:  # rehydrated after an eviction
+            game.state.last_message = game.desc_short()
+        if self.tracer is not None and game.on_event is None:  # rehydrated: a new trace segment
+            self.tracer.attach(game, sid)
+        return game
+
+    def drop_session(self, sid: str) -> None:
+        if not self.sessions.drop(sid):
+            raise ApiError(404, f"unknown session '{sid}'")
+        if self.tracer is not None:
+            self.tracer.close(sid)
+
+    def dispatch(self, sid: str, op: str, args: Payload) -> Payload:
+        """Run one op against a session; the reply payload."""
+        fn = self._ops.get(op)
+        if fn is None:
+            raise ApiError(404, f"unknown op '{op}'")
+        self.stats[f"op_{op}"] += 1
+        return fn(self.session(sid), sid, args)
+
+    def snapshot_stats(self) -> Payload:
+        return {"sessions": self.sessions.snapshot_stats(), "uptime_s": round(time.time() - self.started, 1),
+                **dict(self.stats)}
+
+    # ---------- ops ----------
+    def _look(self, game: Game, sid: str, args: Payload) -> Payload:
+        game.look()
+        return view(game)
+
+    def _move(self, game: Game, sid: str, args: Payload) -> Payload:
+        game.move(_arg(args, "dir"))
+        return view(game)
+
+    def _do(self, game: Game, sid: str, args: Payload) -> Payload:
+        game.do(_arg(args, "id"))
+        return view(game)
+
+    def _travel(self, game: Game, sid: str, args: Payload) -> Payload:
+        if game.travel(_arg(args, "to")) is None:
+            raise ApiError(400, "no open route to that room")
+        return view(game)
+
+    def _restart(self, game: Game, sid: str, args: Payload) -> Payload:
+        game.restart()
+        game.state.last_message = game.desc_short()
+        return view(game)
+
+    def _save(self, game: Game, sid: str, args: Payload) -> Payload:
+        if self.storage is not None:
+            self.storage.save(sid, game)
+        return {"state": game.to_dict()}
+
+    def _load(self, game: Game, sid: str, args: Payload) -> Payload:
+        data = args.get("state")
+        if data is None and self.storage is not None:
+            data = self.storage.load(sid)
+        if not isinstance(data, dict):
+            raise ApiError(400 if self.storage is None else 404, "no state to load")
+        _check_state(game, data)
+        scratch = Game.from_world(game.world)  # swapped in only once fully loaded
+        scratch.load_dict(data)
+        game.state = scratch.state
+        game.state.last_message = game.desc_short()
+        if self.tracer is not None:
+            self.tracer.resync(game, sid)
+        return view(game)
+
+    # ---------- HTTP ----------
+    def route(self, req: Request) -> Tuple[int, Any]:
+        """(status, JSON payload), or (status, text) for Prometheus ``/metrics``."""
+        parts = [p for p in req.path.split("/") if p]
+        if parts == ["stats"] and req.method == "GET":
+            return 200, self.snapshot_stats()
+        if parts == ["metrics"] and req.method == "GET":
+            if metrics.ACTIVE is None:
+                raise ApiError(404, "metrics are off (start the server with --metrics)")
+            if req.query.get("format") == "json":
+                return 200, metrics.ACTIVE.snapshot()
+            return 200, metrics.ACTIVE.to_prometheus()
+        if not parts or parts[0] != "sessions":
+            raise ApiError(404, f"no route for {req.method} {req.path}")
+        if len(parts) == 1:
+            if req.method != "POST":
+                raise ApiError(405, "use POST /sessions")
+            sid, game = self.create_session()
+            return 201, {"session": sid, **view(game)}
+        sid = parts[1]
+        if len(parts) == 2:
+            if req.method == "GET":
+                return 200, self.dispatch(sid, "state", {})
+            if req.method == "DELETE":
+                self.drop_session(sid)
+                return 200, {"deleted": sid}
+            raise ApiError(405, "use GET or DELETE")
+        if len(parts) != 3:
+            raise ApiError(404, f"no route for {req.method} {req.path}")
+        op = parts[2]
+        read_only = op in ("compass", "interactions", "state")
+        if req.method != ("GET" if read_only else "POST"):
+            raise ApiError(405, f"use {'GET' if read_only else 'POST'} for '{op}'")
+        try:
+            args = req.json()
+        except ValueError as e:
+            raise ApiError(400, f"bad JSON: {e}")
+        return 200, self.dispatch(sid, op, args)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """One client connection: HTTP requests until close, or a WebSocket."""
+        try:
+            while True:
+                try:
+                    req = await read_request(reader)
+                except (ProtocolError, ValueError) as e:
+                    writer.write(json_response(400, {"error": str(e)}, keep_alive=False))
+                    break
+                if req is None:
+                    break
+                if req.wants_websocket and req.path == "/ws":
+                    await self._websocket(req, reader, writer)
+                    break
+                self.stats["http_requests"] += 1
+                try:
+                    status, payload = self.route(req)
+                except ApiError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception:
+                    log.exception("error handling %s %s", req.method, req.path)
+                    self.stats["errors"] += 1
+                    status, payload = 500, {"error": "internal server error"}
+                if isinstance(payload, str):
+                    writer.write(text_response(status, payload, req.keep_alive))
+                else:
+                    writer.write(json_response(status, payload, req.keep_alive))
+                await writer.drain()
+                if not req.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # ---------- WebSocket ----------
+    async def _websocket(self, req: Request, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(ws_handshake_response(req))
+        self.stats["ws_connections"] += 1
+        sid = req.query.get("session")
+        try:
+            game = self.session(sid) if sid else None
+        except ApiError:
+            game = None
+        if game is None:
+            sid, game = self.create_session()
+        hello: Payload = {"session": sid, **view(game)}
+        writer.write(ws_frame(OP_TEXT, json.dumps(hello).encode("utf-8")))
+        await writer.drain()
+        while True:
+            try:
+                raw = await ws_read_message(reader, writer)
+            except ProtocolError:
+                break
+            if raw is None:
+                break
+            self.stats["ws_messages"] += 1
+            reply: Payload
+            msg: Any = {}
+            try:
+                msg = json.loads(raw)
+                if not isinstance(msg, dict):
+                    msg = {}
+                    raise ApiError(400, "message must be a JSON object")
+                reply = {"ok": True, **self.dispatch(sid, str(msg.get("op", "")), msg)}
+            except ApiError as e:
+                reply = {"ok": False, "error": str(e), "status": e.status}
+            except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                reply = {"ok": False, "error": f"bad JSON: {e}", "status": 400}
+            except Exception:
+                log.exception("error handling ws op %r", msg.get("op"))
+                self.stats["errors"] += 1
+                reply = {"ok": False, "error": "internal server error", "status": 500}
+            if "rid" in msg:
+                reply["rid"] = msg["rid"]
+            writer.write(ws_frame(OP_TEXT, json.dumps(reply, separators=(",", ":")).encode("utf-8")))
+            await writer.drain()
+
+
+def raise_fd_limit() -> int:
+    """Lift the open-file soft limit to the hard limit (one fd per connection)."""
+    try:
+        import resource
+    except ImportError:  # not on Windows
+        return -1
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+async def serve(server: GameServer, host: str, port: int, backlog: int = 4096) -> None:
+    srv = await asyncio.start_server(server.handle, host, port, backlog=backlog)
+    print(f"serving {len(server.world.rooms)} rooms on http://{host}:{port}  (ws://{host}:{port}/ws)", flush=True)
+    sweeper = asyncio.create_task(_sweep_idle(server.sessions))
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        sweeper.cancel()
+
+
+async def _sweep_idle(sessions: SessionManager, every_s: float = 30.0) -> None:
+    """Spill idle sessions even when no requests arrive to do it. The store
+    writes run in the default executor, so a big sweep does not stall the loop."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(every_s)
+        spilled = sessions.take_idle()
+        if spilled:
+            await loop.run_in_executor(None, sessions.write_spilled, spilled)
+
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Serve the Sorque engine over JSON HTTP and WebSocket.")
+    ap.add_argument("world", help="path to world JSON")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--db", help="SQLite file for save/load (player_world_state)")
+    ap.add_argument("--spill", help="directory for evicted sessions (default: the --db table)")
+    ap.add_argument("--max-sessions", type=int, default=10_000, help="resident session budget")
+    ap.add_argument("--max-mb", type=float, help="resident session memory budget (approximate)")
+    ap.add_argument("--idle", type=float, default=30 * 60, help="evict sessions idle this many seconds")
+    ap.add_argument("--metrics", action="store_true", help="time engine calls; serve them on GET /metrics")
+    ap.add_argument("--metrics-json", help="also rewrite this JSON snapshot every 10 s (implies --metrics)")
+    ap.add_argument("--profile-every", type=int, default=0, help="cProfile every Nth engine call (with --metrics)")
+    ap.add_argument("--metrics-per-room", action="store_true",
+                    help="label metric series by room too (small worlds only: one series per op per room)")
+    ap.add_argument("--traces", help="record every session's actions to this directory")
+    args = ap.parse_args(argv)
+
+    if args.metrics or args.metrics_json:
+        m = metrics.enable(profile_every=args.profile_every, per_room=args.metrics_per_room)
+        if args.metrics_json:
+            m.start_autosave(args.metrics_json)
+
+    storage = None
+    if args.db:
+        from adapters.storage import Storage
+        storage = Storage(args.db)
+    world = load_world(args.world)
+    sessions = SessionManager(world, FileStore(args.spill) if args.spill else storage,
+                              max_sessions=args.max_sessions, idle_s=args.idle,
+                              max_bytes=int(args.max_mb * 2 ** 20) if args.max_mb else None)
+    raise_fd_limit()
+    try:
+        asyncio.run(serve(GameServer(world, storage, sessions, Tracer(args.traces) if args.traces else None),
+                          args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if storage is not None:
+            storage.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
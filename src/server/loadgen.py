@@ -0,0 +1,206 @@
+# src/server/loadgen.py
+"""Load generator for ``server.game_server``.
+
+Opens ``--sessions`` concurrent sessions (each on its own WebSocket, or over
+a pool of ``--connections`` keep-alive HTTP connections with ``--mode
+http``) and has every session play random clicks -- look, unlocked exits,
+visible interactions, restart after a death -- for ``--duration`` seconds.
+Reports request latency percentiles and throughput.
+
+Usage (from ``src/``; start the server first)::
+
+    python -m server.game_server ../data/worlds/escape_house_01.json --port 8080
+    python -m server.loadgen --port 8080 --sessions 1000,5000,10000 --duration 20
+
+Every connection needs a file descriptor on both ends: 10k WebSocket
+sessions on one machine need ``ulimit -n`` above 20k.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .game_server import raise_fd_limit
+from .protocol import OP_TEXT, ProtocolError, json_request, read_response, ws_connect, ws_frame, ws_read_message
+
+Payload = Dict[str, Any]
+
+
+def choose(state: Payload, rng: random.Random) -> Payload:
+    """A random click available in ``state`` (a server view)."""
+    if state.get("dead"):
+        return {"op": "restart"}
+    acts: List[Payload] = [{"op": "look"}]
+    acts += [{"op": "move", "dir": ex["direction"]} for ex in state.get("compass", ()) if not ex["locked"]]
+    acts += [{"op": "do", "id": it["id"]} for it in state.get("interactions", ())]
+    return rng.choice(acts)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[i]
+
+
+class Run:
+    def __init__(self, host: str, port: int, duration: float, think: float, seed: int):
+        self.host, self.port = host, port
+        self.duration = duration
+        self.think = think
+        self.seed = seed
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.connect_errors = 0
+        self.settled = 0  # ws sessions past their handshake, either way
+        self.ready = asyncio.Event()
+        self.stop_at = 0.0
+
+    async def _pace(self, rng: random.Random, sessions: int = 1) -> None:
+        """Think time between clicks, shared out over a connection's sessions."""
+        await asyncio.sleep(rng.uniform(0, 2 * self.think / sessions) if self.think else 0)
+
+    # ---------- WebSocket: one connection per session ----------
+    async def ws_session(self, i: int, connect_gate: asyncio.Semaphore) -> None:
+        rng = random.Random(self.seed * 1_000_003 + i)
+        try:
+            async with connect_gate:
+                reader, writer = await ws_connect(self.host, self.port)
+                state = json.loads(await ws_read_message(reader, writer, mask=True) or b"{}")
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ProtocolError, ValueError):
+            self.connect_errors += 1
+            return
+        finally:
+            self.settled += 1
+        await self.ready.wait()
+        await self._pace(rng)  # stagger the first clicks
+        try:
+            rid = 0
+            while time.perf_counter() < self.stop_at:
+                rid += 1
+                msg = choose(state, rng)
+                msg["rid"] = rid
+                t0 = time.perf_counter()
+                writer.write(ws_frame(OP_TEXT, json.dumps(msg).encode("utf-8"), mask=True))
+                raw = await ws_read_message(reader, writer, mask=True)
+                self.latencies.append(time.perf_counter() - t0)
+                reply = json.loads(raw or b"{}")
+                if not reply.get("ok"):
+                    self.errors += 1
+                else:
+                    state = reply
+                await self._pace(rng)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ProtocolError, ValueError):
+            self.errors += 1
+        finally:
+            writer.close()
+
+    # ---------- HTTP: sessions multiplexed over a connection pool ----------
+    async def http_worker(self, sessions: List[Tuple[str, Payload]], w: int) -> None:
+        rng = random.Random(self.seed * 1_000_003 + w)
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except OSError:
+            self.connect_errors += 1
+            return
+        host = f"{self.host}:{self.port}"
+        try:
+            # create this worker's sessions
+            for k in range(len(sessions)):
+                writer.write(json_request("POST", "/sessions", host))
+                status, body = await read_response(reader)
+                data = json.loads(body)
+                sessions[k] = (data["session"], data)
+            await self.ready.wait()
+            await self._pace(rng, len(sessions))
+            k = 0
+            while time.perf_counter() < self.stop_at and sessions:
+                sid, state = sessions[k]
+                msg = choose(state, rng)
+                op = msg.pop("op")
+                t0 = time.perf_counter()
+                writer.write(json_request("POST", f"/sessions/{sid}/{op}", host, msg))
+                status, body = await read_response(reader)
+                self.latencies.append(time.perf_counter() - t0)
+                if status != 200:
+                    self.errors += 1
+                else:
+                    sessions[k] = (sid, json.loads(body))
+                k = (k + 1) % len(sessions)
+                await self._pace(rng, len(sessions))
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ProtocolError, ValueError):
+            self.errors += 1
+        finally:
+            writer.close()
+
+    def report(self, sessions: int, elapsed: float) -> Payload:
+        lat = sorted(self.latencies)
+        ms = lambda v: round(v * 1e3, 3)
+        return {
+            "sessions": sessions,
+            "requests": len(lat),
+            "rps": round(len(lat) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": ms(percentile(lat, 50)),
+            "p90_ms": ms(percentile(lat, 90)),
+            "p99_ms": ms(percentile(lat, 99)),
+            "max_ms": ms(lat[-1]) if lat else 0.0,
+            "errors": self.errors,
+            "connect_errors": self.connect_errors,
+        }
+
+
+async def run_load(host: str, port: int, sessions: int, duration: float, mode: str = "ws",
+                   connections: int = 100, think: float = 0.0, seed: int = 0,
+                   connect_concurrency: int = 200) -> Payload:
+    """Drive ``sessions`` concurrent sessions for ``duration`` seconds; the report."""
+    run = Run(host, port, duration, think, seed)
+    if mode == "ws":
+        gate = asyncio.Semaphore(connect_concurrency)  # don't overflow the accept backlog
+        tasks = [asyncio.create_task(run.ws_session(i, gate)) for i in range(sessions)]
+        while run.settled < sessions:  # every session connected (or failed) before the clock starts
+            await asyncio.sleep(0.05)
+    else:
+        per = [[("", {})] * (sessions // connections + (1 if w < sessions % connections else 0))
+               for w in range(min(connections, sessions))]
+        tasks = [asyncio.create_task(run.http_worker(s, w)) for w, s in enumerate(per)]
+        await asyncio.sleep(0.5 + sessions / 5000)  # let workers create their sessions
+    t0 = time.perf_counter()
+    run.stop_at = t0 + duration
+    run.ready.set()
+    await asyncio.gather(*tasks)
+    return run.report(sessions, time.perf_counter() - t0)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Load-test the Sorque game server.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--sessions", default="1000", help="comma-separated concurrent session counts")
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    ap.add_argument("--mode", choices=("ws", "http"), default="ws")
+    ap.add_argument("--connections", type=int, default=100, help="HTTP keep-alive connections (http mode)")
+    ap.add_argument("--think", type=float, default=0.0, help="mean seconds between a session's clicks")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", action="store_true", help="print reports as JSON")
+    args = ap.parse_args(argv)
+
+    raise_fd_limit()
+    reports = []
+    for n in (int(s) for s in args.sessions.split(",") if s.strip()):
+        r = asyncio.run(run_load(args.host, args.port, n, args.duration, args.mode,
+                                 args.connections, args.think, args.seed))
+        reports.append(r)
+        if not args.json:
+            print("  ".join(f"{k}={v}" for k, v in r.items()), flush=True)
+    if args.json:
+        json.dump(reports, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
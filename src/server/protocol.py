@@ -0,0 +1,219 @@
+# src/server/protocol.py
+"""Minimal HTTP/1.1 and WebSocket (RFC 6455) framing over asyncio streams.
+
+Just enough for a JSON API: requests with ``Content-Length`` bodies and
+keep-alive, the WebSocket upgrade handshake, and text/binary/control frames
+(fragmented messages are reassembled). Both sides are here -- the server
+reads masked client frames, the load generator writes them.
+"""
+from __future__ import annotations
+import asyncio
+import base64
+import hashlib
+import json
+import os
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+MAX_BODY = 1 << 20  # bytes; larger requests/messages are rejected
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ProtocolError(Exception):
+    pass
+
+
+# -----------------------------
+# HTTP
+# -----------------------------
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes
+
+    @property
+    def keep_alive(self) -> bool:
+        return self.headers.get("connection", "").lower() != "close"
+
+    @property
+    def wants_websocket(self) -> bool:
+        return self.headers.get("upgrade", "").lower() == "websocket"
+
+    def json(self) -> Dict[str, Any]:
+        if not self.body:
+            return {}
+        data = json.loads(self.body)
+        if not isinstance(data, dict):
+            raise ValueError("body must be a JSON object")
+        return data
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        k, _, v = line.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Request]:
+    """The next request on a connection, or None when the client closed it."""
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise ProtocolError(f"bad request line {line!r}")
+    method, target, _version = parts
+    headers = await _read_headers(reader)
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_BODY:
+        raise ProtocolError("request body too large")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    return Request(method.upper(), url.path, dict(parse_qsl(url.query)), headers, body)
+
+
+def json_response(status: int, payload: Any, keep_alive: bool = True) -> bytes:
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return _response(status, body, "application/json", keep_alive)
+
+
+def text_response(status: int, text: str, keep_alive: bool = True,
+                  content_type: str = "text/plain; version=0.0.4; charset=utf-8") -> bytes:
+    """A plain-text response (default content type: Prometheus exposition)."""
+    return _response(status, text.encode("utf-8"), content_type, keep_alive)
+
+
+def _response(status: int, body: bytes, content_type: str, keep_alive: bool) -> bytes:
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """(status, body) of a ``Content-Length`` response (client side)."""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    status = int(line.split(b" ", 2)[1])
+    headers = await _read_headers(reader)
+    length = int(headers.get("content-length") or 0)
+    return status, await reader.readexactly(length) if length else b""
+
+
+def json_request(method: str, path: str, host: str, payload: Optional[Dict[str, Any]] = None) -> bytes:
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8") if payload is not None else b""
+    head = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+# -----------------------------
+# WebSocket
+# -----------------------------
+
+def ws_accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode("ascii")).digest()).decode("ascii")
+
+
+def ws_handshake_response(req: Request) -> bytes:
+    key = req.headers.get("sec-websocket-key")
+    if not key:
+        raise ProtocolError("missing Sec-WebSocket-Key")
+    return ("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {ws_accept_key(key)}\r\n\r\n").encode("latin-1")
+
+
+def _xor(data: bytes, mask: bytes) -> bytes:
+    n = len(data)
+    if not n:
+        return data
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(n, "big")
+
+
+def ws_frame(opcode: int, payload: bytes, mask: bool = False) -> bytes:
+    """One final frame; clients must ``mask``, servers must not."""
+    n = len(payload)
+    head = bytearray([0x80 | opcode])
+    mbit = 0x80 if mask else 0
+    if n < 126:
+        head.append(mbit | n)
+    elif n < 1 << 16:
+        head.append(mbit | 126)
+        head += n.to_bytes(2, "big")
+    else:
+        head.append(mbit | 127)
+        head += n.to_bytes(8, "big")
+    if mask:
+        key = os.urandom(4)
+        return bytes(head) + key + _xor(payload, key)
+    return bytes(head) + payload
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[bool, int, bytes]:
+    b0, b1 = await reader.readexactly(2)
+    n = b1 & 0x7F
+    if n == 126:
+        n = int.from_bytes(await reader.readexactly(2), "big")
+    elif n == 127:
+        n = int.from_bytes(await reader.readexactly(8), "big")
+    if n > MAX_BODY:
+        raise ProtocolError("frame too large")
+    key = await reader.readexactly(4) if b1 & 0x80 else None
+    data = await reader.readexactly(n) if n else b""
+    return bool(b0 & 0x80), b0 & 0x0F, _xor(data, key) if key else data
+
+
+async def ws_read_message(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                          mask: bool = False) -> Optional[bytes]:
+    """The next data message (fragments joined), answering pings on the way.
+    None once the peer sends close (which is echoed) or the stream ends."""
+    parts = []
+    while True:
+        try:
+            fin, opcode, data = await _read_frame(reader)
+        except asyncio.IncompleteReadError:
+            return None
+        if opcode == OP_PING:
+            writer.write(ws_frame(OP_PONG, data, mask))
+            continue
+        if opcode == OP_PONG:
+            continue
+        if opcode == OP_CLOSE:
+            writer.write(ws_frame(OP_CLOSE, data[:2], mask))
+            return None
+        parts.append(data)
+        if sum(map(len, parts)) > MAX_BODY:
+            raise ProtocolError("message too large")
+        if fin:
+            return b"".join(parts)
+
+
+async def ws_connect(host: str, port: int, path: str = "/ws") -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Open a client WebSocket; returns the raw streams."""
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n")
+                 .encode("latin-1"))
+    line = await reader.readline()
+    headers = await _read_headers(reader)
+    if b" 101 " not in line or headers.get("sec-websocket-accept") != ws_accept_key(key):
+        writer.close()
+        raise ProtocolError(f"WebSocket upgrade refused: {line!r}")
+    return reader, writer